@@ -0,0 +1,117 @@
+"""
+Async versions of the hottest read routes.
+
+Included ahead of the sync routes in main.py when ASYNC_ROUTES=true, so the
+same paths are then served from the event loop over the async engine
+(asyncpg / aiosqlite) instead of occupying a threadpool thread each.
+Concurrency is then bounded by the connection pool, not by thread count.
+"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from backend import catalog, crud, foldertree, models, schemas
+from backend.database import get_async_db
+from backend.pagination import PageRequest
+from backend.security import get_curr_student_async
+
+router = APIRouter()
+
+
+""" Student catalog """
+
+@router.get("/student")
+async def student_all_courses(
+    page: PageRequest = Depends(),
+    student: models.Student = Depends(get_curr_student_async),
+    db = Depends(get_async_db)
+):
+    courses = await db.run_sync(catalog.course_page, page)
+
+    my_list = (await db.execute(
+        select(models.Course).join(
+            models.course_student_link,
+            models.Course.course_id == models.course_student_link.c.course_id
+        ).where(models.course_student_link.c.student_id == student.student_id)
+    )).scalars().all()
+
+    return {
+        "student_id": student.student_id,
+        "student_name": student.name,
+        **courses,
+        "my_list": my_list
+    }
+
+
+""" Course structure """
+
+@router.get("/courses/{course_id}", response_model=List[schemas.FolderSchema])
+async def get_course_structure(
+    course_id: int,
+    db = Depends(get_async_db)
+):
+    return await db.run_sync(foldertree.folder_trees.get_tree, course_id)
+
+
+""" Content fetch """
+
+@router.get("/content/batch", response_model=schemas.ContentBatch)
+async def get_content_batch(
+    item_ids: List[int] = Query(..., max_length=crud.CONTENT_BATCH_MAX_ITEMS),
+    db = Depends(get_async_db)
+):
+    return await db.run_sync(crud.get_content_batch, item_ids)
+
+
+@router.get("/content/video/{item_id}", response_model=schemas.Video)
+async def get_video_content(
+    item_id: int,
+    db = Depends(get_async_db)
+):
+    # item -> video in one query instead of two
+    video = (await db.execute(
+        select(models.Video).join(
+            models.FolderItem, models.FolderItem.video_id == models.Video.video_id
+        ).where(models.FolderItem.item_id == item_id)
+    )).scalars().first()
+
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found for this item")
+    return video
+
+
+@router.get("/content/notes/{item_id}", response_model=schemas.Notes)
+async def get_notes_content(
+    item_id: int,
+    db = Depends(get_async_db)
+):
+    notes = (await db.execute(
+        select(models.Notes).join(
+            models.FolderItem, models.FolderItem.notes_id == models.Notes.notes_id
+        ).where(models.FolderItem.item_id == item_id)
+    )).scalars().first()
+
+    if not notes:
+        raise HTTPException(status_code=404, detail="Notes not found for this item")
+    return notes
+
+
+@router.get("/content/book/{item_id}", response_model=schemas.Textbook)
+async def get_textbook_content(
+    item_id: int,
+    db = Depends(get_async_db)
+):
+    # a course has one textbook: item -> folder -> course's textbook, one query
+    textbook = (await db.execute(
+        select(models.Textbook).join(
+            models.Folder, models.Folder.course_id == models.Textbook.course_id
+        ).join(
+            models.FolderItem, models.FolderItem.folder_id == models.Folder.folder_id
+        ).where(models.FolderItem.item_id == item_id, models.FolderItem.item_type == "textbook")
+    )).scalars().first()
+
+    if not textbook:
+        raise HTTPException(status_code=404, detail="Textbook not found for this item")
+    # edition is optional on older rows; the sync route reports it as "N/A"
+    return schemas.Textbook.model_validate(textbook).model_copy(
+        update={"edition": textbook.edition or "N/A"}
+    )
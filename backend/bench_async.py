@@ -0,0 +1,140 @@
+"""
+Sync vs async read path benchmark.
+
+Fires the same mix of hot read requests (student catalog, course structure,
+video, notes and textbook content) at the sync routes in main.py and at their async versions in
+async_routes.py, with N concurrent clients, and prints throughput and
+p50/p99 latency for both.
+
+    python -m backend.bench_async --requests 2000 --concurrency 50
+    python -m backend.bench_async --db-url postgresql://...   # throwaway database!
+
+On SQLite the async driver (aiosqlite) runs each connection on its own
+thread, so expect the gap to show mainly on PostgreSQL/asyncpg.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--requests", type=int, default=2000, help="requests per mode")
+parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+parser.add_argument("--courses", type=int, default=50)
+parser.add_argument("--db-url", help="defaults to a throwaway SQLite file")
+args = parser.parse_args()
+
+# Must be configured before the app is imported
+_tmp_dir = tempfile.mkdtemp(prefix="mooc-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = args.db_url or f"sqlite:///{_tmp_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ["HASH_POOL_WORKERS"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx
+from fastapi import FastAPI
+from backend import main, models, database, async_routes, migrations
+
+EMAIL = "bench.student@example.com"
+PASSWORD = "bench-password"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed(course_count):
+    db = database.SessionLocal()
+    try:
+        university = models.University(name="Bench University", city="Bench", country="Bench")
+        program = models.Program(program_type="Bench")
+        db.add_all([university, program])
+        db.flush()
+        courses = [
+            models.Course(course_name=f"Course {i}", duration=10, skill_level="Beginner",
+                          course_fees=100, program_id=program.program_id, institute_id=university.institute_id)
+            for i in range(course_count)
+        ]
+        db.add_all(courses)
+        db.flush()
+
+        course_id = courses[0].course_id
+        folder = models.Folder(title="General", course_id=course_id)
+        video = models.Video(title="Intro", duration=5, url_link="https://example.com/v", course_id=course_id)
+        notes = models.Notes(title="Intro notes", url_link="https://example.com/n", document_type="pdf",
+                             course_id=course_id)
+        textbook = models.Textbook(title="Bench Book", author="Bench", publisher="Bench", course_id=course_id)
+        db.add_all([folder, video, notes, textbook])
+        db.flush()
+        items = [
+            models.FolderItem(folder_id=folder.folder_id, item_type="video", video_id=video.video_id),
+            models.FolderItem(folder_id=folder.folder_id, item_type="notes", notes_id=notes.notes_id),
+            models.FolderItem(folder_id=folder.folder_id, item_type="textbook"),
+        ]
+        db.add_all(items)
+        db.commit()
+        return course_id, [item.item_id for item in items]
+    finally:
+        db.close()
+
+
+async def run_mode(label, app, paths, headers):
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async def worker(client):
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            r = await client.get(path, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # warm up connections and caches
+        for path in paths:
+            await client.get(path, headers=headers)
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+
+    print(f"\n⏱  {label}")
+    print(f"   {args.requests / elapsed:8.1f} req/s   p50={percentile(latencies, 50):7.2f} ms   p99={percentile(latencies, 99):7.2f} ms")
+    print(f"   responses: {statuses}")
+
+
+async def main_async():
+    migrations.upgrade()
+    course_id, (video_item, notes_item, book_item) = seed(args.courses)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/signup", json={
+            "email": EMAIL, "full_name": "Bench Student", "role": "student", "password": PASSWORD
+        })
+        r = await client.post("/login", json={"email": EMAIL, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    paths = ["/student", f"/courses/{course_id}", f"/content/video/{video_item}",
+             f"/content/notes/{notes_item}", f"/content/book/{book_item}"]
+
+    async_app = FastAPI()
+    async_app.include_router(async_routes.router)
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients, "
+          f"pool {database.DB_POOL_SIZE}+{database.DB_MAX_OVERFLOW}, {database.engine.dialect.name}")
+    await run_mode("sync routes (threadpool)", main.app, paths, headers)
+    await run_mode("async routes (event loop)", async_app, paths, headers)
+    await database.dispose_async_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
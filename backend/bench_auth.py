@@ -0,0 +1,129 @@
+"""
+Login-burst benchmark.
+
+Measures p50/p99 latency of a cheap sync route (/universities) on its own and
+while a burst of concurrent /login requests is running, once with bcrypt on
+the shared threadpool (HASH_POOL_WORKERS=0, the old behaviour) and once with
+the dedicated hashing process pool. Rate limiting is off so the burst times
+bcrypt and /login rather than 429s; the limiter's own cost per check is
+timed separately, for the memory and the SQLite bucket stores.
+
+    python -m backend.bench_auth --logins 200 --probes 200
+"""
+import argparse
+import asyncio
+import dataclasses
+import os
+import tempfile
+import time
+
+# Throwaway SQLite database; must be configured before the app is imported
+_tmp_dir = tempfile.mkdtemp(prefix="mooc-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_tmp_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+# 20 logins per IP per minute would turn the burst into 429s
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx
+from backend import main, hashing, migrations, ratelimit
+from backend.config import get_settings
+
+EMAIL = "bench.user@example.com"
+PASSWORD = "bench-password"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(client, count, interval):
+    """Sequential requests to a non-auth route, returning latencies in ms"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.get("/universities")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_burst(client, count):
+    responses = await asyncio.gather(*[
+        client.post("/login", json={"email": EMAIL, "password": PASSWORD})
+        for _ in range(count)
+    ])
+    statuses = {}
+    for r in responses:
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+    return statuses
+
+
+async def run_mode(label, workers, args):
+    hashing.shutdown_pool()
+    # the whole burst may queue: time hashing, not 503s
+    hashing.settings = dataclasses.replace(
+        get_settings(), hash_pool_workers=workers,
+        hash_queue_limit=max(get_settings().hash_queue_limit, args.logins + 1),
+    )
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # warm up the pool and the DB connection
+        await client.post("/login", json={"email": EMAIL, "password": PASSWORD})
+
+        idle = await probe(client, args.probes, args.interval)
+
+        burst = asyncio.create_task(login_burst(client, args.logins))
+        await asyncio.sleep(0.05)
+        busy = await probe(client, args.probes, args.interval)
+        statuses = await burst
+
+    print(f"\n⏱  {label}")
+    print(f"   idle   p50={percentile(idle, 50):7.2f} ms   p99={percentile(idle, 99):7.2f} ms")
+    print(f"   burst  p50={percentile(busy, 50):7.2f} ms   p99={percentile(busy, 99):7.2f} ms")
+    print(f"   login responses: {statuses}")
+
+
+def bench_limiter(checks):
+    """Per-check latency of the token-bucket stores, one bucket per simulated client"""
+    stores = [
+        ("memory store", ratelimit.MemoryBucketStore()),
+        ("sqlite store", ratelimit.SQLiteBucketStore(os.path.join(_tmp_dir, "ratelimit.db"))),
+    ]
+    for label, store in stores:
+        limiter = ratelimit.RateLimiter(store, ratelimit.load_rules(), enabled=True)
+        latencies = []
+        for i in range(checks):
+            start = time.perf_counter()
+            limiter.hit("login_ip", f"10.0.{i % 256}.{i // 256 % 256}")
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"\n⏱  rate limiter, {label}")
+        print(f"   check  p50={percentile(latencies, 50):7.3f} ms   p99={percentile(latencies, 99):7.3f} ms")
+
+
+async def main_async(args):
+    migrations.upgrade()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/signup", json={
+            "email": EMAIL, "full_name": "Bench User", "role": "student", "password": PASSWORD
+        })
+
+    await run_mode("bcrypt on the shared threadpool", 0, args)
+    await run_mode(f"bcrypt in a {args.workers}-process hashing pool", args.workers, args)
+    hashing.shutdown_pool()
+    bench_limiter(args.limiter_checks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="concurrent /login requests in the burst")
+    parser.add_argument("--probes", type=int, default=200, help="probe requests per phase")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between probes")
+    parser.add_argument("--workers", type=int, default=max(1, get_settings().hash_pool_workers))
+    parser.add_argument("--limiter-checks", type=int, default=2000, help="rate-limit checks per store")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
@@ -0,0 +1,185 @@
+"""
+Index migration benchmark.
+
+Loads a synthetic dataset (1M enrollments by default) into a throwaway
+database without the indexes added by migration 0002, times the queries the
+affected routes run, applies the migrations and times them again.
+
+    python -m backend.bench_indexes --enrollments 1000000 --lookups 200
+    python -m backend.bench_indexes --db-url postgresql://...   # throwaway database!
+
+Data scales with --enrollments: one student per 10 enrollments, one course
+per 500, 10 assignments per course, half a submission per enrollment.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--enrollments", type=int, default=1_000_000)
+parser.add_argument("--lookups", type=int, default=200, help="timed lookups per query")
+parser.add_argument("--db-url", help="defaults to a throwaway SQLite file")
+args = parser.parse_args()
+
+# Must be configured before the backend is imported
+_tmp_dir = tempfile.mkdtemp(prefix="mooc-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = args.db_url or f"sqlite:///{_tmp_dir}/bench.db"
+os.environ["REPLICA_DATABASE_URLS"] = ""
+
+from sqlalchemy import text
+from backend import crud, database, migrations, models
+
+NEW_INDEXES = [
+    "ix_course_student_link_student_id", "ix_course_instructor_link_instructor_id",
+    "uq_evaluation_course_student", "ix_student_submission_assignment_student",
+    "ix_folders_course_parent", "ix_folder_items_folder_id", "ix_assignment_course_id",
+    "ix_users_email_role",
+]
+BATCH = 50_000
+
+
+def insert_rows(conn, table, rows):
+    for i in range(0, len(rows), BATCH):
+        conn.execute(table.insert(), rows[i:i + BATCH])
+
+
+def seed(engine):
+    """The schema as it was before migration 0002, filled with synthetic data."""
+    database.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in NEW_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    rng = random.Random(42)
+    students = max(1, args.enrollments // 10)
+    courses = max(10, args.enrollments // 500)
+    instructors = max(1, courses // 4)
+    per_student = min(courses, max(1, args.enrollments // students))
+
+    with engine.begin() as conn:
+        insert_rows(conn, models.Course.__table__, [
+            {"course_id": c, "course_name": f"Course {c}", "duration": 10, "skill_level": "Beginner", "course_fees": 100}
+            for c in range(1, courses + 1)
+        ])
+        insert_rows(conn, models.Student.__table__, [
+            {"student_id": s, "name": f"Student {s}", "email_id": f"s{s}@bench.edu"}
+            for s in range(1, students + 1)
+        ])
+        insert_rows(conn, models.User.__table__, [
+            {"full_name": f"Student {s}", "email": f"s{s}@bench.edu", "hashed_password": "x", "role": "student"}
+            for s in range(1, students + 1)
+        ])
+        insert_rows(conn, models.Instructor.__table__, [
+            {"instructor_id": i, "name": f"Instructor {i}", "email_id": f"i{i}@bench.edu"}
+            for i in range(1, instructors + 1)
+        ])
+        insert_rows(conn, models.course_instructor_link, [
+            {"course_id": c, "instructor_id": rng.randint(1, instructors)} for c in range(1, courses + 1)
+        ])
+
+        enrollments = [
+            {"course_id": c, "student_id": s}
+            for s in range(1, students + 1) for c in rng.sample(range(1, courses + 1), per_student)
+        ]
+        insert_rows(conn, models.course_student_link, enrollments)
+
+        insert_rows(conn, models.Assignment.__table__, [
+            {"assignment_id": (c - 1) * 10 + a, "title": f"A{a}", "assignment_url_link": "https://example.com/a",
+             "marks": 100, "course_id": c}
+            for c in range(1, courses + 1) for a in range(1, 11)
+        ])
+        insert_rows(conn, models.StudentSubmission.__table__, [
+            {"assignment_id": (e["course_id"] - 1) * 10 + rng.randint(1, 10), "student_id": e["student_id"],
+             "submission_url": "https://example.com/s", "obtained_marks": rng.randint(0, 100), "status": "Graded"}
+            for e in enrollments[::2]
+        ])
+        insert_rows(conn, models.Evaluation.__table__, [
+            {"course_id": e["course_id"], "student_id": e["student_id"], "marks": rng.randint(0, 100), "grade": "B"}
+            for e in enrollments[::5]
+        ])
+
+        folders = []
+        for c in range(1, courses + 1):
+            for f in range(4):
+                folders.append({"folder_id": len(folders) + 1, "title": f"Folder {f}", "course_id": c, "parent_id": None})
+        for parent in list(folders):
+            folders.append({"folder_id": len(folders) + 1, "title": "Week", "course_id": parent["course_id"],
+                            "parent_id": parent["folder_id"]})
+        insert_rows(conn, models.Folder.__table__, folders)
+        insert_rows(conn, models.FolderItem.__table__, [
+            {"folder_id": f["folder_id"], "item_type": "video"} for f in folders for _ in range(3)
+        ])
+
+    return {"students": students, "courses": courses, "instructors": instructors, "folders": len(folders)}
+
+
+def queries(sizes):
+    """(label, fn(db, rng)) for the statements behind the routes the new indexes serve."""
+    def pick(rng, key):
+        return rng.randint(1, sizes[key])
+
+    return [
+        ("student catalog       /student", lambda db, rng: crud.get_student_courses(db, pick(rng, "students"))),
+        ("instructor courses    /instructor", lambda db, rng: crud.get_instructor_courses(db, pick(rng, "instructors"))),
+        ("course assignments    course delete cascade",
+         lambda db, rng: crud.get_assignment_by_course_id(db, pick(rng, "courses"))),
+        ("student submissions   .../stud_list/{student_id}",
+         lambda db, rng: db.query(models.StudentSubmission, models.Assignment).join(
+             models.Assignment, models.StudentSubmission.assignment_id == models.Assignment.assignment_id
+         ).filter(
+             models.StudentSubmission.student_id == pick(rng, "students"),
+             models.Assignment.course_id == pick(rng, "courses")
+         ).all()),
+        ("course evaluation     .../{course_id}/evaluation",
+         lambda db, rng: crud.get_student_overall_evaluation(db, pick(rng, "students"), pick(rng, "courses"))),
+        ("top folders           /courses/{course_id}",
+         lambda db, rng: crud.get_top_folders_by_course(db, [pick(rng, "courses")])),
+        ("folder items (lazy)   /courses/{course_id}",
+         lambda db, rng: db.query(models.FolderItem).filter(
+             models.FolderItem.folder_id == pick(rng, "folders")).all()),
+        ("principal lookup      (every authenticated call)",
+         lambda db, rng: db.query(models.User).filter(
+             models.User.email == f"s{pick(rng, 'students')}@bench.edu", models.User.role == "student").first()),
+    ]
+
+
+def time_queries(sizes):
+    results = {}
+    db = database.SessionLocal()
+    try:
+        for label, fn in queries(sizes):
+            rng = random.Random(7)  # same ids before and after
+            fn(db, rng)
+            start = time.perf_counter()
+            for _ in range(args.lookups):
+                fn(db, rng)
+                db.expunge_all()
+            results[label] = (time.perf_counter() - start) * 1000 / args.lookups
+    finally:
+        db.close()
+    return results
+
+
+def main():
+    engine = database.engine
+    print(f"🗄  {engine.dialect.name}, {args.enrollments:,} enrollments")
+    start = time.perf_counter()
+    sizes = seed(engine)
+    print(f"   seeded in {time.perf_counter() - start:.1f}s: {sizes}")
+
+    before = time_queries(sizes)
+    start = time.perf_counter()
+    migrations.upgrade(engine)
+    print(f"   migrations applied in {time.perf_counter() - start:.1f}s")
+    after = time_queries(sizes)
+
+    print(f"\n⏱  mean per lookup over {args.lookups} lookups")
+    print(f"   {'query':50} {'before':>10} {'after':>10} {'speedup':>9}")
+    for label, ms in before.items():
+        print(f"   {label:50} {ms:8.2f}ms {after[label]:8.2f}ms {ms / max(after[label], 1e-9):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+SQLite settings benchmark.
+
+Runs the same concurrent workload (writer threads committing assignment
+submissions, like a submission deadline, and reader threads running
+gradebook-style queries) against a fresh SQLite file in three modes:
+
+    default  the old settings (rollback journal, synchronous=FULL, no mmap)
+    tuned    SQLITE_TUNED=true (WAL, synchronous=NORMAL, mmap, cache, busy_timeout)
+    split    tuned + one writer connection and a read-only reader pool
+
+    python -m backend.bench_sqlite --seconds 10 --writers 8 --readers 16
+
+Each mode runs in its own process because the settings are read at import.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = {
+    "default": {},
+    "tuned": {"SQLITE_TUNED": "true"},
+    "split": {"SQLITE_TUNED": "true", "SQLITE_READER_POOL_SIZE": "8"},
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_workload(args):
+    """Child process: the database settings were put in the environment by the parent."""
+    from sqlalchemy import func
+    from sqlalchemy.exc import OperationalError
+    from backend import database, models, replicas
+
+    database.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    course = models.Course(course_name="Bench", duration=1, skill_level="Beginner", course_fees=0)
+    db.add(course)
+    db.flush()
+    assignments = [
+        models.Assignment(title=f"A{i}", assignment_url_link="https://example.com/a", course_id=course.course_id)
+        for i in range(20)
+    ]
+    db.add_all(assignments)
+    db.commit()
+    assignment_ids = [a.assignment_id for a in assignments]
+    db.close()
+
+    deadline = time.perf_counter() + args.seconds
+    results = {"writes": [], "reads": [], "write_errors": 0, "read_errors": 0}
+    lock = threading.Lock()
+
+    def read_session():
+        replica = replicas.router.pick(None)
+        return replica.sessionmaker() if replica else database.SessionLocal()
+
+    def writer():
+        latencies, errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            session = database.SessionLocal()
+            try:
+                session.add(models.StudentSubmission(
+                    assignment_id=random.choice(assignment_ids),
+                    student_id=random.randint(1, 5000),
+                    submission_url="https://example.com/s",
+                    status="Pending",
+                ))
+                session.commit()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                session.rollback()
+                errors += 1
+            finally:
+                session.close()
+        with lock:
+            results["writes"].extend(latencies)
+            results["write_errors"] += errors
+
+    def reader():
+        latencies, errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            session = read_session()
+            try:
+                session.query(
+                    models.StudentSubmission.assignment_id, func.count(models.StudentSubmission.submission_id)
+                ).group_by(models.StudentSubmission.assignment_id).all()
+                session.query(models.StudentSubmission).filter(
+                    models.StudentSubmission.student_id == random.randint(1, 5000)
+                ).order_by(models.StudentSubmission.submitted_at.desc()).limit(20).all()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                errors += 1
+            finally:
+                session.close()
+        with lock:
+            results["reads"].extend(latencies)
+            results["read_errors"] += errors
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(json.dumps({
+        "writes_per_s": len(results["writes"]) / args.seconds,
+        "reads_per_s": len(results["reads"]) / args.seconds,
+        "write_p99_ms": percentile(results["writes"], 99),
+        "read_p99_ms": percentile(results["reads"], 99),
+        "write_errors": results["write_errors"],
+        "read_errors": results["read_errors"],
+    }))
+
+
+def main(args):
+    print(f"⏱  {args.seconds}s per mode, {args.writers} writer / {args.readers} reader threads")
+    print(f"   {'mode':8} {'writes/s':>10} {'reads/s':>10} {'write p99':>11} {'read p99':>10} {'errors w/r':>11}")
+    for mode, overrides in MODES.items():
+        tmp_dir = tempfile.mkdtemp(prefix="mooc-bench-")
+        env = {k: v for k, v in os.environ.items() if not k.startswith("SQLITE_")}
+        env.update(overrides)
+        env["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_dir}/bench.db"
+        env["REPLICA_DATABASE_URLS"] = ""
+        child = subprocess.run(
+            [sys.executable, "-m", "backend.bench_sqlite", "--child",
+             "--seconds", str(args.seconds), "--writers", str(args.writers), "--readers", str(args.readers)],
+            env=env, capture_output=True, text=True,
+        )
+        if child.returncode != 0:
+            print(f"❌ {mode} failed:\n{child.stderr}")
+            continue
+        r = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f"   {mode:8} {r['writes_per_s']:10.1f} {r['reads_per_s']:10.1f} "
+              f"{r['write_p99_ms']:9.1f}ms {r['read_p99_ms']:8.1f}ms {r['write_errors']:>5}/{r['read_errors']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_workload(args)
+    else:
+        main(args)
@@ -0,0 +1,132 @@
+"""
+Cold-start benchmark.
+
+Starts fresh interpreters that import backend.main under `python -X importtime`
+and run the app's lifespan startup, the way every uvicorn worker (re)start
+does, and reports:
+
+    import    cumulative import time of backend.main (from -X importtime)
+    startup   lifespan startup (MIGRATE_ON_STARTUP is off unless you set it)
+    process   interpreter start to ready, wall clock
+
+plus the modules with the largest self import time. The database file the
+child points at must still not exist afterwards: importing and starting a
+worker needs no database.
+
+    python -m backend.bench_startup --runs 5 --top 15
+    python -m backend.bench_startup --json >> startup-history.jsonl   # track over time
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+
+def run_child():
+    """Child process: import and start the app, print the timings as JSON."""
+    start = time.perf_counter()
+    from backend import main
+    imported = time.perf_counter()
+
+    import asyncio
+
+    async def start_app():
+        async with main.lifespan(main.app):
+            return time.perf_counter()
+
+    ready = asyncio.run(start_app())
+    print(json.dumps({"import_s": imported - start, "startup_s": ready - imported}))
+
+
+def parse_importtime(stderr: str):
+    """{module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(env):
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "backend.bench_startup", "--child"],
+        env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr[-2000:])
+    timings = json.loads(child.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(child.stderr)
+    return {
+        "import_ms": modules["backend.main"][1] / 1000,
+        "startup_ms": timings["startup_s"] * 1000,
+        "process_ms": wall * 1000,
+        "modules": modules,
+    }
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="mooc-bench-")
+    db_path = os.path.join(tmp_dir, "never-created.db")
+    env = dict(os.environ)
+    env["SQLALCHEMY_DATABASE_URI"] = args.db_url or f"sqlite:///{db_path}"
+    env.setdefault("SECRET_KEY", "bench-secret")
+    env["ENV_FILE"] = os.devnull  # measure this environment, not the local .env
+
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    summary = {
+        key: statistics.median(run[key] for run in runs) for key in ("import_ms", "startup_ms", "process_ms")
+    }
+    self_us = defaultdict(list)
+    for r in runs:
+        for name, (own, _) in r["modules"].items():
+            self_us[name].append(own)
+    slowest = sorted(((statistics.median(v) / 1000, name) for name, v in self_us.items()), reverse=True)[:args.top]
+    backend_ms = sum(statistics.median(v) for name, v in self_us.items() if name.startswith("backend")) / 1000
+    database_touched = not args.db_url and os.path.exists(db_path)
+
+    if args.json:
+        print(json.dumps({
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            **{k: round(v, 1) for k, v in summary.items()},
+            "backend_self_ms": round(backend_ms, 1),
+            "database_touched": database_touched,
+        }))
+        return
+
+    print(f"⏱  cold start, median of {args.runs} fresh interpreters")
+    print(f"   import backend.main   {summary['import_ms']:8.1f} ms   (backend.* own code {backend_ms:.1f} ms)")
+    print(f"   lifespan startup      {summary['startup_ms']:8.1f} ms")
+    print(f"   process to ready      {summary['process_ms']:8.1f} ms")
+    print(f"\n   slowest modules (self time)")
+    for ms, name in slowest:
+        print(f"   {ms:8.1f} ms  {name}")
+    if args.db_url:
+        return
+    print("\n❌ the database was touched during import/startup" if database_touched
+          else "\n✅ no database access during import/startup")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--db-url", help="defaults to a SQLite file that must never be created")
+    parser.add_argument("--json", action="store_true", help="one JSON line, for tracking over time")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+    else:
+        main(args)
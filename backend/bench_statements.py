@@ -0,0 +1,140 @@
+"""
+Prebuilt statement microbenchmark.
+
+Calls each hot lookup in a loop two ways against a small throwaway SQLite
+database: the old per-call db.query(...) chain and the prebuilt select() in
+crud.py / security.py. SQLite answers these in microseconds, so the
+difference is the Python cost of building the query, computing its cache
+key and fetching the compiled form. Also reports how often the engine's
+compiled cache was hit.
+
+    python -m backend.bench_statements --calls 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--calls", type=int, default=5000, help="calls per lookup and style")
+args = parser.parse_args()
+
+# Must be configured before the backend is imported
+_tmp_dir = tempfile.mkdtemp(prefix="mooc-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_tmp_dir}/bench.db"
+os.environ["REPLICA_DATABASE_URLS"] = ""
+
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+from backend import crud, database, migrations, models, security
+
+cache_stats = {"hits": 0, "statements": 0}
+
+
+@event.listens_for(database.engine, "after_cursor_execute")
+def _count_cache_hits(conn, cursor, statement, parameters, context, executemany):
+    cache_stats["statements"] += 1
+    if context.cache_hit == CACHE_HIT:
+        cache_stats["hits"] += 1
+
+
+def seed(db):
+    courses = [models.Course(course_name=f"Course {i}", duration=10, skill_level="Beginner", course_fees=100)
+               for i in range(5)]
+    student = models.Student(name="Bench Student", email_id="student@bench.edu")
+    instructor = models.Instructor(name="Bench Instructor", email_id="instructor@bench.edu")
+    user = models.User(full_name="Bench Student", email="student@bench.edu", hashed_password="x", role="student")
+    db.add_all(courses + [student, instructor, user])
+    db.flush()
+    for course in courses:
+        db.execute(models.course_student_link.insert().values(course_id=course.course_id, student_id=student.student_id))
+        db.execute(models.course_instructor_link.insert().values(
+            course_id=course.course_id, instructor_id=instructor.instructor_id))
+        db.add(models.Assignment(title="A1", assignment_url_link="https://example.com/a", course_id=course.course_id))
+    db.commit()
+    return courses[0].course_id, student, instructor, user
+
+
+""" The per-call query chains these lookups used before """
+
+def legacy_course_by_id(db, course_id):
+    return db.query(models.Course).filter(models.Course.course_id == course_id).first()
+
+def legacy_student_courses(db, student_id):
+    return db.query(models.Course).join(
+        models.course_student_link,
+        models.Course.course_id == models.course_student_link.c.course_id
+    ).filter(models.course_student_link.c.student_id == student_id).all()
+
+def legacy_course_instructors(db, course_id):
+    return db.query(models.Instructor).join(
+        models.course_instructor_link,
+        models.Instructor.instructor_id == models.course_instructor_link.c.instructor_id
+    ).filter(models.course_instructor_link.c.course_id == course_id).all()
+
+def legacy_course_students(db, course_id):
+    return db.query(models.Student).join(
+        models.course_student_link,
+        models.Student.student_id == models.course_student_link.c.student_id
+    ).filter(models.course_student_link.c.course_id == course_id).all()
+
+def legacy_course_assignments(db, course_id):
+    return db.query(models.Assignment).filter(models.Assignment.course_id == course_id).all()
+
+def legacy_profile_by_claims(db, payload, role):
+    model, id_claim, _, _ = security.ROLE_PROFILES[role]
+    return db.query(model).join(
+        models.User, models.User.email == model.email_id
+    ).filter(
+        getattr(model, id_claim) == payload[id_claim],
+        models.User.id == payload["user_id"],
+        models.User.role == role
+    ).first()
+
+
+def timed(db, fn):
+    fn()
+    db.expunge_all()
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        fn()
+    db.expunge_all()
+    return (time.perf_counter() - start) * 1e6 / args.calls
+
+
+def main():
+    migrations.upgrade()
+    db = database.SessionLocal()
+    try:
+        course_id, student, instructor, user = seed(db)
+        student_id, instructor_id = student.student_id, instructor.instructor_id
+        payload = {"student_id": student_id, "user_id": user.id}
+
+        lookups = [
+            ("get_course_by_id", lambda: legacy_course_by_id(db, course_id),
+             lambda: crud.get_course_by_id(db, course_id)),
+            ("get_student_courses", lambda: legacy_student_courses(db, student_id),
+             lambda: crud.get_student_courses(db, student_id)),
+            ("get_course_instructors", lambda: legacy_course_instructors(db, course_id),
+             lambda: crud.get_course_instructors(db, course_id)),
+            ("get_course_students", lambda: legacy_course_students(db, course_id),
+             lambda: crud.get_course_students(db, course_id)),
+            ("get_assignment_by_course_id", lambda: legacy_course_assignments(db, course_id),
+             lambda: crud.get_assignment_by_course_id(db, course_id)),
+            ("principal by token claims", lambda: legacy_profile_by_claims(db, payload, "student"),
+             lambda: security._load_profile_by_claims(db, payload, "student")),
+        ]
+
+        print(f"⏱  {args.calls} calls each, SQLite, µs per call")
+        print(f"   {'lookup':30} {'query chain':>12} {'prebuilt':>10} {'saved':>8}")
+        for label, legacy, prebuilt in lookups:
+            before, after = timed(db, legacy), timed(db, prebuilt)
+            print(f"   {label:30} {before:12.1f} {after:10.1f} {(before - after) / before:7.0%}")
+    finally:
+        db.close()
+
+    print(f"\n   compiled cache hits: {cache_stats['hits']}/{cache_stats['statements']} statements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Versioned catalog cache.
+
+The course catalog and the university list change rarely but are read on
+every home page load, so each worker keeps their serialized pages in memory,
+tagged with the catalog version they were built at.
+
+The version is the single row of `catalog_version`. Every transaction that
+inserts, updates or deletes a course or a university bumps it before it
+commits (Session hooks below, so crud.create_course, delete_course,
+update_course_fees, admin_create_course and the university routes are all
+covered without touching them). Readers:
+
+- use the cached page while the version they last saw is current. A worker
+  re-reads the version (one indexed single-row SELECT) at most every
+  CATALOG_VERSION_POLL_SECONDS, so a hit costs no database round trip;
+- drop everything as soon as a write commits in this worker;
+- re-read the version on every request from a caller who wrote in the last
+  REPLICA_STICKY_SECONDS (replicas.wrote_recently), so a write made through
+  another worker is never followed by a stale page for the person who made it.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from backend import crud, models, replicas
+
+# Pages kept per worker (0 disables the cache)
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 256))
+# How long a worker trusts its last look at the catalog version
+CATALOG_VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", 2))
+
+CATALOG_MODELS = (models.Course, models.University)
+_CATALOG_TABLES = {model.__tablename__ for model in CATALOG_MODELS}
+
+_VERSION = select(models.CatalogVersion.version).where(models.CatalogVersion.id == 1)
+_BUMP = update(models.CatalogVersion).where(models.CatalogVersion.id == 1).values(
+    version=models.CatalogVersion.version + 1
+)
+
+
+class CatalogCache:
+    def __init__(self, maxsize: int, poll_seconds: float):
+        self.maxsize = maxsize
+        self.poll_seconds = poll_seconds
+        self.version = None
+        self._checked_at = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.version_checks = 0
+        self.invalidations = 0
+
+    def _current_version(self, db: Session, revalidate: bool):
+        if not revalidate and self.version is not None and time.monotonic() - self._checked_at < self.poll_seconds:
+            return self.version
+        version = db.execute(_VERSION).scalar() or 0
+        with self._lock:
+            self.version_checks += 1
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            self._checked_at = time.monotonic()
+        return version
+
+    def get_or_load(self, db: Session, key, loader):
+        """The cached value for `key` at the current version, else loader() (JSON-ready)."""
+        if self.maxsize <= 0:
+            return loader()
+        version = self._current_version(db, revalidate=replicas.wrote_recently())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        """A catalog write committed here: forget everything and re-read the version next time."""
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "version": self.version,
+                "poll_seconds": self.poll_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else None,
+                "version_checks": self.version_checks,
+                "invalidations": self.invalidations,
+            }
+
+
+catalog_cache = CatalogCache(CATALOG_CACHE_SIZE, CATALOG_VERSION_POLL_SECONDS)
+
+
+""" Cached listings """
+
+def course_page(db: Session, page):
+    """One page of the course catalog as returned under "catalog" (plus next_cursor/total)."""
+    return catalog_cache.get_or_load(
+        db, ("courses", page.cursor, page.limit, page.sort, page.include_total),
+        lambda: jsonable_encoder(crud.get_all_courses(db, page).as_response("catalog"))
+    )
+
+def university_page(db: Session, page):
+    return catalog_cache.get_or_load(
+        db, ("universities", page.cursor, page.limit, page.sort, page.include_total),
+        lambda: jsonable_encoder(crud.get_all_universities(db, page).as_response("universities"))
+    )
+
+
+""" Version bumps (same transaction as the change) """
+
+def _touches_catalog(session):
+    return any(isinstance(obj, CATALOG_MODELS) for obj in itertools.chain(session.new, session.dirty, session.deleted))
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    if _touches_catalog(session):
+        session.info["catalog_changed"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    # bulk query(...).update()/.delete() and Core statements on the catalog tables
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in _CATALOG_TABLES:
+            orm_execute_state.session.info["catalog_changed"] = True
+
+@event.listens_for(Session, "before_commit")
+def _bump_version(session):
+    if session.info.pop("catalog_changed", False) or _touches_catalog(session):
+        session.execute(_BUMP)
+        session.info["catalog_bumped"] = True
+
+@event.listens_for(Session, "after_commit")
+def _committed(session):
+    session.info.pop("catalog_changed", None)  # set again by the commit's own flush
+    if session.info.pop("catalog_bumped", False):
+        catalog_cache.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("catalog_changed", None)
+    session.info.pop("catalog_bumped", None)
@@ -0,0 +1,128 @@
+"""
+Application settings.
+
+The settings shared across modules (database URL, token signing, role keys,
+CORS, password hashing, rate limits) live on one object that is built on
+first use. Building it loads the .env file next to this module (or the file
+named by ENV_FILE) without overriding variables that are already set, so
+entry points that import only one module (`python -m backend.hashing
+calibrate`) see the same values as the app. Other feature-specific knobs stay
+as module constants next to the code they tune.
+
+    from backend.config import settings
+    settings.database_url
+"""
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+
+ENV_FILE = Path(__file__).resolve().parent / ".env"
+
+
+# Rate-limit rules as "<requests>/<seconds>", each overridable with
+# RATE_LIMIT_<NAME> (e.g. RATE_LIMIT_LOGIN_IP=50/60); see backend/ratelimit.py
+DEFAULT_RATE_LIMIT_RULES = {
+    "login_ip": "20/60",
+    "login_email": "5/60",
+    "signup_ip": "5/60",
+    "refresh_ip": "60/60",
+}
+
+
+def env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+def _optional(name: str, cast):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+def _database_url():
+    # normalize quotes, fall back to a local sqlite file for development
+    url = (os.getenv("SQLALCHEMY_DATABASE_URI") or "").strip().strip('"').strip("'")
+    return url or "sqlite:///./dev.db"
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str
+    secret_key: str
+    algorithm: str
+    access_token_expire_minutes: int
+    refresh_token_expire_days: int
+    role_keys: dict = field(default_factory=dict)
+    cors_origins: list = field(default_factory=list)
+    # Apply pending migrations when a worker starts (normally a deploy step)
+    migrate_on_startup: bool = False
+
+    # Password hashing (backend/hashing.py). hash_pool_workers = 0 hashes on
+    # the shared threadpool; the queue limit bounds jobs in flight before 503s.
+    hash_pool_workers: int = 1
+    hash_queue_limit: int = 8
+    hash_retry_after_seconds: int = 1
+    # bcrypt work factor: a fixed cost, or a latency target calibrated at startup
+    password_hash_rounds: Optional[int] = None
+    password_hash_target_ms: Optional[float] = None
+    password_hash_min_rounds: int = 10
+    password_hash_max_rounds: int = 16
+
+    # Rate limits (backend/ratelimit.py). The store is "memory" (per worker)
+    # or "sqlite" (shared by every worker on the host).
+    rate_limit_enabled: bool = True
+    rate_limit_store: str = "memory"
+    rate_limit_sqlite_path: str = "./ratelimit.db"
+    rate_limit_max_keys: int = 100_000
+    rate_limit_trust_forwarded: bool = False
+    rate_limit_rules: dict = field(default_factory=lambda: dict(DEFAULT_RATE_LIMIT_RULES))
+
+    @classmethod
+    def from_env(cls):
+        hash_pool_workers = int(os.getenv("HASH_POOL_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+        return cls(
+            database_url=_database_url(),
+            secret_key=os.getenv("SECRET_KEY"),
+            algorithm=os.getenv("ALGORITHM", "HS256"),
+            access_token_expire_minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30)),
+            refresh_token_expire_days=int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14)),
+            role_keys={
+                "instructor": os.getenv("INSTRUCTOR_KEY"),
+                "analyst": os.getenv("ANALYST_KEY"),
+                "admin": os.getenv("ADMIN_KEY"),
+            },
+            cors_origins=[o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",") if o.strip()],
+            migrate_on_startup=env_flag("MIGRATE_ON_STARTUP"),
+            hash_pool_workers=hash_pool_workers,
+            hash_queue_limit=int(os.getenv("HASH_QUEUE_LIMIT", max(1, hash_pool_workers) * 8)),
+            hash_retry_after_seconds=int(os.getenv("HASH_RETRY_AFTER_SECONDS", 1)),
+            password_hash_rounds=_optional("PASSWORD_HASH_ROUNDS", int),
+            password_hash_target_ms=_optional("PASSWORD_HASH_TARGET_MS", float),
+            password_hash_min_rounds=int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", 10)),
+            password_hash_max_rounds=int(os.getenv("PASSWORD_HASH_MAX_ROUNDS", 16)),
+            rate_limit_enabled=env_flag("RATE_LIMIT_ENABLED", "true"),
+            rate_limit_store=os.getenv("RATE_LIMIT_STORE", "memory"),
+            rate_limit_sqlite_path=os.getenv("RATE_LIMIT_SQLITE_PATH", "./ratelimit.db"),
+            rate_limit_max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000)),
+            rate_limit_trust_forwarded=env_flag("RATE_LIMIT_TRUST_FORWARDED"),
+            rate_limit_rules={
+                name: os.getenv(f"RATE_LIMIT_{name.upper()}", spec)
+                for name, spec in DEFAULT_RATE_LIMIT_RULES.items()
+            },
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    load_dotenv(os.getenv("ENV_FILE", ENV_FILE))
+    return Settings.from_env()
+
+
+class _LazySettings:
+    """`settings.x` reads get_settings().x, so importing this module reads nothing."""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings()
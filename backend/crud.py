@@ -1,7 +1,39 @@
+from sqlalchemy import String, and_, bindparam, case, cast, delete, event, func, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from backend import models,schemas
+from backend import models,schemas,pagination
 from datetime import datetime
 from typing import Optional
+import os
+
+""" Prebuilt statements for the hot lookups """
+
+# Built once with bindparam() placeholders instead of a db.query() chain per
+# call: the same statement object (and its memoized cache key) is reused, so
+# every call goes straight to the engine's compiled-statement cache.
+_COURSE_BY_ID = select(models.Course).where(models.Course.course_id == bindparam("course_id"))
+
+_STUDENT_COURSES = select(models.Course).join(
+    models.course_student_link,
+    models.Course.course_id == models.course_student_link.c.course_id
+).where(models.course_student_link.c.student_id == bindparam("student_id"))
+
+_COURSE_INSTRUCTORS = select(models.Instructor).join(
+    models.course_instructor_link,
+    models.Instructor.instructor_id == models.course_instructor_link.c.instructor_id
+).where(models.course_instructor_link.c.course_id == bindparam("course_id"))
+
+_COURSE_STUDENTS = select(models.Student).join(
+    models.course_student_link,
+    models.Student.student_id == models.course_student_link.c.student_id
+).where(models.course_student_link.c.course_id == bindparam("course_id"))
+
+_INSTRUCTOR_COURSES = select(models.Course).join(
+    models.course_instructor_link,
+    models.Course.course_id == models.course_instructor_link.c.course_id
+).where(models.course_instructor_link.c.instructor_id == bindparam("instructor_id"))
+
+_COURSE_ASSIGNMENTS = select(models.Assignment).where(models.Assignment.course_id == bindparam("course_id"))
 
 """ Course Crud Operations """
 
@@ -15,6 +47,8 @@ def create_course(db:Session, course: schemas.CourseCreate):
         institute_id = course.institute_id
     )
     db.add(db_course)
+    db.flush()
+    create_standard_folders(db, db_course.course_id)
     db.commit()
     db.refresh(db_course)
     return db_course
@@ -39,19 +73,24 @@ def update_course_fees(db:Session,course_id: int, new_fees:int):
 
     return db_course
 
-def get_all_courses(db : Session,skip: int = 0, limit: int = 20):
-    return db.query(models.Course).offset(skip).limit(limit).all()
+# ?sort= options for the paginated listings (see pagination.paginate)
+COURSE_SORTS = {"id": [models.Course.course_id], "name": [models.Course.course_name, models.Course.course_id]}
+STUDENT_SORTS = {"id": [models.Student.student_id], "name": [models.Student.name, models.Student.student_id]}
+INSTRUCTOR_SORTS = {"id": [models.Instructor.instructor_id], "name": [models.Instructor.name, models.Instructor.instructor_id]}
+UNIVERSITY_SORTS = {"id": [models.University.institute_id], "name": [models.University.name, models.University.institute_id]}
+DATA_ANALYST_SORTS = {"id": [models.DataAnalyst.analyst_id], "name": [models.DataAnalyst.name, models.DataAnalyst.analyst_id]}
+
+def get_all_courses(db: Session, page: pagination.PageRequest):
+    return pagination.paginate(db, select(models.Course), COURSE_SORTS, page)
+
+def get_all_universities(db: Session, page: pagination.PageRequest):
+    return pagination.paginate(db, select(models.University), UNIVERSITY_SORTS, page)
 
 def get_course_by_id(db: Session, course_id: int):
-    return db.query(models.Course).filter(models.Course.course_id == course_id).first()
+    return db.scalars(_COURSE_BY_ID, {"course_id": course_id}).first()
 
 def get_student_courses(db: Session, student_id: int):
-    return db.query(models.Course).join(
-        models.course_student_link, 
-        models.Course.course_id == models.course_student_link.c.course_id
-    ).filter(
-        models.course_student_link.c.student_id == student_id
-    ).all()
+    return db.scalars(_STUDENT_COURSES, {"student_id": student_id}).all()
 
 # def get_course_instructors(db:Session, course_id:int):
 #     return db.query(models.Instructor).join(
@@ -61,25 +100,60 @@ def get_student_courses(db: Session, student_id: int):
 #         models.course_instructor_link.course_id == course_id
 #     ).all()
 def get_course_instructors(db: Session, course_id: int):
-    """
-    Return Instructor rows for a given course_id.
-    Note: when referencing columns on a Table object use the .c namespace.
-    """
-    return db.query(models.Instructor).join(
-        models.course_instructor_link,
-        models.Instructor.instructor_id == models.course_instructor_link.c.instructor_id
-    ).filter(
-        models.course_instructor_link.c.course_id == course_id
-    ).all()
+    """Return Instructor rows for a given course_id."""
+    return db.scalars(_COURSE_INSTRUCTORS, {"course_id": course_id}).all()
 
 
 def get_course_students(db: Session, course_id: int):
-    return db.query(models.Student).join(
-        models.course_student_link,
+    return db.scalars(_COURSE_STUDENTS, {"course_id": course_id}).all()
+
+def get_instructor_courses(db: Session, instructor_id: int):
+    return db.scalars(_INSTRUCTOR_COURSES, {"instructor_id": instructor_id}).all()
+
+""" Batched lookups: one query for a list of courses instead of one per course """
+
+def get_instructors_by_course(db: Session, course_ids: list):
+    """course_id -> [Instructor] for every course in course_ids"""
+    result = {c_id: [] for c_id in course_ids}
+    if not course_ids:
+        return result
+    rows = db.query(models.course_instructor_link.c.course_id, models.Instructor).join(
+        models.Instructor,
+        models.Instructor.instructor_id == models.course_instructor_link.c.instructor_id
+    ).filter(
+        models.course_instructor_link.c.course_id.in_(course_ids)
+    ).order_by(models.Instructor.instructor_id).all()
+    for course_id, instructor in rows:
+        result[course_id].append(instructor)
+    return result
+
+def get_students_by_course(db: Session, course_ids: list):
+    """course_id -> [Student] for every course in course_ids"""
+    result = {c_id: [] for c_id in course_ids}
+    if not course_ids:
+        return result
+    rows = db.query(models.course_student_link.c.course_id, models.Student).join(
+        models.Student,
         models.Student.student_id == models.course_student_link.c.student_id
     ).filter(
-        models.course_student_link.c.course_id == course_id
-    ).all()
+        models.course_student_link.c.course_id.in_(course_ids)
+    ).order_by(models.Student.student_id).all()
+    for course_id, student in rows:
+        result[course_id].append(student)
+    return result
+
+def get_top_folders_by_course(db: Session, course_ids: list):
+    """course_id -> top-level [Folder] for every course in course_ids"""
+    result = {c_id: [] for c_id in course_ids}
+    if not course_ids:
+        return result
+    folders = db.query(models.Folder).filter(
+        models.Folder.course_id.in_(course_ids),
+        models.Folder.parent_id == None
+    ).order_by(models.Folder.folder_id).all()
+    for folder in folders:
+        result[folder.course_id].append(folder)
+    return result
 
 def get_course_topics(db:Session, course_id:int):
     return db.query(models.Topic).join(
@@ -93,9 +167,14 @@ def get_course_topics(db:Session, course_id:int):
 """ Crud for Folder operations """
 
 def create_folder(db: Session, title: str, course_id: int, parent_id: Optional[int] = None):
+    """Raises IntegrityError when the parent already has a folder with this title."""
     db_folder = models.Folder(title=title, course_id=course_id, parent_id=parent_id)
     db.add(db_folder)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
     db.refresh(db_folder)
     return db_folder
 
@@ -111,31 +190,131 @@ def add_item_to_folder(db: Session, folder_id: int, item_type: str, reference_id
     db.refresh(new_item)
     return new_item
 
-def ensure_standard_folders(db: Session, course_id: int):
+# Top-level folders every course starts with
+STANDARD_FOLDERS = ("General", "Materials", "Assignments", "Assessments")
+
+def insert_ignoring_duplicates(db: Session, table):
+    """INSERT ... ON CONFLICT DO NOTHING on the session's dialect."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing()
+
+def create_standard_folders(db: Session, course_id: int):
     """
-    Ensures standard folders (General, Materials, Assignments, Assessments) exist for a course.
-    Returns list of all top-level folders for the course.
+    Adds the standard folders in one INSERT, skipping any that already exist.
+    Does not commit, so it joins the caller's course-creation transaction.
     """
-    STANDARD_FOLDERS = ['General', 'Materials', 'Assignments', 'Assessments']
-    
-    for folder_name in STANDARD_FOLDERS:
-        # Check if folder already exists
-        existing = db.query(models.Folder).filter(
-            models.Folder.course_id == course_id,
-            models.Folder.title == folder_name,
-            models.Folder.parent_id == None
-        ).first()
-        
-        if not existing:
-            create_folder(db, title=folder_name, course_id=course_id, parent_id=None)
-    
-    # Return all top-level folders
-    folders = db.query(models.Folder).filter(
-        models.Folder.course_id == course_id,
-        models.Folder.parent_id == None
-    ).all()
-    
-    return folders
+    db.execute(
+        insert_ignoring_duplicates(db, models.Folder.__table__),
+        [{"title": title, "course_id": course_id, "parent_id": None} for title in STANDARD_FOLDERS]
+    )
+    # Core insert: the after_insert hook below does not see these rows
+    fill_folder_paths(db.connection(), course_id)
+
+""" Folder hierarchy (materialized path) """
+
+# Deepest level a folder may sit at (0 = top level); keeps paths within the column
+FOLDER_MAX_DEPTH = int(os.getenv("FOLDER_MAX_DEPTH", 16))
+
+_folders = models.Folder.__table__
+
+def _own_path(prefix, folder_id_column):
+    return prefix + cast(folder_id_column, String) + "/"
+
+def _subtree(folder: models.Folder):
+    """Rows under `folder` (itself included): a range on (course_id, path), no recursion."""
+    # "/" + 1 == "0", so [path, path-with-last-"/"-as-"0") holds exactly the descendants
+    return and_(
+        models.Folder.course_id == folder.course_id,
+        models.Folder.path >= folder.path,
+        models.Folder.path < folder.path[:-1] + "0",
+    )
+
+@event.listens_for(models.Folder, "after_insert")
+def _set_folder_path(mapper, connection, target):
+    parent = _folders.alias("parent")
+    parent_path = select(parent.c.path).where(parent.c.folder_id == _folders.c.parent_id).scalar_subquery()
+    parent_depth = select(parent.c.depth).where(parent.c.folder_id == _folders.c.parent_id).scalar_subquery()
+    connection.execute(
+        _folders.update().where(_folders.c.folder_id == target.folder_id).values(
+            path=_own_path(func.coalesce(parent_path, "/", type_=String), _folders.c.folder_id),
+            depth=func.coalesce(parent_depth + 1, 0),
+        )
+    )
+
+def fill_folder_paths(connection, course_id: Optional[int] = None):
+    """
+    Sets path/depth on rows that have none, one level per statement (top
+    level first, then children of rows that already have a path).
+    """
+    scope = _folders.c.path.is_(None)
+    if course_id is not None:
+        scope = and_(scope, _folders.c.course_id == course_id)
+    connection.execute(_folders.update().where(scope, _folders.c.parent_id.is_(None)).values(
+        path=_own_path(literal("/"), _folders.c.folder_id), depth=0
+    ))
+    parent = _folders.alias("parent")
+    while True:
+        parent_row = select(parent.c.path, parent.c.depth).where(
+            parent.c.folder_id == _folders.c.parent_id, parent.c.path.is_not(None)
+        )
+        filled = connection.execute(_folders.update().where(scope, parent_row.exists()).values(
+            path=_own_path(parent_row.with_only_columns(parent.c.path).scalar_subquery(), _folders.c.folder_id),
+            depth=parent_row.with_only_columns(parent.c.depth + 1).scalar_subquery(),
+        ))
+        if filled.rowcount == 0:
+            return
+
+def get_subtree(db: Session, folder: models.Folder, max_depth: Optional[int] = None):
+    """(folders, items) of the subtree, `max_depth` levels below `folder` at most."""
+    in_subtree = _subtree(folder)
+    if max_depth is not None:
+        in_subtree = and_(in_subtree, models.Folder.depth <= folder.depth + max_depth)
+    folders = db.scalars(select(models.Folder).where(in_subtree).order_by(models.Folder.folder_id)).all()
+    items = db.scalars(select(models.FolderItem).join(
+        models.Folder, models.Folder.folder_id == models.FolderItem.folder_id
+    ).where(in_subtree).order_by(models.FolderItem.item_id)).all()
+    return folders, items
+
+def subtree_height(db: Session, folder: models.Folder):
+    """Levels below `folder` (0 for a leaf)."""
+    return db.execute(select(func.max(models.Folder.depth)).where(_subtree(folder))).scalar() - folder.depth
+
+def move_folder(db: Session, folder: models.Folder, new_parent: Optional[models.Folder]):
+    """
+    Re-parents `folder`, rewriting the path and depth of its whole subtree in
+    one UPDATE. The caller checks that new_parent is in the same course and
+    not inside the subtree. Raises IntegrityError on a sibling title clash.
+    """
+    old_prefix = folder.path
+    new_prefix = (new_parent.path if new_parent is not None else "/") + f"{folder.folder_id}/"
+    delta = (new_parent.depth + 1 if new_parent is not None else 0) - folder.depth
+    new_parent_id = new_parent.folder_id if new_parent is not None else None
+
+    db.execute(update(models.Folder).where(_subtree(folder)).values(
+        path=new_prefix + func.substr(models.Folder.path, len(old_prefix) + 1, type_=String),
+        depth=models.Folder.depth + delta,
+        parent_id=case((models.Folder.folder_id == folder.folder_id, new_parent_id), else_=models.Folder.parent_id),
+    ).execution_options(synchronize_session=False))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    db.refresh(folder)
+    return folder
+
+def delete_subtree(db: Session, folder: models.Folder):
+    """Deletes `folder`, everything below it and their items. Returns the number of folders removed."""
+    in_subtree = select(models.Folder.folder_id).where(_subtree(folder))
+    db.execute(delete(models.FolderItem).where(models.FolderItem.folder_id.in_(in_subtree))
+               .execution_options(synchronize_session=False))
+    removed = db.execute(delete(models.Folder).where(_subtree(folder))
+                         .execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return removed
 
 """ Instructor Crud operations """
 
@@ -293,62 +472,185 @@ def get_textbook_by_id(db: Session, textbook_id: int):
     return db.query(models.Textbook).filter(models.Textbook.textbook_id == textbook_id).first()
 
 # New CRUD functions that take item_id and fetch the actual content
+""" Content behind folder items """
+
+# Most item ids one /content/batch request may resolve
+CONTENT_BATCH_MAX_ITEMS = 200
+
+_ITEM_IDS = bindparam("item_ids", expanding=True)
+
+# item_type -> (item_id, content row) for the given folder items, one joined
+# query per content table. Textbook items carry no reference column (a course
+# has one textbook), so they resolve through the folder's course.
+_ITEM_CONTENT = {
+    "video": select(models.FolderItem.item_id, models.Video).join(
+        models.Video, models.Video.video_id == models.FolderItem.video_id
+    ).where(models.FolderItem.item_id.in_(_ITEM_IDS)),
+    "notes": select(models.FolderItem.item_id, models.Notes).join(
+        models.Notes, models.Notes.notes_id == models.FolderItem.notes_id
+    ).where(models.FolderItem.item_id.in_(_ITEM_IDS)),
+    "assignment": select(models.FolderItem.item_id, models.Assignment).join(
+        models.Assignment, models.Assignment.assignment_id == models.FolderItem.assignment_id
+    ).where(models.FolderItem.item_id.in_(_ITEM_IDS)),
+    "textbook": select(models.FolderItem.item_id, models.Textbook).join(
+        models.Folder, models.Folder.folder_id == models.FolderItem.folder_id
+    ).join(
+        models.Textbook, models.Textbook.course_id == models.Folder.course_id
+    ).where(models.FolderItem.item_id.in_(_ITEM_IDS), models.FolderItem.item_type == "textbook"),
+}
+
+def get_item_content(db: Session, item_type: str, item_ids: list):
+    """item_id -> content row (Video, Notes, Assignment or Textbook) for items of one type"""
+    if not item_ids:
+        return {}
+    return {item_id: row for item_id, row in db.execute(_ITEM_CONTENT[item_type], {"item_ids": list(item_ids)})}
+
+def get_content_batch(db: Session, item_ids: list):
+    """
+    Resolve many folder items at once: one query per content table, whatever
+    the number of items. Returns {"items": {item_id: {...}}, "missing": [ids]}.
+    """
+    item_ids = list(dict.fromkeys(item_ids))
+    items = {}
+    for item_type in _ITEM_CONTENT:
+        for item_id, content in get_item_content(db, item_type, item_ids).items():
+            items[item_id] = {"item_id": item_id, "item_type": item_type, item_type: content}
+    return {"items": items, "missing": [i for i in item_ids if i not in items]}
+
 def get_video_by_item_id(db: Session, item_id: int):
     """Fetch video content by folder item ID"""
-    item = db.query(models.FolderItem).filter(models.FolderItem.item_id == item_id).first()
-    if not item or not item.video_id:
-        return None
-    return db.query(models.Video).filter(models.Video.video_id == item.video_id).first()
+    return get_item_content(db, "video", [item_id]).get(item_id)
 
 def get_notes_by_item_id(db: Session, item_id: int):
     """Fetch notes content by folder item ID"""
-    item = db.query(models.FolderItem).filter(models.FolderItem.item_id == item_id).first()
-    if not item or not item.notes_id:
-        return None
-    return db.query(models.Notes).filter(models.Notes.notes_id == item.notes_id).first()
+    return get_item_content(db, "notes", [item_id]).get(item_id)
 
 def get_textbook_by_item_id(db: Session, item_id: int):
-    """Fetch textbook content by folder item ID"""
-    item = db.query(models.FolderItem).filter(models.FolderItem.item_id == item_id).first()
-    if not item or not item.textbook_id:
-        return None
-    return db.query(models.Textbook).filter(models.Textbook.textbook_id == item.textbook_id).first()
+    """Fetch the textbook of the course a folder item belongs to"""
+    return get_item_content(db, "textbook", [item_id]).get(item_id)
 
 """ Grades and Evaluation CRUD operations """
 
+def _latest_submissions(course_filter):
+    """
+    The student's submissions to the filtered courses' assignments, numbered
+    newest first per assignment: rn = 1 is the submission that counts.
+    """
+    return select(
+        models.StudentSubmission.assignment_id,
+        models.StudentSubmission.obtained_marks,
+        models.StudentSubmission.submission_url,
+        models.StudentSubmission.status,
+        models.StudentSubmission.submitted_at,
+        func.row_number().over(
+            partition_by=models.StudentSubmission.assignment_id,
+            order_by=(
+                models.StudentSubmission.submitted_at.desc().nulls_last(),
+                models.StudentSubmission.submission_id.desc()
+            )
+        ).label("rn")
+    ).join(
+        models.Assignment, models.Assignment.assignment_id == models.StudentSubmission.assignment_id
+    ).where(
+        models.StudentSubmission.student_id == bindparam("student_id"),
+        course_filter
+    ).subquery("latest")
+
+def _grade_columns(latest):
+    return (
+        models.Assignment.assignment_id,
+        models.Assignment.title,
+        models.Assignment.description,
+        models.Assignment.marks,
+        models.Assignment.due_date,
+        latest.c.obtained_marks,
+        latest.c.submission_url,
+        latest.c.status,
+        latest.c.submitted_at,
+    )
+
+def _assignment_grade(row):
+    return {
+        'assignment_id': row.assignment_id,
+        'title': row.title,
+        'description': row.description,
+        'marks': row.marks,
+        'due_date': row.due_date,
+        'obtained_marks': row.obtained_marks,
+        'submission_url': row.submission_url,
+        'status': row.status if row.submission_url is not None else "Not Submitted",
+        'submitted_at': row.submitted_at
+    }
+
+_latest_in_course = _latest_submissions(models.Assignment.course_id == bindparam("course_id"))
+_COURSE_GRADES = select(*_grade_columns(_latest_in_course)).outerjoin(
+    _latest_in_course,
+    and_(_latest_in_course.c.assignment_id == models.Assignment.assignment_id, _latest_in_course.c.rn == 1)
+).where(
+    models.Assignment.course_id == bindparam("course_id")
+).order_by(models.Assignment.assignment_id)
+
+_latest_enrolled = _latest_submissions(models.Assignment.course_id.in_(
+    select(models.course_student_link.c.course_id).where(
+        models.course_student_link.c.student_id == bindparam("student_id")
+    )
+))
+# One row per (enrolled course, assignment); courses without assignments
+# still get one row, with the assignment columns NULL
+_STUDENT_GRADES = select(
+    models.Course.course_id,
+    models.Course.course_name,
+    models.Evaluation.evaluation_id,
+    models.Evaluation.marks.label("evaluation_marks"),
+    models.Evaluation.grade,
+    models.Evaluation.pass_fail,
+    models.Evaluation.date_of_evaluation,
+    *_grade_columns(_latest_enrolled)
+).select_from(models.course_student_link).join(
+    models.Course, models.Course.course_id == models.course_student_link.c.course_id
+).outerjoin(
+    models.Evaluation, and_(
+        models.Evaluation.course_id == models.Course.course_id,
+        models.Evaluation.student_id == models.course_student_link.c.student_id
+    )
+).outerjoin(
+    models.Assignment, models.Assignment.course_id == models.Course.course_id
+).outerjoin(
+    _latest_enrolled,
+    and_(_latest_enrolled.c.assignment_id == models.Assignment.assignment_id, _latest_enrolled.c.rn == 1)
+).where(
+    models.course_student_link.c.student_id == bindparam("student_id")
+).order_by(models.Course.course_id, models.Assignment.assignment_id)
+
 def get_student_course_grades(db: Session, student_id: int, course_id: int):
-    """Fetch all assignments and submission details for a student in a course"""
-    try:
-        # Get all assignments for the course
-        assignments = db.query(models.Assignment).filter(
-            models.Assignment.course_id == course_id
-        ).all()
-        
-        result = []
-        for assignment in assignments:
-            # Get submission for this assignment by this student
-            submission = db.query(models.StudentSubmission).filter(
-                models.StudentSubmission.assignment_id == assignment.assignment_id,
-                models.StudentSubmission.student_id == student_id
-            ).first()
-            
-            assignment_data = {
-                'assignment_id': assignment.assignment_id,
-                'title': assignment.title,
-                'description': assignment.description,
-                'marks': assignment.marks,
-                'due_date': assignment.due_date,
-                'obtained_marks': submission.obtained_marks if submission else None,
-                'submission_url': submission.submission_url if submission else None,
-                'status': submission.status if submission else "Not Submitted",
-                'submitted_at': submission.submitted_at if submission else None
+    """Every assignment of a course with the student's latest submission, in one query"""
+    rows = db.execute(_COURSE_GRADES, {"student_id": student_id, "course_id": course_id})
+    return [_assignment_grade(row) for row in rows]
+
+def get_student_grades(db: Session, student_id: int):
+    """
+    The student's grades in every enrolled course, in one query: per course
+    the overall Evaluation (or None) and each assignment with the latest submission.
+    """
+    courses = {}
+    for row in db.execute(_STUDENT_GRADES, {"student_id": student_id}):
+        course = courses.get(row.course_id)
+        if course is None:
+            course = courses[row.course_id] = {
+                'course_id': row.course_id,
+                'course_name': row.course_name,
+                'evaluation': None if row.evaluation_id is None else {
+                    'evaluation_id': row.evaluation_id,
+                    'marks': row.evaluation_marks,
+                    'grade': row.grade,
+                    'pass_fail': row.pass_fail,
+                    'date_of_evaluation': row.date_of_evaluation
+                },
+                'assignments': []
             }
-            result.append(assignment_data)
-        
-        return result
-    except Exception as e:
-        print(f"Error fetching student grades: {e}")
-        return []
+        if row.assignment_id is not None:
+            course['assignments'].append(_assignment_grade(row))
+    return list(courses.values())
 
 def get_student_overall_evaluation(db: Session, student_id: int, course_id: int):
     """Fetch overall evaluation/grade for a student in a course"""
@@ -521,7 +823,7 @@ def create_assignment(db: Session, assignment: schemas.AssignmentCreate,c_id : i
     return new_assignment
 
 def get_assignment_by_course_id(db: Session, course_id: int):
-    return db.query(models.Assignment).filter(models.Assignment.course_id == course_id).all()
+    return db.scalars(_COURSE_ASSIGNMENTS, {"course_id": course_id}).all()
 
 def get_assignment_by_id(db: Session, assignment_id: int):
     return db.query(models.Assignment).filter(models.Assignment.assignment_id == assignment_id).first()
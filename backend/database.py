@@ -1,24 +1,206 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker # type: ignore
-from dotenv import load_dotenv
+from sqlalchemy.pool import QueuePool
+from backend.config import settings
 
-load_dotenv()
+# Creating the engine does not connect: a worker can import this module
+# without a reachable database
+db_url = settings.database_url
 
-# Read DB URL from env, normalize quotes, fall back to a local sqlite file for development
-db_url = os.getenv("SQLALCHEMY_DATABASE_URI")
-if db_url:
-    db_url = db_url.strip().strip('"').strip("'")
+# Connection pool. FastAPI runs up to 40 sync handlers at once, so the
+# defaults let every one of them hold a connection (10 + 30 overflow).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 30))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Neon closes idle connections, so recycle before it does and ping on checkout
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 
-if not db_url:
-    db_url = "sqlite:///./dev.db"
+# Compiled-statement cache per engine (SQLAlchemy's default holds 500). Large
+# enough for every distinct statement the app runs, so none is recompiled.
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 1200))
+# Server-side prepared statements on PostgreSQL. asyncpg prepares statements
+# and keeps this many per connection (0 disables it, e.g. behind PgBouncer in
+# transaction mode). psycopg 3 (postgresql+psycopg://) prepares a statement
+# once it has run DB_PREPARE_THRESHOLD times on a connection (empty = never).
+# psycopg2, the driver behind plain postgresql:// URLs, cannot prepare.
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 100))
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "5")
 
-# For SQLite we need check_same_thread option
-if db_url.startswith("sqlite"):
-    engine = create_engine(db_url, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(db_url)
+# Tuned SQLite (opt-in): WAL, synchronous=NORMAL, mmap and a larger page cache,
+# applied to every new connection. With SQLITE_READER_POOL_SIZE > 0 the main
+# engine becomes a single writer connection and reads routed through
+# get_routed_db use a separate pool of read-only connections (see replicas.py).
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "false").lower() in ("1", "true", "yes")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64000))  # negative = KiB, so 64 MB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_READER_POOL_SIZE = int(os.getenv("SQLITE_READER_POOL_SIZE", 0))
+
+
+class PoolMetrics:
+    """Counters fed by the pool events and by MeteredQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0          # checkouts that found no idle connection and no overflow left
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_get(self, waited: bool, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            if waited:
+                self.waits += 1
+                self.wait_seconds += elapsed
+                self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool):
+        stats = {
+            "pool_class": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "wait_ms_total": round(self.wait_seconds * 1000, 2),
+            "wait_ms_avg": round(self.wait_seconds * 1000 / self.waits, 2) if self.waits else 0.0,
+            "wait_ms_max": round(self.max_wait_seconds * 1000, 2),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+            })
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that times checkouts which had to wait for a connection."""
+
+    def _do_get(self):
+        # No idle connection and no overflow left: this checkout will block
+        waited = self._pool.empty() and self._max_overflow > -1 and self._overflow >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_get(True, time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_get(waited, time.perf_counter() - start)
+        return conn
+
+
+def _is_sqlite_memory(url: str):
+    return ":memory:" in url or url in ("sqlite://", "sqlite+pysqlite://")
+
+def _engine_options(url: str):
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "query_cache_size": DB_QUERY_CACHE_SIZE}
+    if make_url(url).get_driver_name() == "psycopg":
+        options["connect_args"] = {"prepare_threshold": int(DB_PREPARE_THRESHOLD) if DB_PREPARE_THRESHOLD else None}
+    if url.startswith("sqlite"):
+        # For SQLite we need check_same_thread option
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory(url):
+            return options  # in-memory databases keep SQLAlchemy's single-connection pool
+    options.update({
+        "poolclass": MeteredQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    })
+    if sqlite_split_enabled(url):
+        # one writer: transactions queue on the pool instead of failing with "database is locked"
+        options.update({"pool_size": 1, "max_overflow": 0})
+    return options
+
+def sqlite_tuned_enabled(url: str):
+    return SQLITE_TUNED and url.startswith("sqlite") and not _is_sqlite_memory(url)
+
+def sqlite_split_enabled(url: str):
+    return sqlite_tuned_enabled(url) and SQLITE_READER_POOL_SIZE > 0
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")  # readers no longer block on the writer
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+engine = create_engine(db_url, **_engine_options(db_url))
+
+if sqlite_tuned_enabled(db_url):
+    @event.listens_for(engine, "connect")
+    def _tune_sqlite(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+def sqlite_reader_engine():
+    """Pool of read-only connections to the primary SQLite file (split mode)."""
+    reader = create_engine(
+        db_url,
+        connect_args={"check_same_thread": False},
+        pool_pre_ping=DB_POOL_PRE_PING,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        pool_size=SQLITE_READER_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+    @event.listens_for(reader, "connect")
+    def _tune_reader(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+    return reader
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.count("connects")
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.count("checkouts")
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.count("checkins")
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.count("invalidations")
+
+def pool_stats():
+    return pool_metrics.snapshot(engine.pool)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -30,4 +212,74 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+""" Async engine (asyncpg / aiosqlite), used by backend/async_routes.py """
+
+# Serve the hot read routes from async handlers (see async_routes.py)
+ASYNC_ROUTES = os.getenv("ASYNC_ROUTES", "false").lower() in ("1", "true", "yes")
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+def async_url(url: str):
+    """
+    Same database through an async driver: postgresql -> postgresql+asyncpg,
+    sqlite -> sqlite+aiosqlite. asyncpg does not understand libpq's sslmode /
+    channel_binding query parameters, so they become connect_args instead.
+    The prepared statement cache size goes in the URL, where the dialect reads it.
+    """
+    parsed = make_url(url)
+    backend_name = parsed.get_backend_name()
+    connect_args = {}
+    if backend_name == "postgresql":
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            connect_args["ssl"] = sslmode  # asyncpg accepts the same mode names
+        query["prepared_statement_cache_size"] = str(DB_PREPARED_STATEMENT_CACHE_SIZE)
+        if DB_PREPARED_STATEMENT_CACHE_SIZE == 0:
+            connect_args["statement_cache_size"] = 0  # asyncpg's own cache too
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif backend_name == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    else:
+        raise ValueError(f"No async driver configured for '{backend_name}'")
+    return parsed, connect_args
+
+def get_async_engine():
+    """Created on first use, so the sync-only deployment never imports asyncpg/aiosqlite."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url, connect_args = async_url(db_url)
+        options = {
+            "pool_pre_ping": DB_POOL_PRE_PING,
+            "query_cache_size": DB_QUERY_CACHE_SIZE,
+            "connect_args": connect_args,
+        }
+        if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+            options.update({
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+                "pool_recycle": DB_POOL_RECYCLE,
+            })
+        _async_engine = create_async_engine(url, **options)
+        # expire_on_commit=False: attribute access after commit would need an await
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _AsyncSessionLocal = None
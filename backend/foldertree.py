@@ -0,0 +1,225 @@
+"""
+Course folder trees.
+
+A course's folder tree used to be returned as top-level Folder rows that
+FolderSchema then walked, lazy-loading `subfolders` and `items` one SELECT per
+folder. Here the whole tree is read with two flat queries (every folder of the
+course, every item in those folders), assembled in Python into the
+FolderSchema shape, and cached per course as plain dicts. The trees of many
+courses (an instructor's course list) are read with the same two queries.
+
+A cached tree is dropped when a commit in this worker adds, changes or removes
+one of its folders or items (Session hooks below, so crud.create_folder,
+add_item_to_folder and the removal routes need no extra calls). Other workers
+drop it after FOLDER_TREE_CACHE_TTL_SECONDS, and a caller who wrote in the
+last REPLICA_STICKY_SECONDS always gets a freshly loaded tree.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import bindparam, event, select, inspect as sa_inspect
+from sqlalchemy.orm import Session
+from backend import models, replicas
+
+# Courses kept per worker (0 disables the cache)
+FOLDER_TREE_CACHE_SIZE = int(os.getenv("FOLDER_TREE_CACHE_SIZE", 512))
+FOLDER_TREE_CACHE_TTL_SECONDS = float(os.getenv("FOLDER_TREE_CACHE_TTL_SECONDS", 30))
+
+_COURSE_FOLDERS = select(models.Folder).where(
+    models.Folder.course_id.in_(bindparam("course_ids", expanding=True))
+).order_by(models.Folder.folder_id)
+
+_COURSE_FOLDER_ITEMS = select(models.FolderItem).join(
+    models.Folder, models.Folder.folder_id == models.FolderItem.folder_id
+).where(
+    models.Folder.course_id.in_(bindparam("course_ids", expanding=True))
+).order_by(models.FolderItem.item_id)
+
+
+""" Loading """
+
+def _item(item):
+    return {
+        "item_id": item.item_id,
+        "item_type": item.item_type,
+        "video_id": item.video_id,
+        "notes_id": item.notes_id,
+        "assignment_id": item.assignment_id,
+    }
+
+def assemble(folders, items, root_id=None):
+    """
+    Nests flat folder rows (ordered by id) and their items into FolderSchema
+    dicts. Returns the top-level folders, or with root_id, that folder's node.
+    """
+    nodes = {
+        f.folder_id: {"folder_id": f.folder_id, "title": f.title, "parent_id": f.parent_id, "items": [], "subfolders": []}
+        for f in folders
+    }
+    for item in items:
+        nodes[item.folder_id]["items"].append(_item(item))
+
+    roots = []
+    for f in folders:
+        if f.folder_id == root_id or (root_id is None and f.parent_id is None):
+            roots.append(nodes[f.folder_id])
+        elif f.parent_id in nodes:
+            nodes[f.parent_id]["subfolders"].append(nodes[f.folder_id])
+    return roots[0] if root_id is not None else roots
+
+def load_trees(db: Session, course_ids):
+    """course_id -> [top-level folder dict, ...] for every course in course_ids, in two queries."""
+    course_ids = list(course_ids)
+    if not course_ids:
+        return {}
+    params = {"course_ids": course_ids}
+    folders = {c_id: [] for c_id in course_ids}
+    for folder in db.scalars(_COURSE_FOLDERS, params):
+        folders[folder.course_id].append(folder)
+    course_of = {f.folder_id: c_id for c_id, rows in folders.items() for f in rows}
+    items = {c_id: [] for c_id in course_ids}
+    for item in db.scalars(_COURSE_FOLDER_ITEMS, params):
+        items[course_of[item.folder_id]].append(item)
+    return {c_id: assemble(folders[c_id], items[c_id]) for c_id in course_ids}
+
+def load_tree(db: Session, course_id: int):
+    """[top-level folder dict, ...] with nested `subfolders` and `items`, in two queries."""
+    return load_trees(db, [course_id])[course_id]
+
+
+""" Cache """
+
+class FolderTreeCache:
+    """Bounded LRU of course_id -> assembled tree, with a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # course_id -> (expires_at, tree, folder_ids)
+        self._lock = threading.Lock()
+        # bumped by every invalidation: a tree loaded across one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_tree(self, db: Session, course_id: int):
+        return self.get_trees(db, [course_id])[course_id]
+
+    def get_trees(self, db: Session, course_ids):
+        """course_id -> tree; the courses not cached are loaded together in two queries."""
+        course_ids = list(dict.fromkeys(course_ids))
+        trees, missing = {}, course_ids
+        if self.maxsize > 0 and not replicas.wrote_recently():
+            missing = []
+            now = time.monotonic()
+            with self._lock:
+                for course_id in course_ids:
+                    entry = self._entries.get(course_id)
+                    if entry is not None and entry[0] > now:
+                        self._entries.move_to_end(course_id)
+                        self.hits += 1
+                        trees[course_id] = entry[1]
+                    else:
+                        self.misses += 1
+                        missing.append(course_id)
+        generation = self._generation
+
+        loaded = load_trees(db, missing)
+        trees.update(loaded)
+        if self.maxsize > 0 and loaded:
+            entries = []
+            for course_id, tree in loaded.items():
+                folder_ids = set()
+                stack = list(tree)
+                while stack:
+                    node = stack.pop()
+                    folder_ids.add(node["folder_id"])
+                    stack.extend(node["subfolders"])
+                entries.append((course_id, tree, folder_ids))
+            with self._lock:
+                if generation == self._generation:
+                    expires_at = time.monotonic() + self.ttl
+                    for course_id, tree, folder_ids in entries:
+                        self._entries[course_id] = (expires_at, tree, folder_ids)
+                        self._entries.move_to_end(course_id)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        return {course_id: trees[course_id] for course_id in course_ids}
+
+    def invalidate(self, course_ids=(), folder_ids=()):
+        """Drop the trees of these courses and of the courses containing these folders."""
+        course_ids, folder_ids = set(course_ids), set(folder_ids)
+        with self._lock:
+            self._generation += 1
+            for course_id in [c for c, (_, _, folders) in self._entries.items()
+                              if c in course_ids or folders & folder_ids]:
+                del self._entries[course_id]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+
+folder_trees = FolderTreeCache(FOLDER_TREE_CACHE_SIZE, FOLDER_TREE_CACHE_TTL_SECONDS)
+
+
+""" Invalidation on commit """
+
+_TREE_TABLES = {models.Folder.__tablename__, models.FolderItem.__tablename__}
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    course_ids, folder_ids = session.info.setdefault("folder_tree_changes", (set(), set()))
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        # read loaded values only: no lazy loads while flushing
+        if isinstance(obj, models.Folder):
+            course_ids.add(obj.__dict__.get("course_id"))
+            folder_ids.update((obj.__dict__.get("folder_id"), obj.__dict__.get("parent_id")))
+        elif isinstance(obj, models.FolderItem):
+            # the folder an item moved out of, too
+            folder_ids.update(sa_inspect(obj).attrs.folder_id.history.deleted)
+            folder_ids.add(obj.__dict__.get("folder_id"))
+    course_ids.discard(None)
+    folder_ids.discard(None)
+    if not course_ids and not folder_ids:
+        session.info.pop("folder_tree_changes")
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    # bulk statements on folders / items: which courses they hit is unknown
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in _TREE_TABLES:
+            orm_execute_state.session.info["folder_tree_bulk"] = True
+
+@event.listens_for(Session, "after_commit")
+def _committed(session):
+    changed = session.info.pop("folder_tree_changes", None)
+    if session.info.pop("folder_tree_bulk", False):
+        folder_trees.clear()
+    elif changed:
+        folder_trees.invalidate(*changed)
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("folder_tree_changes", None)
+    session.info.pop("folder_tree_bulk", None)
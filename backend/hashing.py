@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+from backend.config import settings
+
+# Settings (backend/config.py, read on first use):
+#   HASH_POOL_WORKERS        size of the dedicated hashing process pool; 0
+#                            hashes on the shared threadpool (old behaviour)
+#   HASH_QUEUE_LIMIT         hash jobs in flight (running + queued) before 503s
+#   PASSWORD_HASH_ROUNDS     bcrypt work factor (see `python -m backend.hashing calibrate`)
+#   PASSWORD_HASH_TARGET_MS  or calibrate on this host when the app starts (warm_up)
+# With neither cost setting, passlib's default cost is used and nothing is
+# rehashed. Calibration stays within PASSWORD_HASH_MIN_ROUNDS..MAX_ROUNDS.
+
+_context = None
+_rounds = None
+
+
+""" Hashing context """
+
+def build_context(rounds=None):
+    """
+    bcrypt_sha256 context. With a fixed cost, min == max == default, so
+    needs_update() flags hashes that are weaker *or* stronger than the target.
+    """
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+    return CryptContext(
+        schemes=["bcrypt_sha256"],
+        deprecated="auto",
+        bcrypt_sha256__default_rounds=rounds,
+        bcrypt_sha256__min_rounds=rounds,
+        bcrypt_sha256__max_rounds=rounds,
+    )
+
+def configured_rounds():
+    """The work factor this process hashes with (None = passlib default)."""
+    global _rounds
+    if _rounds is None:
+        if settings.password_hash_rounds:
+            _rounds = settings.password_hash_rounds
+        elif settings.password_hash_target_ms:
+            _rounds = calibrate(settings.password_hash_target_ms)
+    return _rounds
+
+async def warm_up():
+    """
+    Settles the work factor before traffic arrives (called from the app
+    lifespan). Calibration runs several full hashes, so it goes to the
+    threadpool instead of stalling the event loop.
+    """
+    return await run_in_threadpool(configured_rounds)
+
+def get_context():
+    global _context
+    if _context is None:
+        _context = build_context(configured_rounds())
+    return _context
+
+def calibrate(target_ms: float, min_rounds: int = None, max_rounds: int = None, samples: int = 3, report=None):
+    """Highest bcrypt cost whose hash time on this host stays within target_ms."""
+    min_rounds = settings.password_hash_min_rounds if min_rounds is None else min_rounds
+    max_rounds = settings.password_hash_max_rounds if max_rounds is None else max_rounds
+
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        ctx = build_context(rounds)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            ctx.hash("calibration-password")
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed_ms = min(timings)
+        if report:
+            report(rounds, elapsed_ms)
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+""" Synchronous hashing (also what the pool workers run) """
+
+def hash_password(password: str) -> str:
+    return get_context().hash(password)
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return get_context().verify(password, hashed_password)
+
+def verify_and_update(password: str, hashed_password: str):
+    """(valid, new_hash): new_hash is set when the stored hash's cost is off target."""
+    return get_context().verify_and_update(password, hashed_password)
+
+
+""" Process pool """
+
+_pool = None
+_in_flight = 0
+_completed = 0
+_rejected = 0
+
+def _init_worker(rounds):
+    """Pool initializer: hash with the parent's cost instead of recalibrating."""
+    global _rounds, _context
+    _rounds = rounds
+    _context = None
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the server process has threads (and maybe DB connections)
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.hash_pool_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(configured_rounds(),),
+        )
+    return _pool
+
+def batch_pool(workers: int = None):
+    """
+    Short-lived pool for offline/bulk hashing (user provisioning). Defaults to
+    every core; use it as a context manager so the workers exit afterwards.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(configured_rounds(),),
+    )
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def _run(fn, *args):
+    """
+    Run a hashing function off the request threadpool.
+    Only called from the event loop thread, so the counters need no lock.
+    """
+    global _in_flight, _completed, _rejected
+    if _in_flight >= settings.hash_queue_limit:
+        _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": str(settings.hash_retry_after_seconds)},
+        )
+
+    _in_flight += 1
+    try:
+        if settings.hash_pool_workers <= 0:
+            return await run_in_threadpool(fn, *args)
+        if _pool is None:
+            await warm_up()  # no-op once the lifespan has calibrated
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM kill, ...): start a fresh pool for the next request
+        shutdown_pool()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service restarting, please retry",
+            headers={"Retry-After": str(settings.hash_retry_after_seconds)},
+        )
+    finally:
+        _in_flight -= 1
+        _completed += 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _run(verify_password, password, hashed_password)
+
+async def verify_and_update_async(password: str, hashed_password: str):
+    return await _run(verify_and_update, password, hashed_password)
+
+def pool_stats():
+    return {
+        "rounds": configured_rounds(),
+        "workers": settings.hash_pool_workers,
+        "queue_limit": settings.hash_queue_limit,
+        "in_flight": _in_flight,
+        "completed": _completed,
+        "rejected": _rejected,
+    }
+
+
+""" Calibration command """
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password hashing utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate", help="pick a bcrypt cost for a latency budget on this host")
+    cal.add_argument("--target-ms", type=float, default=settings.password_hash_target_ms or 250)
+    cal.add_argument("--min-rounds", type=int, default=settings.password_hash_min_rounds)
+    cal.add_argument("--max-rounds", type=int, default=settings.password_hash_max_rounds)
+    cal.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"⏱  Calibrating bcrypt_sha256 for a {args.target_ms:.0f} ms budget")
+    rounds = calibrate(
+        args.target_ms, args.min_rounds, args.max_rounds, args.samples,
+        report=lambda r, ms: print(f"   rounds={r:2d}  {ms:8.1f} ms"),
+    )
+    print(f"✅ Add to .env:\nPASSWORD_HASH_ROUNDS={rounds}")
@@ -1,57 +1,77 @@
+import asyncio
+import logging
 import os
-from dotenv import load_dotenv
-# Load the variables from .env into the system
-load_dotenv(r"E:\Online Course Management Platform\MOOC\backend\.env")
-from fastapi import FastAPI,HTTPException,Depends, status
-from passlib.context import CryptContext
-from backend import schemas,models,crud
+from contextlib import asynccontextmanager
+from fastapi import FastAPI,HTTPException,Depends, Body, Header, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from backend import schemas,models,crud,hashing,tokens,provisioning,database,replicas,querylog,querybudget,migrations,roster,catalog,foldertree,revocation
+from backend.config import settings
 # import schemas,models
 from sqlalchemy.orm import Session
-from sqlalchemy import func,insert
+from sqlalchemy import func,insert,select
+from sqlalchemy.exc import IntegrityError
 from backend.database import get_db
 from datetime import datetime, timedelta,timezone,date
 from jose import jwt, JWTError
-from backend.security import get_curr_student, get_curr_instructor,get_curr_analyst,get_curr_admin
+from backend.security import get_curr_student, get_curr_instructor,get_curr_analyst,get_curr_admin, principal_cache, oauth2_scheme, decode_token
+from backend.revocation import revocations
+from backend.ratelimit import rate_limiter
+from backend.replicas import get_routed_db, ReplicaRoutingMiddleware
+from backend.pagination import PageRequest, paginate
+from backend.querylog import QueryContextMiddleware
+from backend.querybudget import QueryCounterMiddleware, query_budget
 from fastapi.middleware.cors import CORSMiddleware
-from backend.database import Base, engine
-from typing import List
+from typing import List, Optional
 
-app = FastAPI()
+logger = logging.getLogger("mooc.api")
 
-# Create all database tables on startup
-Base.metadata.create_all(bind=engine)
 
-origins = [
-    "http://localhost:5173"
-]
-# 2. Add the middleware
-print("CORS Middleware Configured with Origins:")
+# Importing this module touches no database and starts nothing: schema
+# changes are a deploy step (python -m backend.migrations upgrade), and
+# per-worker resources are set up and torn down here.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.migrate_on_startup:
+        await run_in_threadpool(migrations.upgrade)
+    await hashing.warm_up()
+    purge_task = asyncio.create_task(revocation.purge_periodically())
+    yield
+    purge_task.cancel()
+    hashing.shutdown_pool()
+    await database.dispose_async_engine()
+
+
+app = FastAPI(lifespan=lifespan)
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"], # Allows GET, POST, DELETE, etc.
     allow_headers=["*"],
 )
-# Load the variables from .env into the system
 
-# Fetch them using os.getenv(VARIABLE_NAME, DEFAULT_VALUE)
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Statements per request, N+1 detection and @query_budget checks
+app.add_middleware(QueryCounterMiddleware)
 
-# Fetch Role Keys
-ROLE_KEYS = {
-    "instructor": os.getenv("INSTRUCTOR_KEY"),
-    "analyst": os.getenv("ANALYST_KEY"),
-    "admin": os.getenv("ADMIN_KEY")
-}
+# Slow-query log (SLOW_QUERY_LOG_PATH): statements are tagged with the route that issued them
+if querylog.install():
+    app.add_middleware(QueryContextMiddleware)
+
+# Read replicas and the catalog cache: remember who is calling so their own
+# writes stay visible to them
+if replicas.router.replicas or catalog.CATALOG_CACHE_SIZE > 0:
+    app.add_middleware(ReplicaRoutingMiddleware)
+
+# Async versions of the hot read routes (ASYNC_ROUTES=true). Included before
+# the routes below so they take precedence over their sync twins.
+if database.ASYNC_ROUTES:
+    from backend import async_routes
+    app.include_router(async_routes.router)
 
-# Define the hashing algorithm
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
 
 
 @app.get("/")
@@ -61,17 +81,35 @@ def root():
     return {"message": "MOOC Backend is running"}
 
 
-@app.post("/signup", status_code=status.HTTP_201_CREATED)
-def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+def _find_user_by_email(db: Session, email: str):
+    user = db.query(models.User).filter(models.User.email == email).first()
+    # Give the connection back to the pool before the caller awaits bcrypt,
+    # otherwise a login burst holds every pooled connection while hashing.
+    # close() keeps the loaded attributes usable on the detached user.
+    db.close()
+    return user
+
+
+def _store_rehash(db: Session, user_id: int, new_hash: str):
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {models.User.hashed_password: new_hash}, synchronize_session=False
+    )
+    db.commit()
+
+
+# signup and login are async so the bcrypt work can be awaited in the hashing
+# process pool; their short DB calls are pushed to the threadpool explicitly.
+@app.post("/signup", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limiter.per_ip("signup_ip"))])
+async def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     # 1. Check if user already exists
-    existing_user = db.query(models.User).filter(models.User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(_find_user_by_email, db, user_data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # 2. Key Check: If they choose a role from our ROLE_KEYS list
-    if user_data.role in ROLE_KEYS:
+    # 2. Key Check: If they choose a role that needs an enrollment key
+    if user_data.role in settings.role_keys:
         # Check if they provided the correct key from our .env
-        if user_data.enrollment_key != ROLE_KEYS[user_data.role]:
+        if user_data.enrollment_key != settings.role_keys[user_data.role]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, 
                 detail=f"Incorrect enrollment key for the {user_data.role} role."
@@ -79,7 +117,7 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     # 3. Hash the password and save the user
     if len(user_data.password.encode("utf-8")) > 72:
         raise HTTPException(status_code=400, detail="Password too long")
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = await hashing.hash_password_async(user_data.password)
     
     # new_user = models.User(
     #     full_name=user_data.full_name,
@@ -109,6 +147,10 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     # db.commit()
 
     # return {"message": "Signup successful"}
+    return await run_in_threadpool(_create_account, db, user_data, hashed_password)
+
+
+def _create_account(db: Session, user_data: schemas.UserCreate, hashed_password: str):
     try:
         # 4. Create auth user
         new_user = models.User(
@@ -117,13 +159,11 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
             hashed_password=hashed_password,
             role=user_data.role
         )
-        print("ROLE RECEIVED:", user_data.role)
         db.add(new_user)
         db.flush()   # user.id available, not committed
 
         # 5. Create role-specific row
         if user_data.role == "student":
-            print("INSIDE STUDENT BLOCK") 
             new_student = models.Student(
                 name=user_data.full_name,
                 email_id=user_data.email,
@@ -131,14 +171,12 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
             )
             db.add(new_student)
         elif user_data.role == "instructor":
-            print("INSIDE INSTRUCTOR BLOCK") 
             new_instructor = models.Instructor(
                 name=user_data.full_name,
                 email_id=user_data.email
             )
             db.add(new_instructor)
         elif user_data.role == "analyst":
-            print("INSIDE ANALYST BLOCK") 
             new_analyst = models.DataAnalyst(
                 name=user_data.full_name,
                 email_id=user_data.email,
@@ -146,7 +184,6 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
             )
             db.add(new_analyst)
         elif user_data.role == "admin":
-            print("INSIDE ADMIN BLOCK") 
             new_admin = models.SystemAdmin(
                 name=user_data.full_name,
                 email_id=user_data.email,
@@ -159,67 +196,79 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
         db.commit()
         return {"message": "Signup successful"}
 
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print("SIGNUP ERROR:", e)   # 👈 ADD THIS
+        logger.exception("signup failed for role %s", user_data.role)
         raise HTTPException(
             status_code=500,
             detail="Signup failed"
         )
 
-@app.post("/login")
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    # 1. Fetch user by email
-    user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
+@app.post("/login", dependencies=[Depends(rate_limiter.per_ip("login_ip"))])
+async def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+    # 1. Per-account limit (the per-IP one runs as a dependency), then fetch user by email
+    await run_in_threadpool(rate_limiter.hit, "login_email", user_credentials.email.lower())
+    user = await run_in_threadpool(_find_user_by_email, db, user_credentials.email)
 
     # 2. Check credentials
-    if not user or not pwd_context.verify(user_credentials.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await hashing.verify_and_update_async(user_credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    # 3. Create the JWT Token Payload
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    # We include 'sub' (the subject, usually email) and 'role' 
-    token_data = {
-        "sub": user.email, 
-        "role": user.role,
-        "user_id": user.id
-    }
-    
-    # Calculate expiration
-    expire = datetime.now(timezone.utc) + access_token_expires
-    token_data.update({"exp": expire})
+    # 2b. The stored hash's cost is off target (hardware changed): store the rehash
+    if new_hash:
+        await run_in_threadpool(_store_rehash, db, user.id, new_hash)
 
-    # 4. Sign the token
-    encoded_jwt = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+    # 3. Create the JWT access token plus a rotating refresh token and send to React
+    return await run_in_threadpool(tokens.issue_tokens, db, user)
+
+
+@app.post("/token/refresh", dependencies=[Depends(rate_limiter.per_ip("refresh_ip"))])
+def refresh_access_token(body: schemas.TokenRefresh, db: Session = Depends(get_db)):
+    """
+    Trades a refresh token for a new access + refresh token pair without
+    touching the password hash. Each refresh token works once.
+    """
+    return tokens.rotate_refresh_token(db, body.refresh_token)
 
-    # 5. Send to React
-    return {
-        "access_token": encoded_jwt,
-        "token_type": "bearer",
-        "role": user.role
-    }
+
+@app.post("/logout")
+def logout(
+    body: Optional[schemas.TokenRefresh] = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Revokes the presented access token, and the refresh token family if one is sent."""
+    payload = decode_token(token)
+    if not revocations.revoke_token(db, payload):
+        raise HTTPException(status_code=400, detail="Token cannot be revoked (no jti)")
+    if body:
+        tokens.revoke_refresh_token(db, body.refresh_token)
+    return {"message": "Logged out"}
 
 """ Routing for Student """
 
 @app.get("/student")
+@query_budget(5)
 def student_all_courses(
+    page: PageRequest = Depends(),
     student: models.Student = Depends(get_curr_student), # Returns Student model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
-    all_courses = crud.get_all_courses(db,skip=0,limit=20)
-    
     return {
         "student_id": student.student_id,
         "student_name": student.name,
-        "catalog": all_courses,
+        **catalog.course_page(db, page),
         "my_list": crud.get_student_courses(db,student.student_id)  # Using column from Student table
     }
 
 @app.get("/student/enrollments")
+@query_budget(6)
 def student_home(
     student: models.Student = Depends(get_curr_student), # Returns Student model
     db: Session = Depends(get_db)
@@ -229,11 +278,13 @@ def student_home(
     Each course includes instructor info, description, and standard folder structure.
     """
     courses = crud.get_student_courses(db, student.student_id)
+    # Instructors of every enrolled course in one query
+    instructors_by_course = crud.get_instructors_by_course(db, [c.course_id for c in courses])
     
     course_list = []
     for course in courses:
         # Get instructor names for this course
-        instructors = crud.get_course_instructors(db, course.course_id)
+        instructors = instructors_by_course[course.course_id]
         instructor_names = ', '.join([i.name for i in instructors]) if instructors else 'TBA'
         
         course_data = {
@@ -253,7 +304,25 @@ def student_home(
     }
 
 
+# Declared before /student/{course_id}, which would otherwise capture it
+@app.get("/student/grades")
+@query_budget(5)
+def get_student_grades(
+    db: Session = Depends(get_db),
+    student: models.Student = Depends(get_curr_student)
+):
+    """
+    Grades in every enrolled course: the overall evaluation and each
+    assignment with the latest submission, in one query.
+    """
+    return {
+        "student_name": student.name,
+        "courses": crud.get_student_grades(db, student.student_id)
+    }
+
+
 @app.get("/student/{course_id}", response_model=List[schemas.FolderSchema])
+@query_budget(5)
 def get_student_enrollment_course_structure(
     course_id: int,
     db: Session = Depends(get_db),
@@ -270,15 +339,12 @@ def get_student_enrollment_course_structure(
     if course_id not in course_ids:
         raise HTTPException(status_code=403, detail="Not enrolled in this course")
     
-    # Ensure standard folders exist and return them
-    folders = crud.ensure_standard_folders(db, course_id)
-    
-    if not folders:
-        return []
-    return folders
+    # Whole tree in two queries (cached per course)
+    return foldertree.folder_trees.get_tree(db, course_id)
 
 
 @app.get("/student/enrollments/{course_id}", response_model=List[schemas.FolderSchema])
+@query_budget(5)
 def get_student_enrollment_course_view(
     course_id: int, 
     db: Session = Depends(get_db),
@@ -295,12 +361,8 @@ def get_student_enrollment_course_view(
     if course_id not in course_ids:
         raise HTTPException(status_code=403, detail="Not enrolled in this course")
     
-    # Ensure standard folders exist and return them
-    folders = crud.ensure_standard_folders(db, course_id)
-    
-    if not folders:
-        return []
-    return folders
+    # Whole tree in two queries (cached per course)
+    return foldertree.folder_trees.get_tree(db, course_id)
 
 
 @app.post("/student/courses/{course_id}/enroll")
@@ -339,6 +401,45 @@ def enroll_student(
         print(f"Enrollment Error: {e}")
         raise HTTPException(status_code=500, detail="Enrollment failed")
 
+def _import_roster(db: Session, course_id: int, body: bytes, content_type: str):
+    course = crud.get_course_by_id(db, course_id)
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    try:
+        entries = roster.parse_roster(body, content_type)
+    except roster.RosterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return roster.enroll_roster(db, course_id, entries)
+
+@app.post("/admin/course/{course_id}/enroll_bulk", response_model=schemas.RosterImportSummary)
+def admin_bulk_enroll(
+    course_id: int,
+    body: bytes = Body(..., media_type="text/csv"),
+    content_type: str = Header("text/csv"),
+    db: Session = Depends(get_db),
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """
+    Enrolls a roster: CSV (text/csv) or JSONL (application/x-ndjson) of
+    student emails or ids. Returns enrolled / already enrolled / unknown counts.
+    """
+    return _import_roster(db, course_id, body, content_type)
+
+@app.post("/instructor/courses/{course_id}/enroll_bulk", response_model=schemas.RosterImportSummary)
+def instructor_bulk_enroll(
+    course_id: int,
+    body: bytes = Body(..., media_type="text/csv"),
+    content_type: str = Header("text/csv"),
+    db: Session = Depends(get_db),
+    instr: models.Instructor = Depends(get_curr_instructor)
+):
+    """Same as /admin/course/{course_id}/enroll_bulk, for the course's own instructors."""
+    if not instr:
+        raise HTTPException(status_code=401, detail="Unauthorized - Instructor profile not found")
+    if instr.instructor_id not in [i.instructor_id for i in crud.get_course_instructors(db, course_id)]:
+        raise HTTPException(status_code=403, detail="You are not authorized to modify this course")
+    return _import_roster(db, course_id, body, content_type)
+
 @app.post("/student/courses/{course_id}/submit_asg")
 def hand_assignment(
     course_id: int,
@@ -348,6 +449,19 @@ def hand_assignment(
 ):
     return crud.create_submission(db,subm,student.student_id)
 
+@app.get("/student/courses/{course_id}/grades")
+@query_budget(5)
+def get_course_grades(
+    course_id: int,
+    db: Session = Depends(get_db),
+    student: models.Student = Depends(get_curr_student)
+):
+    """Each assignment of the course with the student's latest submission."""
+    enrolled_courses = crud.get_student_courses(db, student.student_id)
+    if course_id not in [c.course_id for c in enrolled_courses]:
+        raise HTTPException(status_code=403, detail="Not enrolled in this course")
+    return crud.get_student_course_grades(db, student.student_id, course_id)
+
 @app.get("/student/courses/{course_id}/evaluation", response_model=schemas.EvaluationSchema)
 def get_course_evaluation(
     course_id: int,
@@ -407,12 +521,14 @@ def update_profile(
     if not update_dict:
         raise HTTPException(status_code=400, detail="No data provided for update")
 
+    old_email = student.email_id
     for key, value in update_dict.items():
         setattr(student, key, value)
 
     try:
         db.commit()
         db.refresh(student)
+        principal_cache.invalidate(old_email, student.email_id)
         return student
     except Exception as e:
         db.rollback()
@@ -461,12 +577,14 @@ def update_student_profile(
     if not update_dict:
         raise HTTPException(status_code=400, detail="No data provided for update")
     
+    old_email = student.email_id
     for key, value in update_dict.items():
         setattr(student, key, value)
     
     try:
         db.commit()
         db.refresh(student)
+        principal_cache.invalidate(old_email, student.email_id)
         return student
     except Exception as e:
         db.rollback()
@@ -475,6 +593,7 @@ def update_student_profile(
 
 """ Routing for Instructor """
 @app.get("/instructor")
+@query_budget(5)
 def get_home(
     instructor: models.Instructor = Depends(get_curr_instructor),
     db: Session = Depends(get_db)
@@ -483,30 +602,31 @@ def get_home(
     if not instructor:
         raise HTTPException(status_code=401, detail="Unauthorized - Instructor profile not found")
     
-    # 1. Fetch all course IDs this instructor is associated with
-    my_course_ids = db.query(models.course_instructor_link.c.course_id).filter(
+    # 1. One query: each of this instructor's courses with its fees and enrollment count
+    per_course = db.query(
+        models.Course.course_id,
+        models.Course.course_fees,
+        func.count(models.course_student_link.c.student_id)
+    ).join(
+        models.course_instructor_link,
+        models.course_instructor_link.c.course_id == models.Course.course_id
+    ).outerjoin(
+        models.course_student_link,
+        models.course_student_link.c.course_id == models.Course.course_id
+    ).filter(
         models.course_instructor_link.c.instructor_id == instructor.instructor_id
+    ).group_by(
+        models.Course.course_id, models.Course.course_fees
     ).all()
-    
-    # Flatten the list of tuples into a simple list of IDs
-    course_ids = [c[0] for c in my_course_ids]
 
-    # 2. Query numbers for each course
+    # 2. Earnings = enrollments x fees, per course
     total_earnings = 0
 
-    for c_id in course_ids:
-        # Get course details (fees)
-        course = db.query(models.Course).filter(models.Course.course_id == c_id).first()
-        
-        # Count enrollments for this specific course
-        enrollment_count = db.query(models.course_student_link).filter(
-            models.course_student_link.c.course_id == c_id
-        ).count()
-
-        earnings = enrollment_count * (course.course_fees or 0)
+    for c_id, course_fees, enrollment_count in per_course:
+        earnings = enrollment_count * (course_fees or 0)
         total_earnings += earnings
 
-    total_courses = len(course_ids)
+    total_courses = len(per_course)
     avg_earnings = (total_earnings / total_courses) if total_courses > 0 else None
     
     return {
@@ -565,12 +685,14 @@ def update_instructor_profile(
     if not update_dict:
         raise HTTPException(status_code=400, detail="No data provided for update")
     
+    old_email = instructor.email_id
     for key, value in update_dict.items():
         setattr(instructor, key, value)
     
     try:
         db.commit()
         db.refresh(instructor)
+        principal_cache.invalidate(old_email, instructor.email_id)
         return instructor
     except Exception as e:
         db.rollback()
@@ -578,6 +700,7 @@ def update_instructor_profile(
 
 
 @app.get("/instructor/courses")
+@query_budget(5)
 def get_instructor_courses(
     db: Session = Depends(get_db),
     instructor: models.Instructor = Depends(get_curr_instructor)
@@ -586,50 +709,39 @@ def get_instructor_courses(
     Returns all courses for the current instructor with their folder structure.
     Used by instructor's MyTeaching page.
     """
-    # Get all course IDs for this instructor
-    my_course_ids = db.query(models.course_instructor_link.c.course_id).filter(
-        models.course_instructor_link.c.instructor_id == instructor.instructor_id
-    ).all()
-    
-    course_ids = [c[0] for c in my_course_ids]
+    # Get all courses for this instructor
+    my_courses = crud.get_instructor_courses(db, instructor.instructor_id)
+    course_ids = [c.course_id for c in my_courses]
+
+    # Folder trees (two queries for all courses, see backend/foldertree.py)
+    # and enrolled students (one query) of all those courses
+    trees_by_course = foldertree.folder_trees.get_trees(db, course_ids)
+    students_by_course = crud.get_students_by_course(db, course_ids)
     
-    # Fetch course details for each course
+    # Build the details for each course
     courses = []
-    for course_id in course_ids:
-        course = db.query(models.Course).filter(models.Course.course_id == course_id).first()
-        if course:
-            # Get folders for this course
-            folders = db.query(models.Folder).filter(
-                models.Folder.course_id == course_id,
-                models.Folder.parent_id == None
-            ).all()
-            
-            # Get enrolled students for this course
-            students = db.query(models.Student).join(
-                models.course_student_link
-            ).filter(
-                models.course_student_link.c.course_id == course_id
-            ).all()
-            
-            courses.append({
-                "course_id": course.course_id,
-                "course_name": course.course_name,
-                # "course_description": course.course_description,
-                "duration": course.duration,
-                "skill_level": course.skill_level,
-                "course_fees": course.course_fees,
-                "instructor_name": instructor.name,
-                "folders": [schemas.FolderSchema.model_validate(f) for f in folders],
-                "students_enrolled": [
-                    {
-                        "id": s.student_id,
-                        "first_name": s.name.split()[0] if s.name else "",
-                        "last_name": s.name.split()[-1] if s.name and len(s.name.split()) > 1 else "",
-                        "email": s.email_id
-                    }
-                    for s in students
-                ]
-            })
+    for course in my_courses:
+        students = students_by_course[course.course_id]
+        
+        courses.append({
+            "course_id": course.course_id,
+            "course_name": course.course_name,
+            # "course_description": course.course_description,
+            "duration": course.duration,
+            "skill_level": course.skill_level,
+            "course_fees": course.course_fees,
+            "instructor_name": instructor.name,
+            "folders": trees_by_course[course.course_id],
+            "students_enrolled": [
+                {
+                    "id": s.student_id,
+                    "first_name": s.name.split()[0] if s.name else "",
+                    "last_name": s.name.split()[-1] if s.name and len(s.name.split()) > 1 else "",
+                    "email": s.email_id
+                }
+                for s in students
+            ]
+        })
     
     return courses
 
@@ -847,7 +959,7 @@ def post_textbook(
 
 @app.get("/analyst/home/")
 def get_advanced_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_routed_db),
     analyst: models.DataAnalyst = Depends(get_curr_analyst)
 ):
     # 1. TOTAL REVENUE (Sum of fees of all courses for every enrollment)
@@ -919,15 +1031,13 @@ def get_current_analyst(
     return current_analyst
 
 @app.get("/admin/courses")
+@query_budget(4)
 def admin_courses(
+    page: PageRequest = Depends(),
     admin: models.SystemAdmin = Depends(get_curr_admin), # Returns Student model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
-    all_courses = crud.get_all_courses(db,skip=0,limit=20)
-    
-    return {
-        "catalog": all_courses,
-    }
+    return catalog.course_page(db, page)
 
 @app.get("/admin/courses/{course_id}")
 def admin_course_view(
@@ -969,6 +1079,69 @@ def admin_home(
         "no_of_admins": no_of_admins
     }
 
+@app.get("/admin/metrics/catalog_cache")
+def admin_catalog_cache_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Hit/miss counters and current catalog version for this worker"""
+    return catalog.catalog_cache.stats()
+
+@app.get("/admin/metrics/folder_trees")
+def admin_folder_tree_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Hit/miss counters for the course folder tree cache of this worker"""
+    return foldertree.folder_trees.stats()
+
+@app.get("/admin/metrics/principal_cache")
+def admin_principal_cache_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Hit/miss counters for the auth principal cache of this worker"""
+    return principal_cache.stats()
+
+@app.get("/admin/metrics/hash_pool")
+def admin_hash_pool_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Queue depth and rejection counters for the password-hashing pool of this worker"""
+    return hashing.pool_stats()
+
+@app.get("/admin/metrics/revocations")
+def admin_revocation_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Size and hit counters of the token denylist of this worker"""
+    return revocations.stats()
+
+@app.get("/admin/metrics/rate_limits")
+def admin_rate_limit_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Allowed/rejected counters per auth rate limit rule (this worker)"""
+    return rate_limiter.stats()
+
+@app.get("/admin/metrics/db_pool")
+def admin_db_pool_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Checked-out/idle/overflow connections and checkout wait counters (this worker)"""
+    return database.pool_stats()
+
+@app.get("/admin/metrics/replicas")
+def admin_replica_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Replica lag/health and how reads were routed (this worker)"""
+    return replicas.router.stats()
+
+@app.get("/admin/metrics/queries")
+def admin_query_metrics(
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    """Routes that went over their query budget or ran N+1 patterns (this worker)"""
+    return querybudget.stats.snapshot()
+
 @app.get("/admin/profile/{admin_id}", response_model=schemas.SystemAdmin)
 def get_admin_profile(
     admin_id: int,
@@ -1003,11 +1176,13 @@ def update_admin_profile(
 
     update_dict = profile_data.model_dump(exclude_unset=True)
 
+    old_email = admin.email_id
     for key, value in update_dict.items():
         setattr(admin, key, value)
 
     db.commit()
     db.refresh(admin)
+    principal_cache.invalidate(old_email, admin.email_id)
     return admin
 
 @app.get("/analyst/profile/{analyst_id}", response_model=schemas.DataAnalyst)
@@ -1044,18 +1219,20 @@ def update_analyst_profile(
 
     update_dict = profile_data.model_dump(exclude_unset=True)
 
+    old_email = analyst.email_id
     for key, value in update_dict.items():
         setattr(analyst, key, value)
 
     db.commit()
     db.refresh(analyst)
+    principal_cache.invalidate(old_email, analyst.email_id)
     return analyst
 
 
 @app.get("/admin/users")
 def admin_users(
     admin: models.SystemAdmin = Depends(get_curr_admin), # Returns systemadmin model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
     try:
         users_list = []
@@ -1127,14 +1304,11 @@ def admin_users(
 
 @app.get("/admin/instructors")
 def admin_instructors(
+    page: PageRequest = Depends(),
     admin: models.SystemAdmin = Depends(get_curr_admin), # Returns systemadmin model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
-    all_instructors = db.query(models.Instructor).all()
-    
-    return {
-        "instructors": all_instructors,
-    }
+    return paginate(db, select(models.Instructor), crud.INSTRUCTOR_SORTS, page).as_response("instructors")
 
 @app.get("/admin/instructors/{instructor_id}")
 def admin_instructor_view(
@@ -1161,14 +1335,11 @@ def admin_instructor_view(
 
 @app.get("/admin/students")
 def admin_students(
+    page: PageRequest = Depends(),
     admin: models.SystemAdmin = Depends(get_curr_admin), # Returns systemadmin model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
-    all_students = db.query(models.Student).all()
-    
-    return {
-        "students": all_students,
-    }
+    return paginate(db, select(models.Student), crud.STUDENT_SORTS, page).as_response("students")
 
 @app.get("/admin/students/{student_id}")
 def admin_student_view(  
@@ -1190,14 +1361,11 @@ def admin_student_view(
 
 @app.get("/admin/data_analysts")
 def admin_data_analysts(
+    page: PageRequest = Depends(),
     admin: models.SystemAdmin = Depends(get_curr_admin), # Returns systemadmin model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
-    all_data_analysts = db.query(models.DataAnalyst).all()
-    
-    return {
-        "data_analysts": all_data_analysts,
-    }
+    return paginate(db, select(models.DataAnalyst), crud.DATA_ANALYST_SORTS, page).as_response("data_analysts")
 
 @app.get("/admin/data_analysts/{analyst_id}")
 def admin_data_analyst_view( 
@@ -1213,21 +1381,18 @@ def admin_data_analyst_view(
 
 @app.get("/admin/universities")
 def admin_universities(
+    page: PageRequest = Depends(),
     admin: models.SystemAdmin = Depends(get_curr_admin), # Returns systemadmin model
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_routed_db)
     ):
-    all_universities = db.query(models.University).all()
-    
-    return {
-        "universities": all_universities,
-    }
+    return catalog.university_page(db, page)
 
 
 @app.get("/universities")
-def public_universities(db: Session = Depends(get_db)):
-    """Public endpoint returning all universities for homepage display"""
-    all_universities = db.query(models.University).all()
-    return {"universities": all_universities}
+@query_budget(2)
+def public_universities(page: PageRequest = Depends(), db: Session = Depends(get_routed_db)):
+    """Public endpoint returning universities (one page) for homepage display"""
+    return catalog.university_page(db, page)
 @app.get("/admin/universities/{institute_id}")
 def admin_university_view(
     institute_id: int,
@@ -1278,6 +1443,7 @@ def admin_create_course(
         )
         db.add(new_course)
         db.flush()
+        crud.create_standard_folders(db, new_course.course_id)
 
         # 4. Link instructors manually
         for email in data.instructor_emails:
@@ -1526,6 +1692,24 @@ def admin_create_data_analyst(
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to create data analyst and user")
+
+@app.post("/admin/users/bulk", response_model=schemas.ProvisionReport)
+async def admin_bulk_create_users(
+    request: Request,
+    format: str = "csv",
+    db: Session = Depends(get_db),
+    admin: models.SystemAdmin = Depends(get_curr_admin)
+):
+    # Raw CSV/JSONL body: email, full_name, role (student/instructor/analyst), password, ...
+    if format not in provisioning.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(provisioning.FORMATS)}")
+    body = await request.body()
+    try:
+        rows = provisioning.parse_rows(body, format)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded")
+    # Hashing (process pool) and the batched inserts are blocking work
+    return await run_in_threadpool(provisioning.provision_users, db, rows)
     
 @app.post("/admin/course/{course_id}/assign_instructor/{instructor_email}")
 def admin_assign_instructor_to_course(
@@ -1680,12 +1864,14 @@ def admin_update_student(
     if not update_dict:
         raise HTTPException(status_code=400, detail="No data provided for update")
 
+    old_email = student.email_id
     for key, value in update_dict.items():
         setattr(student, key, value)
 
     try:
         db.commit()
         db.refresh(student)
+        principal_cache.invalidate(old_email, student.email_id)
         return {
             "message": f"Student '{student.name}' updated successfully",
             "updated_student": student
@@ -1866,6 +2052,7 @@ def remove_student(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
+    email = student.email_id
     try:
         # Delete corresponding auth user as well (match by email)
         user = db.query(models.User).filter(models.User.email == student.email_id).first()
@@ -1873,7 +2060,9 @@ def remove_student(
             db.delete(user)
 
         db.delete(student)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {
             "message": f"Student '{student.name}' and associated user removed successfully"
         }
@@ -1893,13 +2082,16 @@ def remove_student_by_path(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
+    email = student.email_id
     try:
         user = db.query(models.User).filter(models.User.email == student.email_id).first()
         if user:
             db.delete(user)
 
         db.delete(student)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {"message": f"Student '{student.name}' and associated user removed successfully"}
     except Exception:
         db.rollback()
@@ -1915,6 +2107,7 @@ def remove_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    email = user.email
     try:
         # Also delete from role-specific tables by matching email
         student = db.query(models.Student).filter(models.Student.email_id == user.email).first()
@@ -1931,7 +2124,9 @@ def remove_user(
         
         # Finally delete the user
         db.delete(user)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {
             "message": f"User '{user.full_name}' removed successfully from all tables"
         }
@@ -1949,6 +2144,7 @@ def remove_instructor(
     if not instructor:
         raise HTTPException(status_code=404, detail="Instructor not found")
 
+    email = instructor.email_id
     try:
         # Delete corresponding auth user as well
         user = db.query(models.User).filter(models.User.email == instructor.email_id).first()
@@ -1956,7 +2152,9 @@ def remove_instructor(
             db.delete(user)
 
         db.delete(instructor)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {
             "message": f"Instructor '{instructor.name}' and associated user removed successfully"
         }
@@ -1976,13 +2174,16 @@ def remove_instructor_by_path(
     if not instructor:
         raise HTTPException(status_code=404, detail="Instructor not found")
 
+    email = instructor.email_id
     try:
         user = db.query(models.User).filter(models.User.email == instructor.email_id).first()
         if user:
             db.delete(user)
 
         db.delete(instructor)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {"message": f"Instructor '{instructor.name}' and associated user removed successfully"}
     except Exception:
         db.rollback()
@@ -2019,6 +2220,7 @@ def remove_data_analyst(
     if not analyst:
         raise HTTPException(status_code=404, detail="Data Analyst not found")
 
+    email = analyst.email_id
     try:
         # Also remove corresponding auth user
         user = db.query(models.User).filter(models.User.email == analyst.email_id).first()
@@ -2026,7 +2228,9 @@ def remove_data_analyst(
             db.delete(user)
 
         db.delete(analyst)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {
             "message": f"Data Analyst '{analyst.name}' and associated user removed successfully"
         }
@@ -2046,13 +2250,16 @@ def remove_data_analyst_by_path(
     if not analyst:
         raise HTTPException(status_code=404, detail="Data Analyst not found")
 
+    email = analyst.email_id
     try:
         user = db.query(models.User).filter(models.User.email == analyst.email_id).first()
         if user:
             db.delete(user)
 
         db.delete(analyst)
+        revocations.revoke_user(db, email, commit=False)
         db.commit()
+        principal_cache.invalidate(email)
         return {"message": f"Data Analyst '{analyst.name}' and associated user removed successfully"}
     except Exception:
         db.rollback()
@@ -2103,7 +2310,10 @@ def add_top_level_folder(
     if instructor.instructor_id not in instructor_ids:
         raise HTTPException(status_code=403, detail="You are not authorized to modify this course")
     
-    return crud.create_folder(db, title=folder_data.title, course_id=course_id)
+    try:
+        return crud.create_folder(db, title=folder_data.title, course_id=course_id)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail=f"Folder '{folder_data.title}' already exists in this course")
 
 
 @app.post("/courses/{course_id}/{folder_id}/add_sub")
@@ -2136,8 +2346,72 @@ def add_subfolder(
     
     if not parent_folder:
         raise HTTPException(status_code=404, detail="Parent folder not found")
+    if parent_folder.depth is not None and parent_folder.depth + 1 > crud.FOLDER_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"Folders nest at most {crud.FOLDER_MAX_DEPTH} levels deep")
     
-    return crud.create_folder(db, title=folder_data.title, course_id=course_id, parent_id=folder_id)
+    try:
+        return crud.create_folder(db, title=folder_data.title, course_id=course_id, parent_id=folder_id)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail=f"Folder '{folder_data.title}' already exists in this folder")
+
+
+def _folder_for_instructor(db: Session, course_id: int, folder_id: int, instructor):
+    if not instructor:
+        raise HTTPException(status_code=401, detail="Unauthorized - Instructor profile not found")
+    if instructor.instructor_id not in [i.instructor_id for i in crud.get_course_instructors(db, course_id)]:
+        raise HTTPException(status_code=403, detail="You are not authorized to modify this course")
+    folder = db.query(models.Folder).filter(
+        models.Folder.folder_id == folder_id,
+        models.Folder.course_id == course_id
+    ).first()
+    if not folder:
+        raise HTTPException(status_code=404, detail="Folder not found")
+    if folder.parent_id is None and folder.title in crud.STANDARD_FOLDERS:
+        raise HTTPException(status_code=400, detail="Standard folders cannot be moved or deleted")
+    return folder
+
+@app.post("/courses/{course_id}/{folder_id}/move", response_model=schemas.FolderPosition)
+def move_folder(
+    course_id: int,
+    folder_id: int,
+    move: schemas.FolderMove,
+    db: Session = Depends(get_db),
+    instructor: models.Instructor = Depends(get_curr_instructor)
+):
+    """Moves a folder, with everything inside it, under another folder of the course (or to the top level)."""
+    folder = _folder_for_instructor(db, course_id, folder_id, instructor)
+
+    new_parent = None
+    if move.parent_id is not None:
+        new_parent = db.query(models.Folder).filter(
+            models.Folder.folder_id == move.parent_id,
+            models.Folder.course_id == course_id
+        ).first()
+        if not new_parent:
+            raise HTTPException(status_code=404, detail="Target folder not found")
+        if new_parent.path.startswith(folder.path):
+            raise HTTPException(status_code=400, detail="A folder cannot be moved into itself")
+
+    new_depth = new_parent.depth + 1 if new_parent else 0
+    if new_depth + crud.subtree_height(db, folder) > crud.FOLDER_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"Folders nest at most {crud.FOLDER_MAX_DEPTH} levels deep")
+
+    try:
+        return crud.move_folder(db, folder, new_parent)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail=f"Folder '{folder.title}' already exists there")
+
+@app.delete("/courses/{course_id}/{folder_id}")
+def delete_folder(
+    course_id: int,
+    folder_id: int,
+    db: Session = Depends(get_db),
+    instructor: models.Instructor = Depends(get_curr_instructor)
+):
+    """Deletes a folder, its subfolders and the items in them (the linked videos/notes stay)."""
+    folder = _folder_for_instructor(db, course_id, folder_id, instructor)
+    removed = crud.delete_subtree(db, folder)
+    return {"message": "Folder deleted", "folders_deleted": removed}
 
 @app.post("/courses/{course_id}/{folder_id}/{subfold_id}/add_video")
 def add_video(
@@ -2259,6 +2533,7 @@ def add_book(
 
 
 @app.get("/courses/{course_id}", response_model=List[schemas.FolderSchema])
+@query_budget(2)
 def get_course_structure(
     course_id: int, 
     db: Session = Depends(get_db)
@@ -2266,21 +2541,33 @@ def get_course_structure(
     """
     Returns the nested tree of folders and subfolders for a course.
     React uses this to render the 'Chapter' list and 'Topics'.
-    Automatically creates default folders if they don't exist.
+    Standard folders (General, Materials, Assignments, Assessments) are created with the course.
     """
-    # Ensure standard folders exist (General, Materials, Assignments, Assessments)
-    crud.ensure_standard_folders(db, course_id)
-    
-    # We only fetch top-level folders (parent_id is None) 
-    # The recursive schema handles fetching their subfolders automatically.
-    folders = db.query(models.Folder).filter(
-        models.Folder.course_id == course_id,
-        models.Folder.parent_id == None
-    ).all()
-    
-    if not folders:
-        return []
-    return folders
+    # Folders, subfolders and items in two flat queries, assembled and
+    # cached per course (backend/foldertree.py)
+    return foldertree.folder_trees.get_tree(db, course_id)
+
+@app.get("/courses/{course_id}/{folder_id}/subtree", response_model=schemas.FolderSchema)
+@query_budget(3)
+def get_folder_subtree(
+    course_id: int,
+    folder_id: int,
+    max_depth: Optional[int] = Query(None, ge=0, description="levels below the folder; all when omitted"),
+    db: Session = Depends(get_routed_db)
+):
+    """
+    Returns a folder with its subfolders and items, down to max_depth levels.
+    Declared before /courses/{course_id}/{folder_id}/{subfold_id}, which would match it first.
+    """
+    folder = db.query(models.Folder).filter(
+        models.Folder.folder_id == folder_id,
+        models.Folder.course_id == course_id
+    ).first()
+    if not folder:
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    folders, items = crud.get_subtree(db, folder, max_depth)
+    return foldertree.assemble(folders, items, root_id=folder.folder_id)
 
 @app.get("/courses/{course_id}/{folder_id}/{subfold_id}", response_model=schemas.FolderSchema)
 def get_folder_contents(
@@ -2306,6 +2593,18 @@ def get_folder_contents(
 
 """ Content Fetch Routes (for students to view content) """
 
+@app.get("/content/batch", response_model=schemas.ContentBatch)
+def get_content_batch(
+    item_ids: List[int] = Query(..., max_length=crud.CONTENT_BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+):
+    """
+    Resolve every item of a folder in one request (?item_ids=1&item_ids=2...):
+    one query per content type instead of two queries and a request per item.
+    """
+    return crud.get_content_batch(db, item_ids)
+
+
 @app.get("/content/video/{item_id}", response_model=schemas.Video)
 def get_video_content(
     item_id: int,
@@ -0,0 +1,263 @@
+"""
+Versioned schema migrations.
+
+`create_all` only creates missing tables, it never touches existing ones, so
+changes to tables that already hold data (indexes, constraints, backfills)
+are shipped as numbered steps here. Applied steps are recorded in the
+`schema_migrations` table and every step is safe to re-run.
+
+On PostgreSQL indexes are built with CREATE INDEX CONCURRENTLY (no write lock
+on the table while it builds) on an autocommit connection; an INVALID index
+left behind by an interrupted build is dropped and rebuilt.
+
+    python -m backend.migrations status
+    python -m backend.migrations upgrade [--to VERSION]
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from backend import database
+
+# Serialises concurrent `upgrade` runs (several workers / deploy hosts) on PostgreSQL
+ADVISORY_LOCK_ID = 7_240_515
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration:
+    def __init__(self, version: int, name: str, steps):
+        self.version = version
+        self.name = name
+        self.steps = steps
+
+    def apply(self, engine):
+        for step in self.steps:
+            step(engine)
+
+
+""" Building blocks """
+
+def create_tables(engine):
+    from backend import models  # noqa: F401  (registers the tables on Base.metadata)
+    database.Base.metadata.create_all(bind=engine)
+
+def run_sql(*statements):
+    """A step running plain statements in one transaction."""
+    def step(engine):
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    return step
+
+def _drop_invalid_index(conn, name):
+    invalid = conn.execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        print(f"   dropping invalid index {name} (interrupted build)")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def _index_ddl(name, table, columns, unique, where, concurrently=False):
+    return (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{name} ON {table} ({', '.join(columns)})" + (f" WHERE {where[0]}" if where else "")
+    )
+
+def create_indexes(*indexes):
+    """
+    A step creating (name, table, columns, unique[, where]) indexes if they do
+    not exist yet. CONCURRENTLY cannot run inside a transaction, hence AUTOCOMMIT.
+    """
+    def step(engine):
+        if engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                for name, table, columns, unique, *where in indexes:
+                    _drop_invalid_index(conn, name)
+                    conn.execute(text(_index_ddl(name, table, columns, unique, where, concurrently=True)))
+        else:
+            with engine.begin() as conn:
+                for name, table, columns, unique, *where in indexes:
+                    conn.execute(text(_index_ddl(name, table, columns, unique, where)))
+    return step
+
+def add_columns(table, *columns):
+    """
+    A step adding (name, type DDL) columns that are not there yet (create_all
+    never alters a table). The DDL may be a {dialect name or "default": DDL} dict.
+    """
+    def step(engine):
+        with engine.begin() as conn:
+            existing = {c["name"] for c in inspect(conn).get_columns(table)}
+            for name, ddl in columns:
+                if isinstance(ddl, dict):
+                    ddl = ddl.get(engine.dialect.name, ddl["default"])
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+    return step
+
+def fill_folder_paths(engine):
+    from backend import crud
+    with engine.begin() as conn:
+        crud.fill_folder_paths(conn)
+
+def merge_duplicate_folders(engine):
+    """
+    Folds sibling folders sharing a title into the oldest one: items and
+    subfolders move over, the duplicates are deleted. Moving subfolders can
+    make them duplicates in turn, so repeat until nothing is left to merge.
+    """
+    from backend import models
+    folders, items = models.Folder.__table__, models.FolderItem.__table__
+    with engine.begin() as conn:
+        while True:
+            keep, merge = {}, {}
+            rows = conn.execute(select(folders.c.folder_id, folders.c.course_id, folders.c.parent_id, folders.c.title)
+                                .order_by(folders.c.folder_id))
+            for folder_id, course_id, parent_id, title in rows:
+                first = keep.setdefault((course_id, parent_id, title), folder_id)
+                if first != folder_id:
+                    merge[folder_id] = first
+            if not merge:
+                return
+            print(f"   merging {len(merge)} duplicate folder(s)")
+            for duplicate, first in merge.items():
+                conn.execute(items.update().where(items.c.folder_id == duplicate).values(folder_id=first))
+                conn.execute(folders.update().where(folders.c.parent_id == duplicate).values(parent_id=first))
+            conn.execute(folders.delete().where(folders.c.folder_id.in_(list(merge))))
+
+
+""" Migrations (append only; never edit one that has shipped) """
+
+MIGRATIONS = [
+    Migration(1, "baseline tables", [create_tables]),
+    Migration(2, "indexes on hot join and filter columns", [
+        # edit_grade upserts one evaluation per (course, student); keep the
+        # newest row of any duplicates before making the pair unique
+        run_sql(
+            "DELETE FROM evaluation WHERE evaluation_id NOT IN ("
+            "SELECT MAX(evaluation_id) FROM evaluation GROUP BY course_id, student_id)"
+        ),
+        create_indexes(
+            ("ix_course_student_link_student_id", "course_student_link", ["student_id"], False),
+            ("ix_course_instructor_link_instructor_id", "course_instructor_link", ["instructor_id"], False),
+            ("uq_evaluation_course_student", "evaluation", ["course_id", "student_id"], True),
+            # several submissions per student and assignment are allowed
+            ("ix_student_submission_assignment_student", "student_submission", ["assignment_id", "student_id"], False),
+            ("ix_folders_course_parent", "folders", ["course_id", "parent_id"], False),
+            ("ix_folder_items_folder_id", "folder_items", ["folder_id"], False),
+            ("ix_assignment_course_id", "assignment", ["course_id"], False),
+            ("ix_users_email_role", "users", ["email", "role"], False),
+        ),
+    ]),
+    Migration(3, "unique folder titles and standard folders for every course", [
+        merge_duplicate_folders,
+        create_indexes(
+            ("uq_folders_course_parent_title", "folders", ["course_id", "parent_id", "title"], True),
+            ("uq_folders_course_top_title", "folders", ["course_id", "title"], True, "parent_id IS NULL"),
+        ),
+        # courses created before folders were added at creation time
+        run_sql(*(
+            "INSERT INTO folders (title, course_id, parent_id) "
+            f"SELECT '{title}', c.course_id, NULL FROM course c WHERE NOT EXISTS ("
+            f"SELECT 1 FROM folders f WHERE f.course_id = c.course_id AND f.parent_id IS NULL AND f.title = '{title}')"
+            for title in ("General", "Materials", "Assignments", "Assessments")
+        )),
+    ]),
+    Migration(4, "name indexes for keyset pagination", [
+        create_indexes(
+            ("ix_course_name_id", "course", ["course_name", "course_id"], False),
+            ("ix_student_name_id", "student", ["name", "student_id"], False),
+            ("ix_instructor_name_id", "instructor", ["name", "instructor_id"], False),
+            ("ix_university_name_id", "university", ["name", "institute_id"], False),
+            ("ix_data_analyst_name_id", "data_analyst", ["name", "analyst_id"], False),
+        ),
+    ]),
+    Migration(5, "catalog version counter", [
+        create_tables,
+        run_sql("INSERT INTO catalog_version (id, version) "
+                "SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM catalog_version WHERE id = 1)"),
+    ]),
+    Migration(6, "materialized path and depth on folders", [
+        add_columns(
+            "folders",
+            ("path", {"postgresql": 'VARCHAR(255) COLLATE "C"', "default": "VARCHAR(255)"}),
+            ("depth", "INTEGER"),
+        ),
+        fill_folder_paths,
+        create_indexes(("ix_folders_course_path", "folders", ["course_id", "path"], False)),
+    ]),
+    Migration(7, "drop refresh tokens of deleted users", [
+        # left behind where ON DELETE CASCADE was not enforced (SQLite)
+        run_sql("DELETE FROM refresh_tokens WHERE user_id NOT IN (SELECT id FROM users)"),
+    ]),
+]
+
+
+""" Runner """
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            return {}
+        return {row.version: row for row in conn.execute(select(schema_migrations))}
+
+@contextmanager
+def _migration_lock(engine):
+    """Session-level advisory lock on PostgreSQL; other databases run one deploy at a time."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+def upgrade(engine=None, target: int = None):
+    """Apply pending migrations up to `target` (default: all). Returns the versions applied."""
+    engine = engine if engine is not None else database.engine
+    applied = []
+    with _migration_lock(engine):
+        _metadata.create_all(bind=engine)
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            if migration.version in done or (target is not None and migration.version > target):
+                continue
+            print(f"⏳ {migration.version:04d} {migration.name}")
+            migration.apply(engine)
+            with engine.begin() as conn:
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)
+                ))
+            applied.append(migration.version)
+    return applied
+
+def status(engine=None):
+    engine = engine if engine is not None else database.engine
+    done = applied_versions(engine)
+    return [(m.version, m.name, done[m.version].applied_at if m.version in done else None) for m in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["upgrade", "status"], nargs="?", default="status")
+    parser.add_argument("--to", type=int, help="stop after this version")
+    args = parser.parse_args()
+
+    print(f"🗄  {database.engine.url.render_as_string(hide_password=True)}")
+    if args.command == "upgrade":
+        versions = upgrade(target=args.to)
+        print(f"✅ applied {len(versions)} migration(s)" if versions else "✅ already up to date")
+    else:
+        for version, name, applied_at in status():
+            mark = f"applied {applied_at:%Y-%m-%d %H:%M}" if applied_at else "pending"
+            print(f"   {version:04d} {name:45} {mark}")
@@ -1,5 +1,5 @@
 from backend.database import Base
-from sqlalchemy import Column, Integer, String, Date, ForeignKey,DateTime, CheckConstraint, Table
+from sqlalchemy import Column, Integer, String, Date, ForeignKey,DateTime, CheckConstraint, Table, Index, BigInteger
 from sqlalchemy.orm import relationship,backref
 from datetime import datetime
 course_topic_link = Table(
@@ -13,7 +13,9 @@ course_student_link = Table(
     "course_student_link",
     Base.metadata,
     Column("course_id",Integer,ForeignKey("course.course_id"),primary_key=True),
-    Column("student_id",Integer,ForeignKey("student.student_id"),primary_key=True)
+    Column("student_id",Integer,ForeignKey("student.student_id"),primary_key=True),
+    # the PK leads with course_id; "courses of a student" needs its own index
+    Index("ix_course_student_link_student_id", "student_id")
 )
 
 # Relationship: Instructor "Teaches" Course (Many-to-Many)
@@ -21,7 +23,8 @@ course_instructor_link = Table(
     "course_instructor_link",
     Base.metadata,
     Column("course_id", Integer, ForeignKey("course.course_id"), primary_key=True),
-    Column("instructor_id", Integer, ForeignKey("instructor.instructor_id"), primary_key=True)
+    Column("instructor_id", Integer, ForeignKey("instructor.instructor_id"), primary_key=True),
+    Index("ix_course_instructor_link_instructor_id", "instructor_id")
 )
 
 class User(Base):
@@ -32,6 +35,14 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="student")  # 'student', 'instructor', 'analyst', 'admin'
+
+    # Deleted with the user in the same flush. The FK's ON DELETE CASCADE is
+    # not enforced on SQLite, which may also hand the id to the next user.
+    refresh_tokens = relationship("RefreshToken", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_users_email_role", "email", "role"),
+    )
     
 class Course(Base):
     __tablename__ = "course"
@@ -55,6 +66,11 @@ class Course(Base):
     university = relationship("University", back_populates="courses")
     program = relationship("Program", back_populates="courses")
 
+    # keyset pagination by name (backend/pagination.py)
+    __table_args__ = (
+        Index("ix_course_name_id", "course_name", "course_id"),
+    )
+
 class Student(Base):
     __tablename__ = "student"
 
@@ -67,6 +83,11 @@ class Student(Base):
     contact_number = Column(String(20))
     specialization = Column(String(100))
 
+    # keyset pagination by name (backend/pagination.py)
+    __table_args__ = (
+        Index("ix_student_name_id", "name", "student_id"),
+    )
+
 class Instructor(Base):
     __tablename__ = "instructor"
 
@@ -75,6 +96,11 @@ class Instructor(Base):
     department = Column(String(100))
     email_id = Column(String(100), unique=True, nullable=False)
 
+    # keyset pagination by name (backend/pagination.py)
+    __table_args__ = (
+        Index("ix_instructor_name_id", "name", "instructor_id"),
+    )
+
 class Video(Base):
     __tablename__ = "video"
 
@@ -119,6 +145,10 @@ class University(Base):
     # One to Many
     courses = relationship("Course",back_populates="university")
 
+    # keyset pagination by name (backend/pagination.py)
+    __table_args__ = (
+        Index("ix_university_name_id", "name", "institute_id"),
+    )
 
 class SystemAdmin(Base):
     __tablename__ = "system_administrator"
@@ -151,6 +181,11 @@ class DataAnalyst(Base):
     email_id = Column(String(100), unique=True, index=True, nullable=False)
     dob = Column(Date, nullable=True)
 
+    # keyset pagination by name (backend/pagination.py)
+    __table_args__ = (
+        Index("ix_data_analyst_name_id", "name", "analyst_id"),
+    )
+
 class Evaluation(Base):
     __tablename__ = "evaluation"
 
@@ -163,6 +198,11 @@ class Evaluation(Base):
     student_id = Column(Integer, ForeignKey("student.student_id"), nullable=False)
     course_id = Column(Integer, ForeignKey("course.course_id"), nullable=False)
 
+    # One evaluation per student per course (edit_grade upserts on this pair)
+    __table_args__ = (
+        Index("uq_evaluation_course_student", "course_id", "student_id", unique=True),
+    )
+
 class Assignment(Base):
     __tablename__ = "assignment"
 
@@ -172,7 +212,7 @@ class Assignment(Base):
     assignment_url_link = Column(String(200), nullable=False)
     marks = Column(Integer)
     due_date = Column(Date)
-    course_id = Column(Integer, ForeignKey("course.course_id"))
+    course_id = Column(Integer, ForeignKey("course.course_id"), index=True)
     course = relationship("Course", back_populates="assignment")
 
 class StudentSubmission(Base):
@@ -187,6 +227,10 @@ class StudentSubmission(Base):
     obtained_marks = Column(Integer)  # Marks specifically for this student's work
     status = Column(String(20))       # e.g., "Graded", "Pending", "Late"
 
+    __table_args__ = (
+        Index("ix_student_submission_assignment_student", "assignment_id", "student_id"),
+    )
+
 
 class Folder(Base):
     __tablename__ = "folders"
@@ -194,6 +238,11 @@ class Folder(Base):
     title = Column(String(100), nullable=False)
     course_id = Column(Integer, ForeignKey("course.course_id"))
     parent_id = Column(Integer, ForeignKey("folders.folder_id"), nullable=True) # For sub-folders
+    # Materialized path "/<top id>/.../<own id>/" and depth (0 = top level),
+    # maintained by crud.py: a subtree is one range scan on (course_id, path).
+    # Byte-order collation on PostgreSQL so the range matches the prefix.
+    path = Column(String(255).with_variant(String(255, collation="C"), "postgresql"), nullable=True)
+    depth = Column(Integer, nullable=True)
 
     # Relationships
     course = relationship("Course", back_populates="folders")
@@ -202,10 +251,20 @@ class Folder(Base):
     # This allows nested folders (Self-referencing)
     subfolders = relationship("Folder", backref=backref('parent', remote_side=[folder_id]))
 
+    __table_args__ = (
+        Index("ix_folders_course_parent", "course_id", "parent_id"),
+        Index("ix_folders_course_path", "course_id", "path"),
+        # Sibling titles are unique. NULLs never compare equal in a unique
+        # index, so top-level folders need their own partial index.
+        Index("uq_folders_course_parent_title", "course_id", "parent_id", "title", unique=True),
+        Index("uq_folders_course_top_title", "course_id", "title", unique=True,
+              sqlite_where=parent_id.is_(None), postgresql_where=parent_id.is_(None)),
+    )
+
 class FolderItem(Base):
     __tablename__ = "folder_items"
     item_id = Column(Integer, primary_key=True, index=True)
-    folder_id = Column(Integer, ForeignKey("folders.folder_id"))
+    folder_id = Column(Integer, ForeignKey("folders.folder_id"), index=True)
     item_type = Column(String(20)) # e.g., 'video', 'assignment', 'notes', 'textbook'
 
     # Foreign Keys to your existing specialized tables
@@ -214,4 +273,43 @@ class FolderItem(Base):
     assignment_id = Column(Integer, ForeignKey("assignment.assignment_id"), nullable=True)
     # textbook_id = Column(Integer, ForeignKey("textbook.textbook_id"), nullable=True)
 
-    folder = relationship("Folder", back_populates="items")
\ No newline at end of file
+    folder = relationship("Folder", back_populates="items")
+
+class RevokedToken(Base):
+    """
+    Token denylist. `jti` is either an access token's jti, or "user:<email>"
+    to revoke every token issued to that user up to `revoked_at`.
+    Rows can be deleted once `expires_at` has passed.
+    """
+    __tablename__ = "revoked_tokens"
+    jti = Column(String(255), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class RefreshToken(Base):
+    """
+    Rotating refresh tokens. Only a SHA-256 of the token is stored. Tokens
+    rotated from the same login share a family_id, so presenting an
+    already-rotated token (reuse) can revoke the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    issued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)     # set when rotated
+    revoked_at = Column(DateTime, nullable=True)  # set on logout / reuse
+
+
+class CatalogVersion(Base):
+    """
+    One row (id 1) whose version is bumped in every transaction that changes
+    a course or a university; workers compare it to their cached catalog
+    (backend/catalog.py).
+    """
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,119 @@
+"""
+Keyset (cursor) pagination.
+
+A page is read as `WHERE (sort_key, pk) > (last seen) ORDER BY sort_key, pk
+LIMIT n`, so every page is one index range scan, whatever its position. The
+client gets an opaque `next_cursor` with the last row's key and passes it back
+as `?cursor=`; `null` means the last page was reached.
+
+    @app.get("/admin/students")
+    def admin_students(page: PageRequest = Depends(), db = Depends(get_db)):
+        return paginate(db, select(models.Student), STUDENT_SORTS, page).as_response("students")
+
+Totals are opt-in (`?include_total=true`). On PostgreSQL they are the
+planner's row estimate for the table (pg_class.reltuples, as fresh as the
+last ANALYZE) rather than a count(*) over the whole table.
+"""
+import base64
+import json
+import os
+from typing import Optional
+from fastapi import HTTPException, Query
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.orm import Session
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 20))
+# Larger ?limit= values are clamped to this
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 100))
+
+
+class PageRequest:
+    """Query parameters shared by every paginated listing (use as `Depends()`)."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, description=f"page size, at most {PAGE_SIZE_MAX}"),
+        sort: Optional[str] = Query(None, description="sort key; defaults to the listing's first"),
+        include_total: bool = Query(False, description="add an (estimated) total row count"),
+    ):
+        self.cursor = cursor
+        self.limit = min(limit, PAGE_SIZE_MAX)
+        self.sort = sort
+        self.include_total = include_total
+
+
+class Page:
+    def __init__(self, items, next_cursor, total=None, total_is_estimate=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    def as_response(self, key: str):
+        response = {key: self.items, "next_cursor": self.next_cursor}
+        if self.total is not None:
+            response["total"] = self.total
+            response["total_is_estimate"] = self.total_is_estimate
+        return response
+
+
+""" Cursors """
+
+def encode_cursor(sort: str, values) -> str:
+    raw = json.dumps([sort, list(values)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, width: int):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort or not isinstance(values, list) or len(values) != width:
+        raise HTTPException(status_code=400, detail="Cursor does not match this listing or sort")
+    return values
+
+
+""" Totals """
+
+def estimate_count(db: Session, table):
+    """(row count, is_estimate). PostgreSQL: planner estimate; elsewhere count(*)."""
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table.name}
+        ).scalar()
+        # -1 (or NULL) until the table has been vacuumed/analyzed once
+        if estimate is not None and estimate >= 0:
+            return int(estimate), True
+    return db.execute(select(func.count()).select_from(table)).scalar(), False
+
+
+""" Paging """
+
+def paginate(db: Session, stmt, sorts: dict, page: PageRequest) -> Page:
+    """
+    One page of `stmt` (an unfiltered select of one ORM entity; the total is
+    that table's). `sorts` maps each allowed ?sort= name to its key columns:
+    NOT NULL, unique together (end with the primary key), first is the default.
+    """
+    sort = page.sort or next(iter(sorts))
+    if sort not in sorts:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'; use one of {', '.join(sorts)}")
+    columns = sorts[sort]
+
+    if page.cursor:
+        values = decode_cursor(page.cursor, sort, len(columns))
+        stmt = stmt.where(tuple_(*columns) > tuple_(*values))
+    # One extra row tells whether there is a next page
+    rows = db.scalars(stmt.order_by(*columns).limit(page.limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(sort, [getattr(rows[-1], c.key) for c in columns])
+
+    total, is_estimate = None, False
+    if page.include_total:
+        total, is_estimate = estimate_count(db, columns[-1].class_.__table__)
+    return Page(rows, next_cursor, total, is_estimate)
@@ -0,0 +1,247 @@
+import argparse
+import csv
+import io
+import json
+import os
+from contextlib import contextmanager
+from pydantic import ValidationError
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend import hashing, models, schemas
+
+# Rows written per transaction
+PROVISION_CHUNK_SIZE = int(os.getenv("PROVISION_CHUNK_SIZE", 500))
+# Processes hashing passwords during a bulk import (default: every core)
+PROVISION_HASH_WORKERS = int(os.getenv("PROVISION_HASH_WORKERS", os.cpu_count() or 1))
+
+FORMATS = ("csv", "jsonl")
+
+# role -> (profile model, profile columns taken from the row besides name/email)
+ROLE_TABLES = {
+    "student": (models.Student, ("dob", "country", "skill_level", "contact_number", "specialization")),
+    "instructor": (models.Instructor, ("department",)),
+    "analyst": (models.DataAnalyst, ("dob",)),
+}
+
+
+""" Parsing """
+
+def parse_csv(text: str):
+    """Yield (line number, row dict). Empty cells are treated as missing."""
+    reader = csv.DictReader(io.StringIO(text))
+    for raw in reader:
+        yield reader.line_num, {k.strip(): v.strip() for k, v in raw.items() if k and v not in (None, "")}
+
+def parse_jsonl(text: str):
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(raw, dict):
+            yield line_no, ValueError("Each line must be a JSON object")
+            continue
+        yield line_no, raw
+
+def parse_rows(data, fmt: str):
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    if fmt == "csv":
+        return parse_csv(data)
+    if fmt == "jsonl":
+        return parse_jsonl(data)
+    raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+
+
+""" Provisioning """
+
+class _Report:
+    def __init__(self):
+        self.total = 0
+        self.created_by_role = {role: 0 for role in ROLE_TABLES}
+        self.errors = []
+
+    def error(self, row_no, email, message):
+        self.errors.append({"row": row_no, "email": email, "error": message})
+
+    def created(self, role):
+        self.created_by_role[role] += 1
+
+    def as_dict(self):
+        created = sum(self.created_by_role.values())
+        return {
+            "total": self.total,
+            "created": created,
+            "failed": len(self.errors),
+            "created_by_role": self.created_by_role,
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+        }
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@contextmanager
+def _password_hasher(workers: int):
+    """Yields a function hashing a list of passwords, spread over `workers` processes."""
+    if workers <= 1:
+        yield lambda passwords: [hashing.hash_password(p) for p in passwords]
+        return
+    with hashing.batch_pool(workers) as pool:
+        def hash_all(passwords):
+            chunksize = max(1, len(passwords) // (workers * 4))
+            return list(pool.map(hashing.hash_password, passwords, chunksize=chunksize))
+        yield hash_all
+
+def _validate(chunk, seen_emails, report):
+    valid = []
+    for row_no, raw in chunk:
+        report.total += 1
+        if isinstance(raw, Exception):
+            report.error(row_no, None, str(raw))
+            continue
+        try:
+            row = schemas.BulkUserRow.model_validate(raw)
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"])
+            report.error(row_no, raw.get("email"), f"{field}: {first['msg']}")
+            continue
+        if len(row.password.encode("utf-8")) > 72:
+            report.error(row_no, row.email, "Password too long")
+            continue
+        if row.email in seen_emails:
+            report.error(row_no, row.email, "Duplicate email in file")
+            continue
+        seen_emails.add(row.email)
+        valid.append((row_no, row))
+    return valid
+
+def _drop_registered(db: Session, valid, report):
+    """One query per chunk for emails already present, so they are never hashed."""
+    if not valid:
+        return valid
+    emails = [row.email for _, row in valid]
+    registered = set(db.execute(union_all(
+        select(models.User.email).where(models.User.email.in_(emails)),
+        *[select(model.email_id).where(model.email_id.in_(emails)) for model, _ in ROLE_TABLES.values()],
+    )).scalars())
+    db.rollback()  # end the read transaction before the (long) hashing step
+
+    remaining = []
+    for row_no, row in valid:
+        if row.email in registered:
+            report.error(row_no, row.email, "Email already registered")
+        else:
+            remaining.append((row_no, row))
+    return remaining
+
+def _user_values(row, hashed_password):
+    return {
+        "full_name": row.full_name,
+        "email": row.email,
+        "hashed_password": hashed_password,
+        "role": row.role,
+    }
+
+def _profile_values(row):
+    _, columns = ROLE_TABLES[row.role]
+    values = {"name": row.full_name, "email_id": row.email}
+    values.update({column: getattr(row, column) for column in columns})
+    return values
+
+def _insert_chunk(db: Session, entries, report):
+    """
+    entries: [(row_no, row, hashed_password)]. The whole chunk goes in as one
+    executemany per table and one commit. If it hits a constraint (an email
+    registered since the pre-check), it is redone row by row in savepoints so
+    only the offending rows fail.
+    """
+    if not entries:
+        return
+    profiles = {role: [] for role in ROLE_TABLES}
+    for _, row, hashed in entries:
+        profiles[row.role].append(_profile_values(row))
+
+    try:
+        db.execute(insert(models.User), [_user_values(row, hashed) for _, row, hashed in entries])
+        for role, values in profiles.items():
+            if values:
+                db.execute(insert(ROLE_TABLES[role][0]), values)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    else:
+        for _, row, _ in entries:
+            report.created(row.role)
+        return
+
+    for row_no, row, hashed in entries:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.User), [_user_values(row, hashed)])
+                db.execute(insert(ROLE_TABLES[row.role][0]), [_profile_values(row)])
+        except IntegrityError:
+            report.error(row_no, row.email, "Email already registered")
+        else:
+            report.created(row.role)
+    db.commit()
+
+def provision_users(db: Session, rows, chunk_size: int = None, workers: int = None):
+    """
+    Create users (plus their Student/Instructor/DataAnalyst row) from parsed
+    rows. Bad rows are reported and skipped; they never abort the batch.
+    """
+    chunk_size = chunk_size or PROVISION_CHUNK_SIZE
+    workers = PROVISION_HASH_WORKERS if workers is None else workers
+    report = _Report()
+    seen_emails = set()
+
+    with _password_hasher(workers) as hash_all:
+        for chunk in _chunks(rows, chunk_size):
+            valid = _validate(chunk, seen_emails, report)
+            valid = _drop_registered(db, valid, report)
+            hashes = hash_all([row.password for _, row in valid])
+            _insert_chunk(db, [(row_no, row, hashed) for (row_no, row), hashed in zip(valid, hashes)], report)
+
+    return report.as_dict()
+
+
+""" Command line """
+
+if __name__ == "__main__":
+    from backend import migrations
+    from backend.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk-create users from a CSV or JSONL file")
+    parser.add_argument("path", help="columns: email, full_name, role, password (+ optional profile fields)")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=PROVISION_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=PROVISION_HASH_WORKERS)
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    with open(args.path, "rb") as f:
+        data = f.read()
+
+    migrations.upgrade()
+    db = SessionLocal()
+    try:
+        print(f"⏳ Provisioning users from {args.path} ({args.workers} hashing processes)")
+        result = provision_users(db, parse_rows(data, fmt), args.chunk_size, args.workers)
+    finally:
+        db.close()
+
+    print(f"✅ Created {result['created']} of {result['total']} users {result['created_by_role']}")
+    for err in result["errors"]:
+        print(f"❌ row {err['row']} ({err['email']}): {err['error']}")
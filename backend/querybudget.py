@@ -0,0 +1,183 @@
+"""
+Per-request query counting, N+1 detection and query budgets.
+
+QueryCounterMiddleware counts the statements each request executes and how
+often each statement shape repeats. A shape seen QUERY_N_PLUS_ONE_THRESHOLD
+times or more in one request is reported as a likely N+1 (a query in a
+Python loop). Routes can declare how many statements they may run:
+
+    @app.get("/instructor")
+    @query_budget(5)
+    def get_home(...): ...
+
+Going over budget or hitting an N+1 is logged and counted. With
+QUERY_DEBUG_HEADERS=true the numbers are also returned as X-Query-* response
+headers, which is what `assert_query_budget` checks in tests.
+"""
+import contextvars
+import logging
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "false").lower() in ("1", "true", "yes")
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", 5))
+
+logger = logging.getLogger("mooc.queries")
+
+# Counts for the request being served; a mutable object so that statements run
+# in a threadpool copy of the context still land in it
+_request_counts = contextvars.ContextVar("request_query_counts", default=None)
+
+
+class QueryCounts:
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+
+    def add(self, statement: str):
+        self.count += 1
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int = None):
+        """{statement: times} for shapes run at least `threshold` times."""
+        threshold = QUERY_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    @property
+    def max_repeats(self):
+        return max(self.shapes.values(), default=0)
+
+
+class _Stats:
+    """Budget violations and N+1 detections per route (this worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.over_budget = Counter()
+        self.n_plus_one = Counter()
+
+    def record(self, route, over_budget, n_plus_one):
+        with self._lock:
+            if over_budget:
+                self.over_budget[route] += 1
+            if n_plus_one:
+                self.n_plus_one[route] += 1
+
+    def snapshot(self):
+        return {
+            "n_plus_one_threshold": QUERY_N_PLUS_ONE_THRESHOLD,
+            "over_budget": dict(self.over_budget),
+            "n_plus_one": dict(self.n_plus_one),
+        }
+
+
+stats = _Stats()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counts = _request_counts.get()
+    if counts is not None:
+        counts.add(statement)
+
+
+""" Budgets """
+
+def query_budget(max_queries: int):
+    """Declare the most statements a route may execute (auth dependencies included)."""
+    def decorate(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorate
+
+def route_budget(scope):
+    route = scope.get("route")
+    return getattr(getattr(route, "endpoint", None), "__query_budget__", None)
+
+
+class QueryCounterMiddleware:
+    """Pure ASGI middleware: counts statements per request and checks the route's budget."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        counts = QueryCounts()
+        token = _request_counts.set(counts)
+
+        async def send_with_counts(message):
+            if message["type"] == "http.response.start":
+                headers = _check(scope, counts)
+                if QUERY_DEBUG_HEADERS:
+                    message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_counts)
+        finally:
+            _request_counts.reset(token)
+
+
+def _check(scope, counts):
+    route = getattr(scope.get("route"), "path", scope.get("path"))
+    budget = route_budget(scope)
+    repeated = counts.repeated()
+    over_budget = budget is not None and counts.count > budget
+
+    if over_budget:
+        logger.warning("%s %s ran %d queries (budget %d)", scope["method"], route, counts.count, budget)
+    for shape, times in repeated.items():
+        logger.warning("%s %s: possible N+1, ran %d times: %s", scope["method"], route, times, shape.split("\n")[0][:200])
+    stats.record(route, over_budget, bool(repeated))
+
+    headers = [
+        (b"x-query-count", str(counts.count).encode()),
+        (b"x-query-max-repeats", str(counts.max_repeats).encode()),
+        (b"x-query-n-plus-one", str(len(repeated)).encode()),
+    ]
+    if budget is not None:
+        headers.append((b"x-query-budget", str(budget).encode()))
+    return headers
+
+
+""" Test harness """
+
+@contextmanager
+def count_queries():
+    """Count the statements run by the code inside the block (same thread/context)."""
+    counts = QueryCounts()
+    token = _request_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _request_counts.reset(token)
+
+def assert_query_budget(client, method: str, url: str, **kwargs):
+    """
+    Perform a request with a test client and fail if the route ran more
+    statements than its @query_budget, or ran any statement shape often
+    enough to look like an N+1. Returns the response.
+    """
+    global QUERY_DEBUG_HEADERS
+    previous, QUERY_DEBUG_HEADERS = QUERY_DEBUG_HEADERS, True
+    try:
+        response = client.request(method, url, **kwargs)
+    finally:
+        QUERY_DEBUG_HEADERS = previous
+
+    count = int(response.headers["x-query-count"])
+    budget = response.headers.get("x-query-budget")
+    assert budget is None or count <= int(budget), f"{method} {url}: {count} queries, budget {budget}"
+    n_plus_one = int(response.headers["x-query-n-plus-one"])
+    assert n_plus_one == 0, (
+        f"{method} {url}: {n_plus_one} statement shape(s) repeated "
+        f"{response.headers['x-query-max-repeats']}+ times (N+1)"
+    )
+    return response
@@ -0,0 +1,175 @@
+"""
+Slow-query log.
+
+Every statement on every engine is timed with before/after_cursor_execute.
+Statements slower than SLOW_QUERY_MS are written to a rotating JSONL file,
+tagged with the route that issued them, with their parameter values
+redacted. The first time a statement shape is slow, its plan (EXPLAIN on
+PostgreSQL, EXPLAIN QUERY PLAN on SQLite) is captured too and full table
+scans are flagged.
+
+Enabled by setting SLOW_QUERY_LOG_PATH.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+# Statement shapes whose plan has been captured (bounded)
+SLOW_QUERY_EXPLAIN_MAX_SHAPES = int(os.getenv("SLOW_QUERY_EXPLAIN_MAX_SHAPES", 10_000))
+
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# ASGI scope of the request being served (set by QueryContextMiddleware). The
+# router fills in scope["route"] after the middleware runs, so the route
+# template is looked up lazily when a statement is logged.
+request_scope = contextvars.ContextVar("request_scope", default=None)
+
+_logger = None
+_explained = OrderedDict()
+_explained_lock = threading.Lock()
+
+
+def current_route():
+    scope = request_scope.get()
+    if scope is None:
+        return None, None
+    route = scope.get("route")
+    return scope.get("method"), getattr(route, "path", None) or scope.get("path")
+
+
+""" Redaction and plans """
+
+def redact(parameters):
+    """Keep the parameter names/positions and types, never the values."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"executemany": len(parameters), "first": redact(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return None
+
+def _first_parameters(parameters, executemany):
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return parameters[0]
+    return parameters
+
+def explain(conn, statement, parameters, executemany):
+    """
+    Plan of a statement on a separate cursor of the same connection (the
+    original cursor still holds the results). On PostgreSQL this runs inside
+    a savepoint so a failing EXPLAIN cannot abort the caller's transaction.
+    Returns (plan lines, full_scan).
+    """
+    dialect = conn.dialect.name
+    parameters = _first_parameters(parameters, executemany)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if dialect == "postgresql":
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute("EXPLAIN " + statement, parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan, any("Seq Scan" in line for line in plan)
+        if dialect == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+            plan = [row[-1] for row in cursor.fetchall()]
+            # "SCAN t" is a full scan; "SCAN t USING (COVERING) INDEX ..." is not
+            return plan, any(line.startswith("SCAN ") and "INDEX" not in line for line in plan)
+        return None, None
+    finally:
+        cursor.close()
+
+def _first_time_slow(shape):
+    with _explained_lock:
+        if shape in _explained:
+            return False
+        _explained[shape] = True
+        while len(_explained) > SLOW_QUERY_EXPLAIN_MAX_SHAPES:
+            _explained.popitem(last=False)
+        return True
+
+
+""" Engine hooks """
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the execution context, so a failed statement leaves nothing behind
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+
+    method, route = current_route()
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "duration_ms": round(elapsed_ms, 2),
+        "method": method,
+        "route": route,
+        "statement": statement,
+        "params": redact(parameters),
+        "rowcount": getattr(cursor, "rowcount", None),
+    }
+
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if SLOW_QUERY_EXPLAIN and verb in EXPLAINABLE and _first_time_slow(statement):
+        try:
+            record["explain"], record["full_scan"] = explain(conn, statement, parameters, executemany)
+        except Exception as e:
+            record["explain_error"] = f"{type(e).__name__}: {e}"
+
+    _logger.info(json.dumps(record, default=str))
+
+
+def install(path: str = None):
+    """Hook every Engine (primary, replicas, the async engine's sync side)."""
+    global _logger
+    path = path or SLOW_QUERY_LOG_PATH
+    if not path or _logger is not None:
+        return False
+    _logger = logging.getLogger("mooc.slow_queries")
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+    handler = RotatingFileHandler(path, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(handler)
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    return True
+
+
+class QueryContextMiddleware:
+    """Pure ASGI middleware exposing the current request's scope to the engine hooks."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
@@ -0,0 +1,212 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from backend.config import settings
+
+# Settings (backend/config.py, read on first use): RATE_LIMIT_ENABLED,
+# RATE_LIMIT_STORE ("memory" per worker, or "sqlite" shared by every worker on
+# the host) and RATE_LIMIT_SQLITE_PATH, RATE_LIMIT_MAX_KEYS (buckets kept by
+# the memory store, least recently used evicted first) and
+# RATE_LIMIT_TRUST_FORWARDED (only honour X-Forwarded-For behind a proxy that
+# sets it).
+#
+# Rules as "<requests>/<seconds>": a bucket holds <requests> tokens and
+# refills completely over <seconds>, so short bursts are allowed. Defaults are
+# config.DEFAULT_RATE_LIMIT_RULES, each overridable with RATE_LIMIT_<NAME>.
+
+
+def parse_rule(spec: str):
+    """'20/60' -> (capacity 20, refill rate 20/60 tokens per second)"""
+    requests, seconds = spec.split("/")
+    capacity = float(requests)
+    return capacity, capacity / float(seconds)
+
+def load_rules():
+    return {name: parse_rule(spec) for name, spec in settings.rate_limit_rules.items()}
+
+
+def _refill(tokens, updated, now, capacity, rate, cost):
+    """Token bucket step: (allowed, tokens left, seconds until `cost` tokens are available)."""
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+""" Stores """
+
+class MemoryBucketStore:
+    """Buckets for this worker only, in a bounded LRU (key -> (tokens, updated))."""
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = settings.rate_limit_max_keys if max_keys is None else max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _refill(tokens, updated, now, capacity, rate, cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # An evicted bucket restarts full, so only idle keys should get here
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return allowed, retry_after
+
+    def stats(self):
+        return {"store": "memory", "keys": len(self._buckets), "evictions": self.evictions}
+
+
+class SQLiteBucketStore:
+    """
+    Buckets in a local SQLite file so every worker process on the host shares
+    them. Each take() is one short IMMEDIATE transaction.
+    """
+
+    # Rows idle for longer than this are deleted (every rule refills well before)
+    PRUNE_IDLE_SECONDS = 3600
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.rate_limit_sqlite_path
+        self._local = threading.local()
+        self._calls = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0):
+        # wall clock: the timestamps are shared between processes
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = _refill(tokens, updated, now, capacity, rate, cost)
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.PRUNE_IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    def stats(self):
+        keys = self._conn().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+        return {"store": "sqlite", "path": self.path, "keys": keys}
+
+
+""" Limiter """
+
+class RateLimiter:
+    def __init__(self, store=None, rules: dict = None, enabled: bool = None):
+        # None = from settings / build_store() on first use, so importing
+        # reads no configuration and opens no files
+        self._store = store
+        self._store_lock = threading.Lock()
+        self._rules = rules
+        self._enabled = enabled
+        self.allowed = {}
+        self.rejected = {}
+        # A broken shared store must not take the auth routes down with it
+        self.store_errors = 0
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = build_store()
+        return self._store
+
+    @property
+    def rules(self):
+        if self._rules is None:
+            self._rules = load_rules()
+        return self._rules
+
+    @property
+    def enabled(self):
+        if self._enabled is None:
+            self._enabled = settings.rate_limit_enabled
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = value
+
+    def hit(self, rule: str, key: str):
+        """Spend one token from the `rule` bucket of `key`, or raise 429 with Retry-After."""
+        if not self.enabled or not key:
+            return
+        capacity, rate = self.rules[rule]
+        try:
+            allowed, retry_after = self.store.take(f"{rule}:{key}", capacity, rate)
+        except sqlite3.Error:
+            self.store_errors += 1
+            return
+        if allowed:
+            self.allowed[rule] = self.allowed.get(rule, 0) + 1
+            return
+        self.rejected[rule] = self.rejected.get(rule, 0) + 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def per_ip(self, rule: str):
+        """FastAPI dependency limiting the route by client address."""
+        def dependency(request: Request):
+            self.hit(rule, client_ip(request))
+        return dependency
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "allowed": {name: self.allowed.get(name, 0) for name in self.rules},
+            "rejected": {name: self.rejected.get(name, 0) for name in self.rules},
+            "store_errors": self.store_errors,
+            **self.store.stats(),
+        }
+
+
+def client_ip(request: Request):
+    if settings.rate_limit_trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def build_store():
+    if settings.rate_limit_store == "sqlite":
+        return SQLiteBucketStore(settings.rate_limit_sqlite_path)
+    return MemoryBucketStore(settings.rate_limit_max_keys)
+
+
+rate_limiter = RateLimiter()
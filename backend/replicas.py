@@ -0,0 +1,287 @@
+"""
+Read-replica routing.
+
+`get_routed_db` is a drop-in for `get_db` on read-only routes: GET/HEAD
+requests get a session on a replica (round robin), anything else the primary.
+A user whose own write committed in the last REPLICA_STICKY_SECONDS reads
+from the primary (read-your-writes), and a replica lagging more than
+REPLICA_MAX_LAG_SECONDS (or unreachable) is skipped until it catches up.
+
+Only routes that never write may use it: a replica session is read-only.
+"""
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Depends
+from jose import jwt, JWTError
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from backend import database
+
+# Comma-separated replica URLs; empty means every session goes to the primary
+REPLICA_DATABASE_URLS = [u.strip() for u in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if u.strip()]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 10))
+# Sticky users remembered per worker
+REPLICA_STICKY_MAX_KEYS = int(os.getenv("REPLICA_STICKY_MAX_KEYS", 100_000))
+STICKY_COOKIE = "mooc_primary_until"
+
+# Per-request routing state, set by ReplicaRoutingMiddleware. A dict, so that
+# writes committed in a threadpool copy of the context are visible to it.
+_request_state = contextvars.ContextVar("replica_routing_state", default=None)
+
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str = None, engine=None):
+        self.engine = engine if engine is not None else create_engine(url, **database._engine_options(url))
+        self.sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.lag_seconds = None     # None = unknown / unreachable
+        self.last_error = None
+        self.reads = 0
+
+    @property
+    def healthy(self):
+        return self.lag_seconds is not None and self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+
+    def measure_lag(self):
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    self.lag_seconds = float(conn.execute(POSTGRES_LAG_SQL).scalar() or 0)
+                else:
+                    # no replication to measure (e.g. a SQLite reader of the same file)
+                    conn.execute(text("SELECT 1"))
+                    self.lag_seconds = 0.0
+            self.last_error = None
+        except Exception as e:
+            self.lag_seconds = None
+            self.last_error = type(e).__name__
+
+    def stats(self):
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "lag_seconds": self.lag_seconds,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "reads": self.reads,
+        }
+
+
+class StickyUsers:
+    """Users who wrote recently and must read from the primary (bounded, per worker)."""
+
+    def __init__(self, max_keys: int = REPLICA_STICKY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._until = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, key: str):
+        with self._lock:
+            self._until[key] = time.time() + REPLICA_STICKY_SECONDS
+            self._until.move_to_end(key)
+            while len(self._until) > self.max_keys:
+                self._until.popitem(last=False)
+
+    def is_sticky(self, key: str):
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until < time.time():
+            with self._lock:
+                self._until.pop(key, None)
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._until)
+
+
+class ReplicaRouter:
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self.sticky = StickyUsers()
+        self._lag_lock = threading.Lock()
+        self._last_lag_check = 0.0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.lag_fallbacks = 0
+
+    def _refresh_lag(self):
+        now = time.monotonic()
+        if now - self._last_lag_check < REPLICA_LAG_CHECK_SECONDS:
+            return
+        if not self._lag_lock.acquire(blocking=False):
+            return  # another request is measuring
+        try:
+            for replica in self.replicas:
+                replica.measure_lag()
+            self._last_lag_check = time.monotonic()
+        finally:
+            self._lag_lock.release()
+
+    def is_sticky(self, state):
+        return bool(state and (state["sticky_cookie"] or self.sticky.is_sticky(state["key"])))
+
+    def pick(self, state):
+        """A healthy replica for this read, or None for the primary."""
+        if not self.replicas:
+            return None
+        if self.is_sticky(state):
+            self.sticky_reads += 1
+            return None
+        self._refresh_lag()
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+        self.lag_fallbacks += 1
+        return None
+
+    def stats(self):
+        return {
+            "replicas": [r.stats() for r in self.replicas],
+            "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+            "sticky_seconds": REPLICA_STICKY_SECONDS,
+            "sticky_users": len(self.sticky),
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "lag_fallbacks": self.lag_fallbacks,
+        }
+
+
+def _build_replicas():
+    replicas = [Replica(url) for url in REPLICA_DATABASE_URLS]
+    # Tuned SQLite split mode: the read-only connection pool acts as a lag-free replica
+    if database.sqlite_split_enabled(database.db_url):
+        replicas.append(Replica(engine=database.sqlite_reader_engine()))
+    return replicas
+
+
+router = ReplicaRouter(_build_replicas())
+
+
+""" Write tracking (read-your-writes) """
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _committed(session):
+    if session.info.pop("wrote", False):
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+            if state["key"]:
+                router.sticky.mark(state["key"])
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("wrote", None)
+
+
+""" Request plumbing """
+
+def _routing_key(scope):
+    """Token subject when present (not verified: it only picks a database), else client address."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    sub = jwt.get_unverified_claims(token).get("sub")
+                except JWTError:
+                    sub = None
+                if sub:
+                    return f"user:{sub}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else None
+
+def _sticky_cookie(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            for part in value.decode("latin-1").split(";"):
+                key, _, until = part.strip().partition("=")
+                if key == STICKY_COOKIE:
+                    try:
+                        return float(until) > time.time()
+                    except ValueError:
+                        return False
+    return False
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Pure ASGI middleware: records who is calling, and after a request that
+    committed a write sets a short-lived cookie so the same browser reads from
+    the primary on whichever worker serves it next.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        state = {
+            "key": _routing_key(scope),
+            "method": scope["method"],
+            "sticky_cookie": _sticky_cookie(scope),
+            "wrote": False,
+        }
+        token = _request_state.set(state)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state["wrote"]:
+                until = time.time() + REPLICA_STICKY_SECONDS
+                cookie = f"{STICKY_COOKIE}={until:.0f}; Max-Age={int(REPLICA_STICKY_SECONDS) or 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_state.reset(token)
+
+
+def wrote_recently():
+    """Whether the current caller committed a write in the last REPLICA_STICKY_SECONDS."""
+    return router.is_sticky(_request_state.get())
+
+
+def get_routed_db(primary: Session = Depends(database.get_db)):
+    """
+    get_db for read-only routes: a replica session when one is usable, else
+    the request's own get_db session (the one the auth dependency already
+    holds), so a routed read never takes a second primary connection.
+    """
+    state = _request_state.get()
+    replica = None
+    if state is None or state["method"] in ("GET", "HEAD"):
+        replica = router.pick(state)
+    if replica is None:
+        router.primary_reads += 1
+        yield primary
+        return
+    db = replica.sessionmaker()
+    try:
+        yield db
+    finally:
+        db.close()
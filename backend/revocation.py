@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend import database, models
+from backend.config import settings
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100_000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+# Most recent revocations kept in the exact set; older ones live only in the
+# Bloom filter and are confirmed against the table on a filter hit
+REVOCATION_EXACT_MAX = int(os.getenv("REVOCATION_EXACT_MAX", 100_000))
+# How often a worker pulls revocations made by other workers
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", 5))
+# How often expired rows are deleted (app lifespan task) and the filter rebuilt
+REVOCATION_COMPACT_SECONDS = float(os.getenv("REVOCATION_COMPACT_SECONDS", 300))
+
+logger = logging.getLogger("mooc.revocation")
+
+
+def _utcnow():
+    # naive UTC, like the other DateTime columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _ts(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+def user_key(email: str) -> str:
+    return f"user:{email}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """
+    In-memory view of the revoked_tokens table.
+
+    A check is a Bloom filter probe; only on a filter hit is the exact set
+    consulted, and only if that set is incomplete (it is bounded) is the
+    table queried. Revocations from other workers arrive through a periodic
+    incremental sync; on a longer period the filter is rebuilt without expired
+    rows. Checks only read: the rows themselves are deleted by purge_expired,
+    which the app's lifespan task runs on its own session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+        # key -> (expires_at ts, revoked_at ts), oldest revocation first
+        self._exact = OrderedDict()
+        self._exact_complete = True
+        self._loaded = False
+        self._last_sync = 0.0
+        self._last_sync_mark = None
+        self._last_compact = 0.0
+        self.checks = 0
+        self.filter_hits = 0
+        self.db_lookups = 0
+        self.revoked_hits = 0
+
+    """ bookkeeping """
+
+    def _remember(self, key: str, expires_at: float, revoked_at: float):
+        if key not in self._exact:
+            self._bloom.add(key)
+        self._exact[key] = (expires_at, revoked_at)
+        self._exact.move_to_end(key)
+        while len(self._exact) > REVOCATION_EXACT_MAX:
+            self._exact.popitem(last=False)
+            self._exact_complete = False
+
+    def _rebuild(self, rows):
+        capacity = max(REVOCATION_BLOOM_CAPACITY, 2 * len(rows))
+        self._bloom = BloomFilter(capacity, REVOCATION_BLOOM_ERROR_RATE)
+        self._exact = OrderedDict()
+        self._exact_complete = True
+        for row in sorted(rows, key=lambda r: r.revoked_at):
+            self._remember(row.jti, _ts(row.expires_at), _ts(row.revoked_at))
+
+    def _sync(self, db: Session):
+        """Pull new revocations (incremental) or reload the live ones when compacting."""
+        now = time.monotonic()
+        if self._loaded and now - self._last_sync < REVOCATION_SYNC_SECONDS:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # another request is already syncing
+        try:
+            mark = _utcnow()
+            if not self._loaded or now - self._last_compact >= REVOCATION_COMPACT_SECONDS:
+                self._rebuild(db.query(models.RevokedToken).filter(models.RevokedToken.expires_at >= mark).all())
+                self._last_compact = now
+            else:
+                # small overlap so rows committed around the last mark are not missed
+                since = self._last_sync_mark - timedelta(seconds=REVOCATION_SYNC_SECONDS)
+                for row in db.query(models.RevokedToken).filter(models.RevokedToken.revoked_at >= since):
+                    self._remember(row.jti, _ts(row.expires_at), _ts(row.revoked_at))
+            self._loaded = True
+            self._last_sync = now
+            self._last_sync_mark = mark
+        finally:
+            self._lock.release()
+
+    def _lookup(self, db: Session, key: str):
+        """(expires_at, revoked_at) for a key, or None. Only called on a filter hit."""
+        self.filter_hits += 1
+        entry = self._exact.get(key)
+        if entry is not None or self._exact_complete:
+            return entry
+        self.db_lookups += 1
+        row = db.query(models.RevokedToken).filter(models.RevokedToken.jti == key).first()
+        return (_ts(row.expires_at), _ts(row.revoked_at)) if row else None
+
+    """ public API """
+
+    def is_revoked(self, payload: dict, db: Session) -> bool:
+        self._sync(db)
+        self.checks += 1
+        now = time.time()
+
+        jti = payload.get("jti")
+        if jti and jti in self._bloom:
+            entry = self._lookup(db, jti)
+            if entry and entry[0] > now:
+                self.revoked_hits += 1
+                return True
+
+        key = user_key(payload.get("sub"))
+        if key in self._bloom:
+            entry = self._lookup(db, key)
+            # tokens issued before the revocation are dead. iat has whole-second
+            # resolution, so a token from the revocation's own second (e.g. a
+            # re-login right after a role change) is kept; the profile lookup
+            # still rejects it if the user or role is gone.
+            if entry and entry[0] > now and payload.get("iat", 0) < math.floor(entry[1]):
+                self.revoked_hits += 1
+                return True
+        return False
+
+    def _store(self, db: Session, key: str, expires_at: datetime, commit: bool = True):
+        revoked_at = _utcnow()
+        db.merge(models.RevokedToken(jti=key, expires_at=expires_at, revoked_at=revoked_at))
+        # applied in memory once the row commits (Session hooks below)
+        db.info.setdefault("pending_revocations", []).append((key, _ts(expires_at), _ts(revoked_at)))
+        if commit:
+            db.commit()
+
+    def _committed(self, entries):
+        with self._lock:
+            for key, expires_at, revoked_at in entries:
+                self._remember(key, expires_at, revoked_at)
+
+    def revoke_token(self, db: Session, payload: dict):
+        """Revoke a single access token (by its jti) until it would have expired anyway."""
+        jti = payload.get("jti")
+        if not jti:
+            return False
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+        self._store(db, jti, expires_at)
+        return True
+
+    def revoke_user(self, db: Session, email: str, commit: bool = True):
+        """
+        Revoke every token issued to this user so far (deletion, password change).
+        With commit=False the row joins the caller's transaction, so a user's
+        deletion and its revocation are committed (or rolled back) together.
+        """
+        expires_at = _utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        self._store(db, user_key(email), expires_at, commit)
+
+    def purge_expired(self):
+        """Deletes expired rows in a session of its own. Returns how many were removed."""
+        db = database.SessionLocal()
+        try:
+            removed = db.query(models.RevokedToken).filter(models.RevokedToken.expires_at < _utcnow()).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self):
+        return {
+            "entries": len(self._exact),
+            "exact_set_complete": self._exact_complete,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+            "bloom_items": self._bloom.count,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "db_lookups": self.db_lookups,
+            "revoked_hits": self.revoked_hits,
+        }
+
+
+revocations = RevocationList()
+
+
+""" Applied on commit """
+
+@event.listens_for(Session, "after_commit")
+def _committed(session):
+    entries = session.info.pop("pending_revocations", None)
+    if entries:
+        revocations._committed(entries)
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("pending_revocations", None)
+
+
+async def purge_periodically():
+    """Lifespan task: delete expired revocations every REVOCATION_COMPACT_SECONDS."""
+    while True:
+        await asyncio.sleep(REVOCATION_COMPACT_SECONDS)
+        try:
+            await run_in_threadpool(revocations.purge_expired)
+        except Exception:
+            logger.exception("purging expired revocations failed")
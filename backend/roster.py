@@ -0,0 +1,157 @@
+"""
+Roster import (bulk enrollment).
+
+A roster names one student per line, by email or by student id:
+
+    CSV     one column, or a header row with an `email` / `student_id` column
+    JSONL   "ada@uni.edu", 42, {"email": "..."} or {"student_id": 42} per line
+
+The whole roster is resolved with one IN query per identifier kind and
+enrolled with INSERT ... ON CONFLICT DO NOTHING RETURNING, both in chunks of
+ROSTER_CHUNK_SIZE, in one transaction. The rows the insert returns are the new
+enrollments; every other resolved student was already enrolled.
+"""
+import csv
+import io
+import json
+import os
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from backend import crud, models
+
+ROSTER_MAX_ENTRIES = int(os.getenv("ROSTER_MAX_ENTRIES", 50_000))
+# Rows per IN list / multi-row INSERT (stays under SQLite's and asyncpg's bind limits)
+ROSTER_CHUNK_SIZE = int(os.getenv("ROSTER_CHUNK_SIZE", 5_000))
+
+EMAIL_COLUMNS = ("email", "email_id")
+ID_COLUMNS = ("student_id", "id")
+
+# Both select (key, student_id)
+_STUDENTS_BY_EMAIL = select(models.Student.email_id, models.Student.student_id).where(
+    models.Student.email_id.in_(bindparam("keys", expanding=True))
+)
+_STUDENTS_BY_ID = select(models.Student.student_id, models.Student.student_id).where(
+    models.Student.student_id.in_(bindparam("keys", expanding=True))
+)
+
+
+class RosterError(ValueError):
+    pass
+
+
+""" Parsing """
+
+def _classify(value):
+    """("email", str) / ("student_id", int), or None for anything else."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return ("student_id", value)
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            return ("student_id", int(value))
+        if "@" in value:
+            return ("email", value)
+    return None
+
+def _parse_csv(text: str):
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column, kind = 0, None
+    for i, name in enumerate(header):
+        if name in EMAIL_COLUMNS or name in ID_COLUMNS:
+            column, kind = i, "email" if name in EMAIL_COLUMNS else "student_id"
+            rows = rows[1:]
+            break
+
+    entries = []
+    for line, row in enumerate(rows, start=2 if kind else 1):
+        cell = row[column].strip() if column < len(row) else ""
+        entry = _classify(cell)
+        if entry is None or (kind and entry[0] != kind):
+            entry = (None, f"line {line}: {cell!r}")
+        entries.append(entry)
+    return entries
+
+def _parse_jsonl(text: str):
+    entries = []
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            entries.append((None, f"line {line}: not JSON"))
+            continue
+        if isinstance(value, dict):
+            value = next((value[k] for k in EMAIL_COLUMNS + ID_COLUMNS if k in value), None)
+        entries.append(_classify(value) or (None, f"line {line}: {raw.strip()[:80]}"))
+    return entries
+
+def parse_roster(body: bytes, content_type: str = "text/csv"):
+    """
+    [(kind, value)] in roster order; kind is "email", "student_id", or None
+    for an unreadable line (value then describes it).
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise RosterError("Roster must be UTF-8 text")
+    is_jsonl = "json" in (content_type or "").lower()
+    entries = _parse_jsonl(text) if is_jsonl else _parse_csv(text)
+    if len(entries) > ROSTER_MAX_ENTRIES:
+        raise RosterError(f"Roster has {len(entries)} entries; the limit is {ROSTER_MAX_ENTRIES}")
+    return entries
+
+
+""" Enrollment """
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), ROSTER_CHUNK_SIZE):
+        yield values[i:i + ROSTER_CHUNK_SIZE]
+
+def enroll_roster(db: Session, course_id: int, entries):
+    """Enrolls every resolvable student in the course and commits. Returns the summary."""
+    wanted = {"email": {}, "student_id": {}}
+    invalid, repeated = [], 0
+    for kind, value in entries:
+        if kind is None:
+            invalid.append(value)
+        elif value in wanted[kind]:
+            repeated += 1
+        else:
+            wanted[kind][value] = None
+
+    # 1. Resolve identifiers to student ids
+    resolved = {}
+    for kind, statement in (("email", _STUDENTS_BY_EMAIL), ("student_id", _STUDENTS_BY_ID)):
+        for chunk in _chunks(wanted[kind]):
+            resolved.update(((kind, key), student_id) for key, student_id in db.execute(statement, {"keys": chunk}))
+    unknown = [str(value) for kind in wanted for value in wanted[kind] if (kind, value) not in resolved]
+
+    # The same student named by both email and id counts once
+    student_ids = list(dict.fromkeys(resolved.values()))
+    repeated += len(resolved) - len(student_ids)
+
+    # 2. Insert, skipping existing enrollments
+    link = models.course_student_link
+    statement = crud.insert_ignoring_duplicates(db, link).returning(link.c.student_id)
+    enrolled = set()
+    for chunk in _chunks(student_ids):
+        rows = [{"course_id": course_id, "student_id": student_id} for student_id in chunk]
+        enrolled.update(db.execute(statement, rows).scalars())
+    db.commit()
+
+    return {
+        "course_id": course_id,
+        "received": len(entries),
+        "enrolled": len(enrolled),
+        "already_enrolled": len(student_ids) - len(enrolled),
+        "duplicates": repeated,
+        "unknown": unknown,
+        "invalid": invalid,
+    }
@@ -2,7 +2,7 @@ from __future__ import annotations # fixes the circular dependency
 from pydantic import BaseModel, EmailStr, Field
 from datetime import date
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 # Pydantic is a data validatio library
 # Inheriting base model
 # Validation
@@ -272,6 +272,35 @@ class User(UserBase):
     class Config:
         from_attributes = True # Allows Pydantic to read SQLAlchemy models
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+class BulkUserRow(BaseModel):
+    """One row of a bulk provisioning file (CSV or JSONL)"""
+    email: EmailStr
+    full_name: str = Field(..., min_length=1)
+    role: Literal["student", "instructor", "analyst"]
+    password: str = Field(..., min_length=8)
+    # Optional profile fields, used by the matching role table
+    specialization: Optional[str] = None
+    country: Optional[str] = None
+    skill_level: Optional[str] = "Beginner"
+    contact_number: Optional[str] = None
+    dob: Optional[date] = None
+    department: Optional[str] = None
+
+class ProvisionError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class ProvisionReport(BaseModel):
+    total: int
+    created: int
+    failed: int
+    created_by_role: Dict[str, int]
+    errors: List[ProvisionError]
+
 # schemas.py
 class GradeUpdate(BaseModel):
     marks: int = Field(..., ge=0, le=100) # Validates marks are between 0-100
@@ -333,10 +362,36 @@ class FolderSchema(BaseModel):
 
 FolderSchema.model_rebuild() # Necessary for recursive models in Pydantic V2
 
+""" Schema for batched content (/content/batch) """
+class ContentItem(BaseModel):
+    item_id: int
+    item_type: str
+    # exactly one of these is set, matching item_type
+    video: Optional[Video] = None
+    notes: Optional[Notes] = None
+    assignment: Optional[Assignment] = None
+    textbook: Optional[Textbook] = None
+    class Config: from_attributes = True
+
+class ContentBatch(BaseModel):
+    items: Dict[int, ContentItem]
+    missing: List[int] = []   # ids that are unknown or have no content behind them
+
 
 class FolderCreate(BaseModel):
     title: str
 
+class FolderMove(BaseModel):
+    parent_id: Optional[int] = None # None moves the folder to the top level
+
+class FolderPosition(BaseModel):
+    folder_id: int
+    title: str
+    parent_id: Optional[int] = None
+    path: str
+    depth: int
+    class Config: from_attributes = True
+
 class ItemLinkCreate(BaseModel):
     reference_id: int # This will be the video_id, notes_id, etc.
 
@@ -438,3 +493,12 @@ class CountryRegistration(BaseModel):
 class CountryRegistrationList(BaseModel):
     countries: List[CountryRegistration] = []
 
+
+class RosterImportSummary(BaseModel):
+    course_id: int
+    received: int
+    enrolled: int
+    already_enrolled: int
+    duplicates: int  # repeated in the roster
+    unknown: List[str] = []
+    invalid: List[str] = []
@@ -2,110 +2,264 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from backend import models, database
+from backend.config import settings
+from backend.revocation import revocations
 import os
-from sqlalchemy.orm import Session
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import bindparam, select, inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 
 # This tells FastAPI where to look for the token (the /login URL)
 # looks at the header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 1024))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
 
-def get_curr_student(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid Email")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid Token")
 
-    # 1. Verify role in User table
-    user_account = db.query(models.User).filter(
-        models.User.email == email, 
-        models.User.role == "student"
-    ).first()
-    
-    if not user_account:
-        raise HTTPException(status_code=403, detail="Not a student account")
+""" Principal cache """
 
-    # 2. Fetch and return the actual STUDENT object
-    student_profile = db.query(models.Student).filter(models.Student.email_id == email).first()
-    
-    if not student_profile:
-        raise HTTPException(status_code=404, detail="Student profile not found")
-        
-    return student_profile
+class PrincipalCache:
+    """
+    Bounded LRU cache of resolved profiles keyed by (email, role), with a TTL.
+    Only column values are stored, never live ORM objects, so an entry can be
+    re-attached to whichever request session asks for it without a query.
+    The cache is per process: other workers pick up changes once the TTL expires.
+    """
 
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
 
-def get_curr_instructor(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid Token")
+    def get(self, email: str, role: str):
+        key = (email, role)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, model, values = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return model, values
 
-    # 1. Verify role in User table
-    user_account = db.query(models.User).filter(
-        models.User.email == email, 
-        models.User.role == "instructor"
-    ).first()
-    
-    if not user_account:
-        raise HTTPException(status_code=403, detail="Not an instructor account")
+    def put(self, email: str, role: str, profile):
+        if self.maxsize <= 0:
+            return
+        model = type(profile)
+        values = {attr.key: getattr(profile, attr.key) for attr in sa_inspect(model).column_attrs}
+        with self._lock:
+            self._entries[(email, role)] = (time.monotonic() + self.ttl, model, values)
+            self._entries.move_to_end((email, role))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
 
-    # 2. Fetch and return the actual INSTRUCTOR object
-    instructor_profile = db.query(models.Instructor).filter(models.Instructor.email_id == email).first()
-    
-    return instructor_profile
+    def invalidate(self, *emails):
+        """Drop every cached role for the given email addresses."""
+        emails = {e for e in emails if e}
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in emails]:
+                del self._entries[key]
+                self.invalidations += 1
 
-def get_curr_analyst(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _attach_cached(db: Session, model, values):
+    """Rebuild a cached profile and attach it to the request session (no SELECT)."""
+    profile = model(**values)
+    make_transient_to_detached(profile)
+    return db.merge(profile, load=False)
+
+
+""" Current-user dependencies """
+
+# role -> (profile model, token claim holding the profile id, wrong-role message, missing-profile message)
+# The claim name is also the profile's primary key column.
+# A missing-profile message of None keeps the old behaviour of returning None
+# (the instructor routes check for that themselves).
+ROLE_PROFILES = {
+    "student": (models.Student, "student_id", "Not a student account", "Student profile not found"),
+    "instructor": (models.Instructor, "instructor_id", "Not an instructor account", None),
+    "analyst": (models.DataAnalyst, "analyst_id", "Not a data analyst account", "Analyst profile not found"),
+    "admin": (models.SystemAdmin, "admin_id", "Not an admin account", "Admin profile not found"),
+}
+
+
+def _profile_statements(model, id_claim):
+    """The lookups a role's principal needs, built once with bind parameters (see crud.py)."""
+    return {
+        # profile by primary key, joined to its User row by id
+        "by_claims": select(model).join(
+            models.User, models.User.email == model.email_id
+        ).where(
+            getattr(model, id_claim) == bindparam("profile_id"),
+            models.User.id == bindparam("user_id"),
+            models.User.role == bindparam("role")
+        ).limit(1),
+        "by_email": select(model).where(model.email_id == bindparam("email")).limit(1),
+        "profile_id": select(getattr(model, id_claim)).where(model.email_id == bindparam("email")),
+    }
+
+PROFILE_STATEMENTS = {
+    role: _profile_statements(model, id_claim) for role, (model, id_claim, _, _) in ROLE_PROFILES.items()
+}
+
+_USER_BY_EMAIL_AND_ROLE = select(models.User).where(
+    models.User.email == bindparam("email"),
+    models.User.role == bindparam("role")
+).limit(1)
+
+
+def profile_claims(db: Session, user: models.User):
+    """Extra JWT claims for a user: the primary key of their role-specific profile."""
+    if user.role not in ROLE_PROFILES:
+        return {}
+    _, id_claim, _, _ = ROLE_PROFILES[user.role]
+    profile_id = db.scalar(PROFILE_STATEMENTS[user.role]["profile_id"], {"email": user.email})
+    return {id_claim: profile_id} if profile_id is not None else {}
+
+
+def decode_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid Token")
 
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid Email")
+    return payload
+
+
+def _load_profile_by_claims(db: Session, payload: dict, role: str):
+    """
+    One indexed query: the profile by primary key, joined to its User row by id.
+    The role filter makes tokens issued before a role change resolve to nothing.
+    """
+    _, id_claim, _, _ = ROLE_PROFILES[role]
+    return db.scalars(PROFILE_STATEMENTS[role]["by_claims"], {
+        "profile_id": payload[id_claim], "user_id": payload["user_id"], "role": role
+    }).first()
+
+
+def _load_profile_by_email(db: Session, email: str, role: str):
+    """Fallback for tokens issued before profile ids were added to the claims."""
+    _, _, wrong_role_detail, missing_detail = ROLE_PROFILES[role]
+
     # 1. Verify role in User table
-    user_account = db.query(models.User).filter(
-        models.User.email == email, 
-        models.User.role == "analyst"
-    ).first()
-    
+    user_account = db.scalars(_USER_BY_EMAIL_AND_ROLE, {"email": email, "role": role}).first()
+
     if not user_account:
-        raise HTTPException(status_code=403, detail="Not a data analyst account")
+        raise HTTPException(status_code=403, detail=wrong_role_detail)
+
+    # 2. Fetch the actual role-specific profile
+    profile = db.scalars(PROFILE_STATEMENTS[role]["by_email"], {"email": email}).first()
+
+    if not profile and missing_detail is not None:
+        raise HTTPException(status_code=404, detail=missing_detail)
+    return profile
+
+
+def _resolve_principal(token: str, db: Session, role: str):
+    payload = decode_token(token)
+    email = payload["sub"]
+    _, id_claim, wrong_role_detail, _ = ROLE_PROFILES[role]
+
+    if revocations.is_revoked(payload, db):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    if payload.get("role") not in (None, role):
+        raise HTTPException(status_code=403, detail=wrong_role_detail)
+
+    cached = principal_cache.get(email, role)
+    if cached is not None:
+        return _attach_cached(db, *cached)
+
+    if payload.get(id_claim) is not None and payload.get("user_id") is not None:
+        profile = _load_profile_by_claims(db, payload, role)
+        if not profile:
+            raise HTTPException(status_code=403, detail=wrong_role_detail)
+    else:
+        profile = _load_profile_by_email(db, email, role)
+        if not profile:
+            return None
 
-    # 2. Fetch and return the actual ANALYST object
-    analyst_profile = db.query(models.DataAnalyst).filter(models.DataAnalyst.email_id == email).first()
-    
-    if not analyst_profile:
-        raise HTTPException(status_code=404, detail="Analyst profile not found")
-    
-    return analyst_profile
+    principal_cache.put(email, role, profile)
+    return profile
+
+
+def get_curr_student(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    return _resolve_principal(token, db, "student")
+
+
+def get_curr_instructor(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    return _resolve_principal(token, db, "instructor")
+
+
+def get_curr_analyst(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    return _resolve_principal(token, db, "analyst")
 
 
 def get_curr_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid Token")
+    return _resolve_principal(token, db, "admin")
 
-    # 1. Verify role in User table
-    user_account = db.query(models.User).filter(
-        models.User.email == email, 
-        models.User.role == "admin"
-    ).first()
-    
-    if not user_account:
-        raise HTTPException(status_code=403, detail="Not an admin account")
-
-    # 2. Fetch and return the actual ADMIN object
-    admin_profile = db.query(models.SystemAdmin).filter(models.SystemAdmin.email_id == email).first()
-    
-    if not admin_profile:
-        raise HTTPException(status_code=404, detail="Admin profile not found")
-        
-    return admin_profile
\ No newline at end of file
+
+""" Async variants (backend/async_routes.py) """
+
+async def resolve_principal_async(token: str, db, role: str):
+    # run_sync drives the same resolver (cache, revocation check, claims query)
+    # over the AsyncSession's connection, so both paths share one implementation
+    return await db.run_sync(lambda session: _resolve_principal(token, session, role))
+
+
+async def get_curr_student_async(token: str = Depends(oauth2_scheme), db=Depends(database.get_async_db)):
+    return await resolve_principal_async(token, db, "student")
+
+
+async def get_curr_instructor_async(token: str = Depends(oauth2_scheme), db=Depends(database.get_async_db)):
+    return await resolve_principal_async(token, db, "instructor")
+
+
+async def get_curr_analyst_async(token: str = Depends(oauth2_scheme), db=Depends(database.get_async_db)):
+    return await resolve_principal_async(token, db, "analyst")
+
+
+async def get_curr_admin_async(token: str = Depends(oauth2_scheme), db=Depends(database.get_async_db)):
+    return await resolve_principal_async(token, db, "admin")
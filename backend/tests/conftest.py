@@ -0,0 +1,107 @@
+"""
+Test setup. The backend reads its settings when it is imported, so the
+environment (a throwaway SQLite file, fixed secrets, cheap bcrypt, in-process
+hashing, no rate limits) is set here, before any backend import.
+
+    python -m pytest backend/tests -q
+"""
+import itertools
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+_tmp_dir = tempfile.mkdtemp(prefix="mooc-tests-")
+os.environ.update({
+    "SQLALCHEMY_DATABASE_URI": f"sqlite:///{_tmp_dir}/test.db",
+    "REPLICA_DATABASE_URLS": "",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ADMIN_KEY": "admin-key",
+    "INSTRUCTOR_KEY": "instructor-key",
+    "ANALYST_KEY": "analyst-key",
+    "HASH_POOL_WORKERS": "0",
+    "PASSWORD_HASH_ROUNDS": "4",
+    "RATE_LIMIT_ENABLED": "false",
+})
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from backend import database, main, migrations, models, replicas, revocation
+
+migrations.upgrade()
+
+ROLE_KEYS = {"student": None, "instructor": "instructor-key", "analyst": "analyst-key", "admin": "admin-key"}
+_emails = itertools.count(1)
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture(autouse=True)
+def _no_sticky_reads():
+    """Start every test as a caller who has not written recently."""
+    replicas.router.sticky._until.clear()
+    yield
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def revocations_synced(monkeypatch, db):
+    """Token checks make no revocation-sync query during the test."""
+    revocation.revocations._sync(db)
+    monkeypatch.setattr(revocation, "REVOCATION_SYNC_SECONDS", 3600)
+
+@pytest.fixture
+def statements():
+    """`with statements() as log:` collects the SQL run on the primary engine inside the block."""
+    @contextmanager
+    def record():
+        log = []
+        def collect(conn, cursor, statement, parameters, context, executemany):
+            log.append(statement)
+        event.listen(database.engine, "before_cursor_execute", collect)
+        try:
+            yield log
+        finally:
+            event.remove(database.engine, "before_cursor_execute", collect)
+    return record
+
+@pytest.fixture
+def account(client):
+    """account(role) signs up a fresh user and returns (email, auth headers)."""
+    def create(role="student", password="password123"):
+        email = f"{role}{next(_emails)}@tests.edu"
+        response = client.post("/signup", json={
+            "email": email, "full_name": f"Test {role.title()}", "role": role,
+            "password": password, "enrollment_key": ROLE_KEYS[role],
+        })
+        assert response.status_code == 201, response.text
+        response = client.post("/login", json={"email": email, "password": password})
+        assert response.status_code == 200, response.text
+        client.cookies.clear()
+        replicas.router.sticky._until.clear()
+        return email, {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return create
+
+@pytest.fixture
+def course(db):
+    """A new course with its standard folders."""
+    from backend import crud
+    row = models.Course(course_name=f"Course {next(_emails)}", duration=10, skill_level="Beginner", course_fees=100)
+    db.add(row)
+    db.flush()
+    crud.create_standard_folders(db, row.course_id)
+    db.commit()
+    return row
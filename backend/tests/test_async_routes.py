@@ -0,0 +1,24 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import async_routes, models
+
+
+def test_textbook_content_matches_the_sync_route(client, db, course):
+    folder = db.query(models.Folder).filter(models.Folder.course_id == course.course_id,
+                                            models.Folder.title == "Materials").one()
+    db.add(models.Textbook(title="Async Book", author="A. Author", publisher="Press", course_id=course.course_id))
+    item = models.FolderItem(folder_id=folder.folder_id, item_type="textbook")
+    db.add(item)
+    db.commit()
+
+    async_app = FastAPI()
+    async_app.include_router(async_routes.router)
+    with TestClient(async_app) as async_client:
+        response = async_client.get(f"/content/book/{item.item_id}")
+        missing = async_client.get("/content/book/999999")
+
+    assert response.status_code == 200, response.text
+    assert response.json() == client.get(f"/content/book/{item.item_id}").json()
+    assert response.json()["edition"] == "N/A"
+    assert missing.status_code == 404
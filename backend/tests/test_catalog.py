@@ -0,0 +1,42 @@
+from backend import catalog, models
+
+
+def _version(db):
+    db.expire_all()
+    return db.get(models.CatalogVersion, 1).version
+
+
+def test_catalog_version_bumps_on_course_and_university_changes(db):
+    start = _version(db)
+
+    university = models.University(name="Version U", city="Pune", country="India")
+    db.add(university)
+    db.commit()
+    assert _version(db) == start + 1
+
+    db.add(models.Course(course_name="Version C", duration=1, skill_level="Beginner", course_fees=0,
+                         institute_id=university.institute_id))
+    db.commit()
+    assert _version(db) == start + 2
+
+    # bulk statements count too
+    db.query(models.University).filter(models.University.institute_id == university.institute_id).update(
+        {models.University.city: "Mumbai"}, synchronize_session=False
+    )
+    db.commit()
+    assert _version(db) == start + 3
+
+    db.add(models.Topic(topic_name="Not in the catalog"))
+    db.commit()
+    assert _version(db) == start + 3
+
+
+def test_a_committed_change_is_visible_in_the_next_page(client, db):
+    catalog.catalog_cache.invalidate()
+    before = [u["name"] for u in client.get("/universities?limit=100").json()["universities"]]
+    assert "Fresh U" not in before
+
+    db.add(models.University(name="Fresh U", city="Delhi", country="India"))
+    db.commit()
+    after = [u["name"] for u in client.get("/universities?limit=100").json()["universities"]]
+    assert "Fresh U" in after
@@ -0,0 +1,85 @@
+import pytest
+
+from backend import crud, models
+
+
+@pytest.fixture
+def tree(db, account, course):
+    """General > A > B > C, plus a top-level X, in a course taught by the returned instructor."""
+    email, headers = account("instructor")
+    instructor_id = db.query(models.Instructor.instructor_id).filter(models.Instructor.email_id == email).scalar()
+    crud.assign_instructor_to_course(db, course.course_id, instructor_id)
+    course_id = course.course_id
+    general = db.query(models.Folder).filter(models.Folder.course_id == course_id, models.Folder.title == "General").one()
+    a = crud.create_folder(db, "A", course_id, parent_id=general.folder_id)
+    b = crud.create_folder(db, "B", course_id, parent_id=a.folder_id)
+    c = crud.create_folder(db, "C", course_id, parent_id=b.folder_id)
+    x = crud.create_folder(db, "X", course_id)
+    crud.add_item_to_folder(db, c.folder_id, "video", 1)
+    ids = {"course": course_id, "general": general.folder_id, "a": a.folder_id, "b": b.folder_id,
+           "c": c.folder_id, "x": x.folder_id}
+    return ids, headers
+
+def _folders(db, course_id):
+    db.expire_all()
+    return db.query(models.Folder).filter(models.Folder.course_id == course_id).all()
+
+def assert_paths_consistent(db, course_id):
+    """Every path is the parent's path plus the folder's own id, and depth matches."""
+    folders = {f.folder_id: f for f in _folders(db, course_id)}
+    for folder in folders.values():
+        parent = folders.get(folder.parent_id)
+        prefix = parent.path if parent else "/"
+        assert folder.path == f"{prefix}{folder.folder_id}/"
+        assert folder.depth == (parent.depth + 1 if parent else 0)
+
+
+def test_paths_are_set_on_insert(db, tree):
+    ids, _ = tree
+    assert_paths_consistent(db, ids["course"])
+    assert db.get(models.Folder, ids["c"]).path == f"/{ids['general']}/{ids['a']}/{ids['b']}/{ids['c']}/"
+
+
+def test_move_rewrites_the_whole_subtree(client, db, tree):
+    ids, headers = tree
+    response = client.post(f"/courses/{ids['course']}/{ids['a']}/move", json={"parent_id": ids["x"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["path"] == f"/{ids['x']}/{ids['a']}/"
+    assert_paths_consistent(db, ids["course"])
+    assert db.get(models.Folder, ids["c"]).depth == 3
+
+    response = client.post(f"/courses/{ids['course']}/{ids['a']}/move", json={"parent_id": None}, headers=headers)
+    assert response.json()["depth"] == 0
+    assert_paths_consistent(db, ids["course"])
+
+
+@pytest.mark.parametrize("target", ["a", "c"])
+def test_moving_a_folder_into_its_own_subtree_is_rejected(client, db, tree, target):
+    ids, headers = tree
+    before = {f.folder_id: f.path for f in _folders(db, ids["course"])}
+    response = client.post(f"/courses/{ids['course']}/{ids['a']}/move", json={"parent_id": ids[target]}, headers=headers)
+    assert response.status_code == 400
+    assert {f.folder_id: f.path for f in _folders(db, ids["course"])} == before
+
+
+def test_delete_removes_the_subtree_and_its_items(client, db, tree):
+    ids, headers = tree
+    response = client.delete(f"/courses/{ids['course']}/{ids['a']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["folders_deleted"] == 3
+
+    remaining = {f.folder_id for f in _folders(db, ids["course"])}
+    assert not remaining & {ids["a"], ids["b"], ids["c"]}
+    assert {ids["general"], ids["x"]} <= remaining
+    assert db.query(models.FolderItem).filter(models.FolderItem.folder_id == ids["c"]).count() == 0
+    assert_paths_consistent(db, ids["course"])
+
+
+def test_subtree_depth_limit(client, tree):
+    ids, _ = tree
+    response = client.get(f"/courses/{ids['course']}/{ids['a']}/subtree?max_depth=1")
+    assert response.status_code == 200
+    b = response.json()["subfolders"][0]
+    assert b["folder_id"] == ids["b"] and b["subfolders"] == []
+    full = client.get(f"/courses/{ids['course']}/{ids['a']}/subtree").json()
+    assert full["subfolders"][0]["subfolders"][0]["items"][0]["video_id"] == 1
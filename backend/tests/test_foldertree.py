@@ -0,0 +1,21 @@
+from backend import crud, foldertree, models
+
+
+def test_course_tree_is_two_reads_on_a_miss_and_none_on_a_hit(client, db, course, statements):
+    course_id = course.course_id
+    general = db.query(models.Folder).filter(models.Folder.course_id == course_id, models.Folder.title == "General").one()
+    week = crud.create_folder(db, "Week 1", course_id, parent_id=general.folder_id)
+    crud.add_item_to_folder(db, week.folder_id, "video", 1)
+    foldertree.folder_trees.clear()
+
+    with statements() as miss:
+        response = client.get(f"/courses/{course_id}")
+    assert response.status_code == 200
+    assert len(miss) == 2
+    assert all(s.lstrip().upper().startswith("SELECT") for s in miss)
+    assert [f["title"] for f in response.json()] == list(crud.STANDARD_FOLDERS)
+    assert response.json()[0]["subfolders"][0]["items"][0]["video_id"] == 1
+
+    with statements() as hit:
+        assert client.get(f"/courses/{course_id}").json() == response.json()
+    assert hit == []
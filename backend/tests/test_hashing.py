@@ -0,0 +1,66 @@
+import asyncio
+import dataclasses
+import os
+import re
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+from backend import hashing, main, models
+from backend.config import get_settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_calibration_runs_at_startup_off_the_event_loop(monkeypatch):
+    calls = []
+
+    def calibrate(target_ms):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("worker thread")
+        return 4
+
+    monkeypatch.setattr(hashing, "settings", dataclasses.replace(
+        get_settings(), password_hash_rounds=None, password_hash_target_ms=50.0))
+    monkeypatch.setattr(hashing, "calibrate", calibrate)
+    monkeypatch.setattr(hashing, "_rounds", None)
+    monkeypatch.setattr(hashing, "_context", None)
+
+    with TestClient(main.app):
+        assert calls == ["worker thread"]
+        assert hashing.configured_rounds() == 4
+    assert calls == ["worker thread"]
+
+
+def test_login_rehashes_a_password_below_the_calibrated_cost(monkeypatch, client, db, account):
+    email, _ = account("student", password="password123")
+    weak_hash = hashing.build_context(4).hash("password123")
+    user = db.query(models.User).filter(models.User.email == email).one()
+    user.hashed_password = weak_hash
+    db.commit()
+
+    # this host now calibrates to a higher cost than the stored hash's
+    monkeypatch.setattr(hashing, "_rounds", 5)
+    monkeypatch.setattr(hashing, "_context", None)
+    response = client.post("/login", json={"email": email, "password": "password123"})
+    assert response.status_code == 200, response.text
+
+    db.expire_all()
+    stored = db.get(models.User, user.id).hashed_password
+    assert stored != weak_hash
+    assert hashing.build_context(5).verify("password123", stored)
+    assert not hashing.get_context().needs_update(stored)
+
+
+def test_calibrate_command_reads_the_env_file(tmp_path):
+    env_file = tmp_path / "calibrate.env"
+    env_file.write_text("PASSWORD_HASH_MIN_ROUNDS=4\nPASSWORD_HASH_MAX_ROUNDS=5\n")
+    env = dict(os.environ, ENV_FILE=str(env_file))
+    result = subprocess.run([sys.executable, "-m", "backend.hashing", "calibrate", "--samples", "1"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    # the cost range comes from the file: rounds 4 and 5 are timed, nothing else
+    assert [int(r) for r in re.findall(r"rounds=\s*(\d+)", result.stdout)] == [4, 5]
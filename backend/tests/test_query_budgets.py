@@ -0,0 +1,113 @@
+"""
+Statement counts of the hot read endpoints, pinned. Each endpoint is called
+for a student with one course and with several, cold caches, so a query that
+starts running per course, folder or assignment (an N+1) changes the count.
+"""
+import pytest
+
+from backend import catalog, crud, foldertree, models, revocation
+from backend.querybudget import assert_query_budget
+from backend.security import principal_cache
+
+# auth is one query: the token's profile id and role, joined to its user
+EXPECTED = {
+    "/student": 4,                          # auth, catalog version, catalog page, my_list
+    "/courses/{course_id}": 2,              # folders, items
+    "/student/enrollments/{course_id}": 4,  # auth, enrollments, folders, items
+    "/student/grades": 2,                   # auth, one grades query
+    "/student/courses/{course_id}/grades": 3,
+}
+
+
+@pytest.fixture(autouse=True)
+def cold_caches(monkeypatch, db):
+    revocation.revocations._sync(db)
+    monkeypatch.setattr(revocation, "REVOCATION_SYNC_SECONDS", 3600)
+    yield
+    principal_cache.clear()
+
+def seed(db, email, courses):
+    student = db.query(models.Student).filter(models.Student.email_id == email).one()
+    course_ids = []
+    for i in range(courses):
+        course = models.Course(course_name=f"Budget {email} {i}", duration=4, skill_level="Beginner", course_fees=0)
+        db.add(course)
+        db.flush()
+        crud.create_standard_folders(db, course.course_id)
+        db.execute(models.course_student_link.insert().values(course_id=course.course_id, student_id=student.student_id))
+        db.add(models.Evaluation(student_id=student.student_id, course_id=course.course_id, marks=80, grade="A"))
+        for j in range(3):
+            assignment = models.Assignment(title=f"A{j}", assignment_url_link="https://example.com", course_id=course.course_id)
+            db.add(assignment)
+            db.flush()
+            db.add(models.StudentSubmission(assignment_id=assignment.assignment_id, student_id=student.student_id,
+                                            submission_url="https://example.com/s", obtained_marks=j))
+        course_ids.append(course.course_id)
+    db.commit()
+    return course_ids
+
+@pytest.mark.parametrize("courses", [1, 4])
+@pytest.mark.parametrize("route", list(EXPECTED))
+def test_hot_endpoint_query_counts(client, db, account, route, courses):
+    email, headers = account("student")
+    course_id = seed(db, email, courses)[0]
+    principal_cache.clear()
+    catalog.catalog_cache.invalidate()
+    foldertree.folder_trees.clear()
+
+    response = assert_query_budget(client, "GET", route.format(course_id=course_id), headers=headers)
+    assert response.status_code == 200, response.text
+    assert int(response.headers["x-query-count"]) == EXPECTED[route]
+
+
+@pytest.mark.parametrize("route, role, cold, warm", [
+    ("/universities", None, 2, 0),           # catalog version, page; then cached
+    ("/admin/courses", "admin", 3, 1),       # auth, catalog version, page; then auth only
+])
+def test_catalog_query_counts(client, account, route, role, cold, warm):
+    headers = account(role)[1] if role else {}
+    catalog.catalog_cache.invalidate()
+    for expected in (cold, warm):
+        principal_cache.clear()
+        response = assert_query_budget(client, "GET", route, headers=headers)
+        assert response.status_code == 200, response.text
+        assert int(response.headers["x-query-count"]) == expected
+
+
+def seed_instructor(db, email, courses):
+    """Courses taught by the instructor, each with a nested folder, items and students."""
+    instructor = db.query(models.Instructor).filter(models.Instructor.email_id == email).one()
+    for i in range(courses):
+        course = models.Course(course_name=f"Taught {email} {i}", duration=4, skill_level="Beginner", course_fees=0)
+        db.add(course)
+        db.flush()
+        crud.create_standard_folders(db, course.course_id)
+        db.execute(models.course_instructor_link.insert().values(course_id=course.course_id,
+                                                                 instructor_id=instructor.instructor_id))
+        parent = db.query(models.Folder).filter(models.Folder.course_id == course.course_id).first()
+        for depth in range(i + 1):
+            parent = models.Folder(title=f"Week {depth}", course_id=course.course_id, parent_id=parent.folder_id)
+            db.add(parent)
+            db.flush()
+            db.add(models.FolderItem(folder_id=parent.folder_id, item_type="notes"))
+        for j in range(2):
+            student = models.Student(name=f"Student {i} {j}", email_id=f"taught-{course.course_id}-{j}@tests.edu")
+            db.add(student)
+            db.flush()
+            db.execute(models.course_student_link.insert().values(course_id=course.course_id,
+                                                                  student_id=student.student_id))
+    db.commit()
+
+@pytest.mark.parametrize("courses", [1, 6])
+def test_instructor_courses_query_count(client, db, account, courses):
+    email, headers = account("instructor")
+    seed_instructor(db, email, courses)
+    principal_cache.clear()
+    foldertree.folder_trees.clear()
+
+    # auth, courses, folders, folder items, students: the same for any number of courses or folders
+    response = assert_query_budget(client, "GET", "/instructor/courses", headers=headers)
+    assert response.status_code == 200, response.text
+    assert int(response.headers["x-query-count"]) == 5
+    assert len(response.json()) == courses
+    assert all(len(c["students_enrolled"]) == 2 for c in response.json())
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from backend import database, replicas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Split mode is fixed when backend.database is imported, so it runs in its own process
+SPLIT_MODE_SCRIPT = textwrap.dedent("""
+    from fastapi.testclient import TestClient
+    from backend import database, main, migrations, replicas
+
+    assert database.sqlite_split_enabled(database.db_url)
+    migrations.upgrade()
+    client = TestClient(main.app)
+    client.post("/signup", json={"email": "split@tests.edu", "full_name": "Split", "role": "student",
+                                 "password": "password123", "enrollment_key": None})
+    token = client.post("/login", json={"email": "split@tests.edu", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Just logged in (a write): sticky, so the read falls back to the primary
+    response = client.get("/student", headers=headers)
+    assert response.status_code == 200, response.text
+
+    client.cookies.clear()
+    replicas.router.sticky._until.clear()
+    response = client.get("/student", headers=headers)
+    assert response.status_code == 200, response.text
+    assert replicas.router.replicas[0].reads == 1
+""")
+
+
+def test_routed_get_in_sqlite_split_mode(tmp_path):
+    env = dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path}/split.db",
+        SQLITE_TUNED="true",
+        SQLITE_READER_POOL_SIZE="2",
+        DB_POOL_TIMEOUT="5",
+    )
+    result = subprocess.run([sys.executable, "-c", SPLIT_MODE_SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+def test_primary_fallback_shares_the_request_session(client, account):
+    _, headers = account("student")
+    before = database.pool_metrics.checkouts
+    response = client.get("/student", headers=headers)
+    assert response.status_code == 200
+    # get_curr_student and the routed read use the same primary connection
+    assert database.pool_metrics.checkouts - before == 1
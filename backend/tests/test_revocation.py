@@ -0,0 +1,66 @@
+import math
+from datetime import timedelta
+
+from backend import models, querybudget
+from backend.revocation import _utcnow, revocations, user_key
+
+
+def test_revoke_user_keeps_tokens_issued_later_in_the_same_second(db):
+    email = "same-second@tests.edu"
+    revocations.revoke_user(db, email)
+    revoked_second = math.floor(revocations._exact[user_key(email)][1])
+
+    assert revocations.is_revoked({"sub": email, "iat": revoked_second - 1}, db)
+    assert not revocations.is_revoked({"sub": email, "iat": revoked_second}, db)
+
+
+def test_checks_never_write(db):
+    revocations._loaded = False  # next check reloads, as on a compaction period
+    with querybudget.count_queries() as counts:
+        revocations.is_revoked({"sub": "reader@tests.edu", "iat": 0}, db)
+    assert counts.count > 0
+    assert not [s for s in counts.shapes if not s.lstrip().upper().startswith("SELECT")]
+
+
+def test_purge_expired_deletes_only_expired_rows(db):
+    now = _utcnow()
+    db.add_all([
+        models.RevokedToken(jti="expired-jti", expires_at=now - timedelta(minutes=1), revoked_at=now),
+        models.RevokedToken(jti="live-jti", expires_at=now + timedelta(minutes=5), revoked_at=now),
+    ])
+    db.commit()
+
+    assert revocations.purge_expired() >= 1
+    db.expire_all()
+    assert db.get(models.RevokedToken, "expired-jti") is None
+    assert db.get(models.RevokedToken, "live-jti") is not None
+
+
+def test_revocation_applies_only_when_its_transaction_commits(db):
+    rolled_back, committed = "rolled-back@tests.edu", "committed@tests.edu"
+    revocations.revoke_user(db, rolled_back, commit=False)
+    db.rollback()
+    revocations.revoke_user(db, committed, commit=False)
+    assert user_key(committed) not in revocations._exact
+    db.commit()
+
+    assert user_key(rolled_back) not in revocations._exact
+    assert db.get(models.RevokedToken, user_key(rolled_back)) is None
+    assert user_key(committed) in revocations._exact
+
+
+def test_failed_revocation_keeps_the_user(monkeypatch, client, db, account):
+    email, _ = account("student")
+    _, admin_headers = account("admin")
+    student_id = db.query(models.Student.student_id).filter(models.Student.email_id == email).scalar()
+
+    def fail(db, email, commit=True):
+        raise RuntimeError("revocation store down")
+    monkeypatch.setattr(revocations, "revoke_user", fail)
+
+    response = client.delete(f"/admin/del_student/{student_id}", headers=admin_headers)
+    assert response.status_code == 500
+    db.expire_all()
+    # the deletion was rolled back with the revocation, so the 500 is accurate
+    assert db.get(models.Student, student_id) is not None
+    assert db.query(models.User).filter(models.User.email == email).count() == 1
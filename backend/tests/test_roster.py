@@ -0,0 +1,30 @@
+from backend import models
+
+
+def test_bulk_roster_import_with_duplicates(client, db, account, course):
+    course_id = course.course_id
+    first, _ = account("student")
+    second, _ = account("student")
+    second_id = db.query(models.Student.student_id).filter(models.Student.email_id == second).scalar()
+    _, admin = account("admin")
+
+    roster = "\n".join([first, first, str(second_id), second, "nobody@tests.edu", "not an email", ""])
+    response = client.post(f"/admin/course/{course_id}/enroll_bulk", content=roster,
+                           headers={**admin, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+    summary = response.json()
+    assert summary["received"] == 6
+    assert summary["enrolled"] == 2
+    assert summary["already_enrolled"] == 0
+    assert summary["duplicates"] == 2        # first twice; second by id and by email
+    assert summary["unknown"] == ["nobody@tests.edu"]
+    assert len(summary["invalid"]) == 1
+
+    # Importing again changes nothing
+    jsonl = f'"{first}"\n{{"student_id": {second_id}}}\n'
+    again = client.post(f"/admin/course/{course_id}/enroll_bulk", content=jsonl,
+                        headers={**admin, "Content-Type": "application/x-ndjson"}).json()
+    assert again["enrolled"] == 0 and again["already_enrolled"] == 2
+
+    enrolled = db.query(models.course_student_link).filter(models.course_student_link.c.course_id == course_id).count()
+    assert enrolled == 2
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+
+from backend import models
+from backend.security import _resolve_principal, principal_cache
+
+
+def _token(headers):
+    return headers["Authorization"].split()[1]
+
+@pytest.fixture
+def student(account, revocations_synced):
+    email, headers = account("student")
+    principal_cache.clear()
+    yield email, _token(headers)
+    principal_cache.clear()
+
+
+def test_principal_cache_hit(db, student, statements):
+    email, token = student
+    with statements() as miss:
+        profile = _resolve_principal(token, db, "student")
+    with statements() as hit:
+        cached = _resolve_principal(token, db, "student")
+    assert len(miss) == 1
+    assert hit == []
+    assert cached.student_id == profile.student_id and cached.email_id == email
+
+
+def test_principal_cache_entries_expire(db, student, statements, monkeypatch):
+    _, token = student
+    monkeypatch.setattr(principal_cache, "ttl", 0.0)
+    _resolve_principal(token, db, "student")
+    expirations = principal_cache.expirations
+    with statements() as log:
+        _resolve_principal(token, db, "student")
+    assert len(log) == 1
+    assert principal_cache.expirations == expirations + 1
+
+
+def test_removing_a_profile_invalidates_its_cache_entry(client, db, account, student):
+    email, token = student
+    student_id = _resolve_principal(token, db, "student").student_id
+    assert principal_cache.get(email, "student") is not None
+
+    _, admin = account("admin")
+    assert client.delete(f"/admin/del_student/{student_id}", headers=admin).status_code == 200
+    assert principal_cache.get(email, "student") is None
+    # revoked (401), or within the revocation's own second, no longer resolving (403)
+    assert client.get("/student", headers={"Authorization": f"Bearer {token}"}).status_code in (401, 403)
+
+
+def test_token_with_profile_claims_resolves_in_one_query(db, student, statements):
+    _, token = student
+    with statements() as log:
+        profile = _resolve_principal(token, db, "student")
+    assert profile is not None
+    assert len(log) == 1
+    assert "JOIN users" in log[0]
+
+
+def test_claims_stop_resolving_after_a_role_change(db, student):
+    email, token = student
+    db.query(models.User).filter(models.User.email == email).update({models.User.role: "analyst"})
+    db.commit()
+    with pytest.raises(HTTPException) as error:
+        _resolve_principal(token, db, "student")
+    assert error.value.status_code == 403
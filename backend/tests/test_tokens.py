@@ -0,0 +1,33 @@
+from backend import models
+
+
+def test_deleting_a_user_deletes_their_refresh_tokens(client, db, account):
+    email, _ = account("student")
+    refresh_token = client.post("/login", json={"email": email, "password": "password123"}).json()["refresh_token"]
+    user = db.query(models.User).filter(models.User.email == email).one()
+    user_id = user.id
+    assert db.query(models.RefreshToken).filter(models.RefreshToken.user_id == user_id).count() == 2
+
+    _, admin = account("admin")
+    assert client.delete(f"/admin/user/{user_id}", headers=admin).status_code == 200
+
+    db.expire_all()
+    assert db.query(models.RefreshToken).filter(models.RefreshToken.user_id == user_id).count() == 0
+    assert client.post("/token/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+
+def test_refresh_rotates_and_rejects_reuse_of_an_old_token(client, account):
+    email, _ = account("student")
+    first = client.post("/login", json={"email": email, "password": "password123"}).json()
+
+    rotated = client.post("/token/refresh", json={"refresh_token": first["refresh_token"]})
+    assert rotated.status_code == 200
+    second = rotated.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    assert client.get("/student", headers={"Authorization": f"Bearer {second['access_token']}"}).status_code == 200
+
+    # The rotated-out token is single use: presenting it again revokes the family
+    reused = client.post("/token/refresh", json={"refresh_token": first["refresh_token"]})
+    assert reused.status_code == 401
+    assert reused.json()["detail"] == "Refresh token reuse detected"
+    assert client.post("/token/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
@@ -0,0 +1,113 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from jose import jwt
+from sqlalchemy.orm import Session
+from backend import models
+from backend.revocation import revocations
+from backend.config import settings
+from backend.security import profile_claims
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def hash_refresh_token(raw_token: str) -> str:
+    # Refresh tokens are 256 random bits, so a fast hash is enough (no bcrypt)
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+""" Access tokens """
+
+def create_access_token(db: Session, user: models.User) -> str:
+    # We include 'sub' (the subject, usually email) and 'role'
+    token_data = {
+        "sub": user.email,
+        "role": user.role,
+        "user_id": user.id
+    }
+    # Plus the role-specific profile id (student_id, instructor_id, ...)
+    # so the auth dependencies can resolve the profile by primary key
+    token_data.update(profile_claims(db, user))
+
+    # Calculate expiration; jti lets this one token be revoked (see /logout)
+    issued_at = datetime.now(timezone.utc)
+    expire = issued_at + timedelta(minutes=settings.access_token_expire_minutes)
+    token_data.update({"exp": expire, "iat": issued_at, "jti": uuid.uuid4().hex})
+
+    return jwt.encode(token_data, settings.secret_key, algorithm=settings.algorithm)
+
+
+""" Refresh tokens """
+
+def issue_refresh_token(db: Session, user_id: int, family_id: str = None) -> str:
+    raw_token = secrets.token_urlsafe(32)
+    db.add(models.RefreshToken(
+        token_hash=hash_refresh_token(raw_token),
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=_utcnow() + timedelta(days=settings.refresh_token_expire_days),
+    ))
+    db.commit()
+    return raw_token
+
+def issue_tokens(db: Session, user: models.User, family_id: str = None):
+    """The login/refresh response body."""
+    user_id, role = user.id, user.role
+    return {
+        "access_token": create_access_token(db, user),
+        "refresh_token": issue_refresh_token(db, user_id, family_id),
+        "token_type": "bearer",
+        "role": role
+    }
+
+def revoke_family(db: Session, family_id: str):
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.family_id == family_id,
+        models.RefreshToken.revoked_at == None
+    ).update({models.RefreshToken.revoked_at: _utcnow()}, synchronize_session=False)
+    db.commit()
+
+def revoke_refresh_token(db: Session, raw_token: str):
+    """Logout: kill the family the presented refresh token belongs to."""
+    stored = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == hash_refresh_token(raw_token)
+    ).first()
+    if stored:
+        revoke_family(db, stored.family_id)
+
+def rotate_refresh_token(db: Session, raw_token: str):
+    """
+    Exchange a refresh token for a new access + refresh token pair.
+    Presenting a token that was already rotated or revoked is treated as theft:
+    the whole family is revoked, along with the user's access tokens.
+    """
+    invalid = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+    stored = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == hash_refresh_token(raw_token)
+    ).first()
+    if not stored or stored.expires_at <= _utcnow():
+        raise invalid
+
+    user = db.query(models.User).filter(models.User.id == stored.user_id).first()
+    if not user:
+        raise invalid
+    family_id, email = stored.family_id, user.email
+
+    # Claim the token atomically so two concurrent refreshes cannot both rotate it
+    claimed = db.query(models.RefreshToken).filter(
+        models.RefreshToken.id == stored.id,
+        models.RefreshToken.used_at == None,
+        models.RefreshToken.revoked_at == None
+    ).update({models.RefreshToken.used_at: _utcnow()}, synchronize_session=False)
+    db.commit()
+
+    if claimed != 1:
+        revoke_family(db, family_id)
+        revocations.revoke_user(db, email)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token reuse detected")
+
+    return issue_tokens(db, user, family_id=family_id)
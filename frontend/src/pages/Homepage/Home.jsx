@@ -5,22 +5,34 @@ import Features from './Features.jsx'
 import Roles from './Roles.jsx'
 import Footer from './Footer.jsx'
 import { useEffect, useState } from 'react'
+import { fetchPage } from '../../utils/pagination'
+
+const UNIVERSITIES_URL = 'http://127.0.0.1:8000/universities'
 
 const Home = () => {
   const [universities, setUniversities] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
 
   useEffect(() => {
     let mounted = true
-    fetch('http://127.0.0.1:8000/universities')
-      .then(async (res) => {
-        if (!res.ok) return []
-        const j = await res.json()
-        return j.universities || []
+    fetchPage(UNIVERSITIES_URL)
+      .then((j) => {
+        if (!mounted) return
+        setUniversities(j.universities || [])
+        setNextCursor(j.next_cursor || null)
       })
-      .then((list) => { if (mounted) setUniversities(list) })
       .catch(() => {})
     return () => { mounted = false }
   }, [])
+
+  const loadMore = () => {
+    fetchPage(UNIVERSITIES_URL, nextCursor)
+      .then((j) => {
+        setUniversities(prev => [...prev, ...(j.universities || [])])
+        setNextCursor(j.next_cursor || null)
+      })
+      .catch(() => {})
+  }
   return (
     <div>
       <Header />
@@ -37,6 +49,9 @@ const Home = () => {
                     <div className="muted">{u.city}, {u.country}</div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <button className="btn" type="button" onClick={loadMore} style={{flex:'0 0 auto',alignSelf:'center'}}>More</button>
+                )}
               </div>
             </div>
           </section>
@@ -2,10 +2,17 @@ import React, { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import Navbar from '../../components/administrator/Navbar'
 import Footer from '../../components/administrator/Footer'
+import { fetchPage } from '../../utils/pagination'
+
+const COURSES_URL = 'http://127.0.0.1:8000/admin/courses'
+const INSTRUCTORS_URL = 'http://127.0.0.1:8000/admin/instructors'
 
 const ManageCourses = () => {
   const [courses, setCourses] = useState([])
   const [instructors, setInstructors] = useState([])
+  const [coursesCursor, setCoursesCursor] = useState(null)
+  const [instructorsCursor, setInstructorsCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const navigate = useNavigate()
@@ -29,14 +36,15 @@ const ManageCourses = () => {
     const load = async () => {
       setLoading(true)
       try {
-        const r = await fetch('http://127.0.0.1:8000/admin/courses', { headers })
-        const data = await r.json()
+        const data = await fetchPage(COURSES_URL, null, { headers })
         if (!mounted) return
         setCourses(data.catalog || [])
+        setCoursesCursor(data.next_cursor || null)
 
-        const ri = await fetch('http://127.0.0.1:8000/admin/instructors', { headers })
-        const idi = await ri.json()
+        const idi = await fetchPage(INSTRUCTORS_URL, null, { headers })
+        if (!mounted) return
         setInstructors(idi.instructors || [])
+        setInstructorsCursor(idi.next_cursor || null)
       } catch (err) {
         console.error(err)
         setError('Failed to load courses')
@@ -49,6 +57,22 @@ const ManageCourses = () => {
     return () => { mounted = false }
   }, [])
 
+  // "Load more" for either list: appends the next page and keeps its cursor
+  const loadMore = async (url, cursor, key, setRows, setCursor) => {
+    const token = localStorage.getItem('access_token')
+    setLoadingMore(true)
+    try {
+      const data = await fetchPage(url, cursor, { headers: { 'Accept': 'application/json', 'Authorization': `Bearer ${token}` } })
+      setRows(prev => [...prev, ...(data[key] || [])])
+      setCursor(data.next_cursor || null)
+    } catch (err) {
+      console.error(err)
+      setError('Failed to load ' + key)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleCreate = async (e) => {
     e.preventDefault()
     setError(null)
@@ -201,6 +225,22 @@ const ManageCourses = () => {
             })}
           </ul>
         )}
+        {!loading && (coursesCursor || instructorsCursor) && (
+          <div style={{display:'flex',gap:8}}>
+            {coursesCursor && (
+              <button className="btn" type="button" disabled={loadingMore}
+                onClick={() => loadMore(COURSES_URL, coursesCursor, 'catalog', setCourses, setCoursesCursor)}>
+                {loadingMore ? 'Loading…' : 'Load more courses'}
+              </button>
+            )}
+            {instructorsCursor && (
+              <button className="btn" type="button" disabled={loadingMore}
+                onClick={() => loadMore(INSTRUCTORS_URL, instructorsCursor, 'instructors', setInstructors, setInstructorsCursor)}>
+                {loadingMore ? 'Loading…' : 'Load more instructors'}
+              </button>
+            )}
+          </div>
+        )}
       </section>
       </div>
       <Footer />
@@ -1,9 +1,14 @@
 import React, { useEffect, useState } from 'react'
 import Navbar from '../../components/administrator/Navbar'
 import Footer from '../../components/administrator/Footer'
+import { fetchPage } from '../../utils/pagination'
+
+const UNIVERSITIES_URL = 'http://127.0.0.1:8000/admin/universities'
 
 const ManageUniversities = () => {
   const [universities, setUniversities] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [name, setName] = useState('')
   const [city, setCity] = useState('')
   const [country, setCountry] = useState('')
@@ -19,10 +24,10 @@ const ManageUniversities = () => {
     const load = async () => {
       setLoading(true)
       try {
-        const res = await fetch('http://127.0.0.1:8000/admin/universities', { headers })
-        const data = await res.json()
+        const data = await fetchPage(UNIVERSITIES_URL, null, { headers })
         if (!mounted) return
         setUniversities(data.universities || [])
+        setNextCursor(data.next_cursor || null)
       } catch (err) {
         console.error(err)
         setError('Failed to load universities')
@@ -35,6 +40,21 @@ const ManageUniversities = () => {
     return () => { mounted = false }
   }, [])
 
+  const loadMore = async () => {
+    const token = localStorage.getItem('access_token')
+    setLoadingMore(true)
+    try {
+      const data = await fetchPage(UNIVERSITIES_URL, nextCursor, { headers: { 'Accept': 'application/json', 'Authorization': `Bearer ${token}` } })
+      setUniversities(prev => [...prev, ...(data.universities || [])])
+      setNextCursor(data.next_cursor || null)
+    } catch (err) {
+      console.error(err)
+      setError('Failed to load universities')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleCreate = async (e) => {
     e.preventDefault()
     setError(null)
@@ -104,6 +124,11 @@ const ManageUniversities = () => {
               ))}
             </ul>
           )}
+          {!loading && nextCursor && (
+            <button className="btn" type="button" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading…' : 'Load more'}
+            </button>
+          )}
         </section>
       </div>
       <Footer />
@@ -2,6 +2,9 @@ import React, { useEffect, useState } from 'react'
 import { useNavigate, Link } from 'react-router-dom'
 import Navbar from '../../components/student/Navbar'
 import Footer from '../../components/student/Footer'
+import { fetchPage } from '../../utils/pagination'
+
+const STUDENT_URL = 'http://127.0.0.1:8000/student'
 
 // Student home: reads `user` from localStorage, redirects to login if missing,
 // fetches enrolled courses from API and displays them.
@@ -11,6 +14,8 @@ const Home = () => {
   const [studentId, setStudentId] = useState(null)
   const [courses, setCourses] = useState([])
   const [catalog, setCatalog] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [enrollConfirm, setEnrollConfirm] = useState({ show: false, course: null })
   const [enrolling, setEnrolling] = useState(false)
   const [loading, setLoading] = useState(true)
@@ -40,10 +45,9 @@ const Home = () => {
       return
     }
 
-    // Fetch student home data from backend (run once on mount)
-    const endpoint = 'http://127.0.0.1:8000/student'
-
-    fetch(endpoint, {
+    // Fetch student home data from backend (run once on mount); the catalog
+    // is the first page, "Load more" fetches the next ones
+    fetchPage(STUDENT_URL, null, {
       method: 'GET',
       credentials: 'include',
       headers: {
@@ -51,13 +55,6 @@ const Home = () => {
         'Authorization': `Bearer ${token}`
       },
     })
-      .then(async (res) => {
-        if (!res.ok) {
-          const txt = await res.text()
-          throw new Error(txt || 'Failed to fetch courses')
-        }
-        return res.json()
-      })
       .then((data) => {
         if (!mounted) return
         // Extract student info from backend response
@@ -65,8 +62,9 @@ const Home = () => {
         setUser(prev => ({ ...(prev || {}), firstName: studentName }))
         // my_list contains enrolled courses
         setCourses(Array.isArray(data.my_list) ? data.my_list : [])
-        // catalog contains all available courses
+        // catalog contains the first page of available courses
         setCatalog(Array.isArray(data.catalog) ? data.catalog : [])
+        setNextCursor(data.next_cursor || null)
         // Set student_id for profile navigation
         if (data.student_id) {
           setStudentId(data.student_id)
@@ -87,6 +85,25 @@ const Home = () => {
     }
   }, [])
 
+  const loadMore = async () => {
+    const token = localStorage.getItem('access_token')
+    setLoadingMore(true)
+    try {
+      const data = await fetchPage(STUDENT_URL, nextCursor, {
+        credentials: 'include',
+        headers: { 'Accept': 'application/json', 'Authorization': `Bearer ${token}` },
+      })
+      setCatalog(prev => [...prev, ...(Array.isArray(data.catalog) ? data.catalog : [])])
+      setNextCursor(data.next_cursor || null)
+    } catch (err) {
+      // keep the courses already shown; the button stays for a retry
+      console.error(err)
+      alert('Could not load more courses. Try again later.')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const renderCourses = () => {
     if (loading) return <div className="student-loading">Loading courses...</div>
     if (error) return <div className="student-error">{error}</div>
@@ -168,6 +185,14 @@ const Home = () => {
           })}
         </div>
 
+        {catalog.length > 0 && nextCursor && (
+          <div style={{ display: 'flex', justifyContent: 'center', marginTop: '1rem' }}>
+            <button className="btn" type="button" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more courses'}
+            </button>
+          </div>
+        )}
+
         {/* Confirm enroll modal */}
         {enrollConfirm.show && (
           <div className="modal-overlay" onClick={closeEnroll}>
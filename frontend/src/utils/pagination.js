@@ -0,0 +1,15 @@
+// The listing endpoints (/student catalog, /admin/courses, /admin/instructors,
+// /admin/universities, /universities, ...) return one keyset page at a time:
+// { <key>: [...], next_cursor }. Pages show the first page and a "Load more"
+// button that fetches the next one with fetchPage(url, next_cursor).
+export async function fetchPage(url, cursor = null, options = {}) {
+  const pageUrl = cursor
+    ? `${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}`
+    : url
+  const res = await fetch(pageUrl, options)
+  if (!res.ok) {
+    const txt = await res.text()
+    throw new Error(txt || `Failed to fetch ${url}`)
+  }
+  return res.json()
+}